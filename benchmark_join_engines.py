@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the join/aggregate engines (join_engine setting) on synthetic data:
+supplier cumulation (cumule_fournisseurs) and platform stock lookup
+(StockIndex + update_plateforme), for 'hash' and 'sort'.
+
+    python benchmark_join_engines.py --supplier-rows 2000000 --platform-rows 1000000 --platforms 5
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for imports
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from config.config_path_variables import ID_PRODUCT, QUANTITY
+from functions.functions_ids import JOIN_ENGINES, ProductIdDictionary, StockIndex
+from functions.functions_update import cumule_fournisseurs, update_plateforme, mark_canonical_ids
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the hash and sort join engines")
+    parser.add_argument("--supplier-rows", type=int, default=1_000_000, help="Rows over all suppliers")
+    parser.add_argument("--suppliers", type=int, default=10, help="Number of suppliers")
+    parser.add_argument("--platform-rows", type=int, default=500_000, help="Rows per platform")
+    parser.add_argument("--platforms", type=int, default=4, help="Number of platforms")
+    parser.add_argument("--catalog", type=int, default=800_000, help="Distinct product IDs")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine (best time is kept)")
+    return parser.parse_args()
+
+
+def synthetic_ids(rng, catalog, n):
+    return np.char.add("AB", rng.integers(0, catalog, n).astype(str)).astype(object)
+
+
+def make_data(args):
+    rng = np.random.default_rng(0)
+    per_supplier = args.supplier_rows // args.suppliers
+    fournisseurs = {}
+    for i in range(args.suppliers):
+        reduced = pd.DataFrame({ID_PRODUCT: synthetic_ids(rng, args.catalog, per_supplier),
+                                QUANTITY: rng.integers(0, 50, per_supplier)})
+        fournisseurs[f"F{i}"] = {'reduced_data': mark_canonical_ids(reduced)}
+    plateformes = [mark_canonical_ids(pd.DataFrame({ID_PRODUCT: synthetic_ids(rng, args.catalog, args.platform_rows),
+                                                    QUANTITY: rng.integers(0, 50, args.platform_rows)}))
+                   for _ in range(args.platforms)]
+    return fournisseurs, plateformes
+
+
+def run_engine(engine, fournisseurs, plateformes):
+    timings = {}
+    start = time.perf_counter()
+    cumule = cumule_fournisseurs(fournisseurs, ids=ProductIdDictionary(), engine=engine)
+    timings['cumule'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stock_index = StockIndex.from_frame(cumule, ID_PRODUCT, QUANTITY, engine=engine)
+    timings['index'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [update_plateforme(df.copy(), None, f"P{i}", 'cumule', stock_index=stock_index)
+               for i, df in enumerate(plateformes)]
+    timings['plateformes'] = time.perf_counter() - start
+    return timings, cumule, results
+
+
+def main() -> int:
+    args = parse_args()
+    print(f"🔄 Données: {args.supplier_rows:,} lignes fournisseurs ({args.suppliers} fournisseurs), "
+          f"{args.platforms} plateformes x {args.platform_rows:,} lignes, {args.catalog:,} références")
+    fournisseurs, plateformes = make_data(args)
+
+    best, outputs = {}, {}
+    for engine in JOIN_ENGINES:
+        for _ in range(args.repeat):
+            timings, cumule, results = run_engine(engine, fournisseurs, plateformes)
+            best[engine] = {k: min(v, best.get(engine, {}).get(k, v)) for k, v in timings.items()}
+        outputs[engine] = (cumule, results)
+
+    # Les deux moteurs doivent produire exactement les mêmes tables
+    reference_cumule, reference_results = outputs[JOIN_ENGINES[0]]
+    for engine, (cumule, results) in outputs.items():
+        pd.testing.assert_frame_equal(cumule, reference_cumule)
+        for (df, changes), (df_ref, changes_ref) in zip(results, reference_results):
+            pd.testing.assert_frame_equal(df, df_ref)
+            pd.testing.assert_frame_equal(changes, changes_ref)
+
+    print(f"{'moteur':<8}{'cumul (s)':>12}{'index (s)':>12}{'plateformes (s)':>18}{'total (s)':>12}")
+    for engine, timings in best.items():
+        print(f"{engine:<8}{timings['cumule']:>12.3f}{timings['index']:>12.3f}"
+              f"{timings['plateformes']:>18.3f}{sum(timings.values()):>12.3f}")
+    print("✅ Résultats identiques pour tous les moteurs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,11 +24,16 @@ UPDATED_FILES_PATH_RACINE = ROOT_DIR / "UPDATED_FILES"
 UPDATED_FILES_PATH = ROOT_DIR / "UPDATED_FILES" / "fichiers_platforms"
 VERIFIED_FILES_PATH = ROOT_DIR / "Verifier" 
 BACKUP_LOCAL_PATH = ROOT_DIR / "backup"
+CACHE_FOLDER = ROOT_DIR / "cache"  # Caches persistants entre deux exécutions
 
 # Fichiers YAML
 HEADER_PLATFORMS_YAML = CONFIG / "header_platforms.yaml"
 HEADER_FOURNISSEURS_YAML = CONFIG / "header_fournisseurs.yaml"
 YAML_ENCODING_SEP_FILE_PATH = CONFIG / "config_encodings_separateurs.yaml"
+DIALECT_CACHE_PATH = CACHE_FOLDER / "dialect_cache.yaml"
+SUPPLIER_CACHE_PATH = CACHE_FOLDER / "fournisseurs"  # Données fournisseur normalisées, par hash du contenu
+PIPELINE_SETTINGS_PATH = CONFIG / "pipeline_settings.yaml"
+STOCK_TOKENS_PATH = CONFIG / "stock_tokens.yaml"  # Jetons de stock textuels -> quantités
 
 # Constantes
 YAML_REFERENCE_NAME = 'nom_reference'
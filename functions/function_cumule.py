@@ -36,7 +36,7 @@ def read_data_and_save_params(index, data_f):
     print(df[qty_col].dtype)
     print('This is row original', df[df[ref_col]== 'BM91518H'])
     print('This is reduced qte row original processed', df[df[ref_col] == 'BM91518H'])
-    df[qty_col] = df[qty_col].apply(process_stock_value)  
+    df[qty_col] = process_stock_series(df[qty_col])  
     print('This is row original processed', df[df[ref_col] == 'BM91518H'])
     print('*** *** ', df.head())
     # Renommer et nettoyer les colonnes
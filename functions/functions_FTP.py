@@ -1,4 +1,5 @@
 import os
+import io
 
 from utils import *
 from ftplib import FTP
@@ -37,11 +38,62 @@ def create_ftp_config(keys, is_fournisseur=True):
 # ------------------------------------------------------------------------------
 #                           Download File via FTP
 # ------------------------------------------------------------------------------
-def download_file_from_ftp(ftp, remote_file, local_file):
+class SpoolingDownload:
     """
-    Charger le fichier du serveur FTP ==> puis créer une copie localement
+    Cible de retrbinary: les octets restent en mémoire tant que le fichier ne
+    dépasse pas max_bytes; au-delà, ils sont déversés dans local_file et la suite
+    du transfert y est écrite. Un fichier resté en mémoire est enregistré sous
+    local_file (register_memory_file) et lu sans aller-retour disque.
+    """
+
+    def __init__(self, local_file, max_bytes: int):
+        self.local_file = local_file
+        self.max_bytes = max_bytes
+        self._buffer = io.BytesIO()
+        self._file = None
+
+    def write(self, block: bytes) -> None:
+        if self._file is None and self._buffer.tell() + len(block) > self.max_bytes:
+            self._file = open(self.local_file, "wb")
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._file or self._buffer).write(block)
+
+    def finish(self) -> bool:
+        """Termine le transfert. Returns True si le fichier est resté en mémoire."""
+        if self._file is not None:
+            self._file.close()
+            return False
+        release_memory_files([self.local_file])
+        if os.path.exists(self.local_file):
+            os.remove(self.local_file)    # copie disque d'un run précédent
+        register_memory_file(self.local_file, self._buffer.getvalue())
+        return True
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            os.remove(self.local_file)
+        self._buffer = None
+
+
+def download_file_from_ftp(ftp, remote_file, local_file, spool_max_bytes: int | None = None):
+    """
+    Charger le fichier du serveur FTP ==> puis créer une copie localement.
+    spool_max_bytes: si renseigné, le fichier reste en mémoire jusqu'à cette taille
+    (voir SpoolingDownload) et n'est écrit sur disque qu'au-delà.
     """
     try:
+        if spool_max_bytes:
+            target = SpoolingDownload(local_file, spool_max_bytes)
+            try:
+                ftp.retrbinary("RETR " + remote_file, target.write)
+            except Exception:
+                target.discard()
+                raise
+            where = "en mémoire" if target.finish() else "sur disque"
+            logger.info(f" -- ✅ --  Téléchargement terminé ({where}) : {remote_file}")
+            return True
         with open(local_file, "wb") as local_f:
             ftp.retrbinary("RETR " + remote_file, local_f.write)
         logger.info(f" -- ✅ --  Téléchargement terminé : {remote_file}")
@@ -107,13 +159,17 @@ def download_files_from_all_servers(ftp_servers, output_dir):
 # ------------------------------------------------------------------------------
 #       Load all/few Fournisseurs/ platforms existed in env file             
 # ------------------------------------------------------------------------------
-def load_fournisseurs_ftp(list_fournisseurs, report_gen=None):
+def load_fournisseurs_ftp(list_fournisseurs, report_gen=None, settings=None):
     # Clean old downloaded files (>5h) before fetching new ones
     try:
         os.makedirs(DOSSIER_FOURNISSEURS, exist_ok=True)
         delete_old_files(DOSSIER_FOURNISSEURS, max_age_hours=5, extensions=(".csv", ".xls", ".xlsx", ".txt"))
     except Exception as _cleanup_err:
         logger.warning(f"[WARNING]: Cleanup fournisseurs folder failed: {_cleanup_err}")
+    # Réglage ftp_in_memory: petits et moyens fichiers gardés en mémoire jusqu'à ftp_spool_max_mb
+    settings = settings if settings is not None else load_pipeline_settings()
+    spool_max_bytes = int(settings.get('ftp_spool_max_mb') or 0) * 1024 * 1024 if settings.get('ftp_in_memory') else None
+    release_memory_files()
     f_data_ftp = create_ftp_config(list_fournisseurs, is_fournisseur=True)
     downloaded_files_F = {}
     for name, config in f_data_ftp.items():
@@ -147,7 +203,7 @@ def load_fournisseurs_ftp(list_fournisseurs, report_gen=None):
                 for ftp_file in valid_files:
                     extension = os.path.splitext(ftp_file)[1]
                     local_path = os.path.join(DOSSIER_FOURNISSEURS, f"{name}-{ftp_file}")
-                    success = download_file_from_ftp(ftp, ftp_file, local_path)
+                    success = download_file_from_ftp(ftp, ftp_file, local_path, spool_max_bytes=spool_max_bytes)
                     if success:
                         local_paths.append(local_path)
                         if report_gen:
@@ -167,7 +223,7 @@ def load_fournisseurs_ftp(list_fournisseurs, report_gen=None):
                 if ftp_file:
                     extension = os.path.splitext(ftp_file)[1]
                     local_path = os.path.join(DOSSIER_FOURNISSEURS, f"{name}-{extension}")
-                    success = download_file_from_ftp(ftp, ftp_file, local_path)
+                    success = download_file_from_ftp(ftp, ftp_file, local_path, spool_max_bytes=spool_max_bytes)
                     if success:
                         downloaded_files_F[name] = local_path
                         if report_gen:
@@ -365,18 +421,10 @@ def load_platforms_local(list_platforms, report_gen=None):
             original_file = platform_files[0]
             logger.info(f"[INFO]: Found original file for {platform_name}: {original_file.name} in subfolder {platform_name}")
             
-            # Copy to legacy location for compatibility with existing processing logic
-            legacy_path = DOSSIER_PLATFORMS / f"{platform_name}{original_file.suffix}"
-            
-            # Ensure legacy directory exists
-            DOSSIER_PLATFORMS.mkdir(parents=True, exist_ok=True)
-            
-            # Copy original file to legacy location
-            import shutil
-            shutil.copy2(original_file, legacy_path)
-            
-            loaded_files_P[platform_name] = str(legacy_path)
-            logger.info(f"[INFO]: ✅ Loaded original file for {platform_name}: {original_file} -> {legacy_path}")
+            # Lu sur place (projection mémoire en lecture seule): plus de copie vers fichiers_platforms,
+            # les fichiers mis à jour sont écrits dans UPDATED_FILES_PATH
+            loaded_files_P[platform_name] = str(original_file)
+            logger.info(f"[INFO]: ✅ Loaded original file for {platform_name}: {original_file}")
             
             if report_gen:
                 report_gen.add_platform_processed(platform_name)
@@ -522,6 +570,7 @@ def cleanup_temporary_directories():
     try:
         import shutil
         
+        release_memory_files()    # fichiers fournisseurs gardés en mémoire (ftp_in_memory)
         directories_to_clean = [
             ("fichiers_fournisseurs", DOSSIER_FOURNISSEURS),
             ("fichiers_platforms", DOSSIER_PLATFORMS)
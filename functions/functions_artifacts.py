@@ -0,0 +1,96 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from config.logging_config import logger
+from config.config_path_variables import VERIFIED_FILES_PATH
+
+
+ARTIFACT_FORMATS = ('parquet', 'feather')
+_SUFFIXES = {'parquet': '.parquet', 'feather': '.feather', 'pickle': '.pkl'}
+
+
+# ------------------------------------------------------------------------------
+#     Artefacts intermédiaires typés d'un run (Verifier/<run_id>/<type>__<nom>)
+# ------------------------------------------------------------------------------
+class IntermediateStore:
+    """
+    Données intermédiaires d'un run (fournisseurs réduits, cumul, plateformes
+    fusionnées) enregistrées en Parquet ou Feather: relecture immédiate avec les
+    types d'origine (identifiants gardés en texte). Sans pyarrow, ou pour une
+    table que pyarrow ne sait pas typer (colonne mixte), repli en pickle.
+    """
+
+    def __init__(self, run_id: str | None = None, fmt: str = 'parquet', root=None):
+        if fmt not in ARTIFACT_FORMATS:
+            logger.warning(f"-- ⚠️ -- Format d'artefact inconnu '{fmt}', utilisation de parquet")
+            fmt = 'parquet'
+        self.run_id = run_id or new_run_id()
+        self.fmt = fmt
+        self.root = Path(root or VERIFIED_FILES_PATH)
+        self.run_dir = self.root / self.run_id
+
+    def save(self, kind: str, name: str, df: pd.DataFrame) -> Path | None:
+        """Enregistre une table; les noms de colonnes sont convertis en texte (entêtes numériques)."""
+        try:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            df = df.rename(columns=str)
+            stem = f"{kind}__{_safe_name(name)}"
+            path = self.run_dir / f"{stem}{_SUFFIXES[self.fmt]}"
+            try:
+                if self.fmt == 'parquet':
+                    df.to_parquet(path, index=False)
+                else:
+                    df.reset_index(drop=True).to_feather(path)
+            except (ImportError, ValueError, TypeError) as e:
+                # pyarrow absent ou colonne non typable: le pickle garde les types pandas
+                logger.info(f"Artefact {stem} enregistré en pickle ({str(e)[:80]})")
+                path.unlink(missing_ok=True)
+                path = self.run_dir / f"{stem}{_SUFFIXES['pickle']}"
+                df.to_pickle(path)
+            return path
+        except Exception as e:
+            logger.warning(f"-- ⚠️ -- Impossible d'enregistrer l'artefact {kind}/{name}: {e}")
+            return None
+
+    def load(self, kind: str, name: str) -> pd.DataFrame:
+        stem = f"{kind}__{_safe_name(name)}"
+        for fmt, suffix in _SUFFIXES.items():
+            path = self.run_dir / f"{stem}{suffix}"
+            if path.is_file():
+                return _read_artifact(path, fmt)
+        raise FileNotFoundError(f"Artefact introuvable: {self.run_dir / stem}")
+
+    def artifacts(self) -> list[tuple[str, str]]:
+        """(type, nom) des artefacts du run."""
+        return sorted(tuple(p.stem.split('__', 1)) for p in self.run_dir.glob("*__*") if p.suffix in _SUFFIXES.values())
+
+    @classmethod
+    def latest(cls, root=None) -> 'IntermediateStore | None':
+        runs = list_runs(root)
+        return cls(runs[-1], root=root) if runs else None
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def list_runs(root=None) -> list[str]:
+    """Identifiants des runs enregistrés, du plus ancien au plus récent."""
+    root = Path(root or VERIFIED_FILES_PATH)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and p.name[:8].isdigit())
+
+
+def _read_artifact(path: Path, fmt: str) -> pd.DataFrame:
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    if fmt == 'feather':
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+
+def _safe_name(name: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(name))
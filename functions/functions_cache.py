@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from utils import open_dataset_file, stock_rules
+from config.logging_config import logger
+from config.config_path_variables import SUPPLIER_CACHE_PATH, YAML_REFERENCE_NAME, YAML_QUANTITY_NAME
+
+
+# Incrémenter quand la normalisation (process_stock_series, canonicalize_product_id) change
+# (la table de jetons de stock fait déjà partie de la clé):
+# les entrées existantes ne sont alors plus jamais relues puis sont évincées.
+SUPPLIER_CACHE_VERSION = 1
+HASH_BLOCK_BYTES = 1024 * 1024
+# Options de lecture sans effet sur la table normalisée (hors clé)
+_KEY_IGNORED_OPTIONS = ('csv_backend', 'streaming', 'chunk_size', 'workers')
+
+
+# ------------------------------------------------------------------------------
+#      Cache des données fournisseur normalisées (clé: SHA-256 des fichiers + mapping)
+# ------------------------------------------------------------------------------
+def file_sha256(file_path) -> str:
+    digest = hashlib.sha256()
+    with open_dataset_file(file_path) as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def supplier_cache_key(data_f: dict) -> str:
+    """
+    Clé d'un fournisseur: SHA-256 du contenu de chaque fichier (dans l'ordre) et de
+    la configuration de mapping (colonnes référence/quantité, entête, options
+    de lecture qui changent le résultat, table de jetons de stock).
+    """
+    chemin = data_f['chemin_fichier']
+    chemins = chemin if isinstance(chemin, list) else [chemin]
+    read_options = {k: v for k, v in (data_f.get('read_options') or {}).items() if k not in _KEY_IGNORED_OPTIONS}
+    config = {
+        'version': SUPPLIER_CACHE_VERSION,
+        'files': [file_sha256(c) for c in chemins],
+        'ref': str(data_f[YAML_REFERENCE_NAME]),
+        'qte': str(data_f[YAML_QUANTITY_NAME]),
+        'no_header': bool(data_f.get('no_header', False)),
+        'multi_file': bool(data_f.get('multi_file', False)),
+        'read_options': read_options,
+        'stock_rules': stock_rules(read_options.get('stock_tokens')).fingerprint,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _entry_path(key: str, cache_dir=None) -> Path:
+    return Path(cache_dir or SUPPLIER_CACHE_PATH) / f"{key}.pkl"
+
+
+def load_cached_supplier(key: str, cache_dir=None) -> dict | None:
+    """Données normalisées en cache (format read_fournisseur), None si absentes ou illisibles."""
+    path = _entry_path(key, cache_dir)
+    try:
+        entry = pd.read_pickle(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"-- ⚠️ -- Entrée de cache fournisseur illisible {path.name}: {e}")
+        return None
+    try:
+        os.utime(path)    # LRU: l'entrée relue devient la plus récente
+    except OSError:
+        pass
+    reduced = entry['reduced_data']
+    return {**entry, 'main_data': reduced, 'reduced_data': reduced}
+
+
+def store_cached_supplier(key: str, result: dict, max_bytes: int, cache_dir=None) -> None:
+    """Enregistre la table (ID_PRODUCT, QUANTITY) d'un fournisseur puis borne la taille du cache."""
+    path = _entry_path(key, cache_dir)
+    # Sans 'Chemin': la clé ne dépend que du contenu, le chemin vient du data_f courant
+    entry = {k: result[k] for k in ('ref', 'qte', 'reduced_data', 'sep', 'encoding')}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        pd.to_pickle(entry, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"-- ⚠️ -- Impossible d'enregistrer le cache fournisseur: {e}")
+        return
+    evict_supplier_cache(max_bytes, cache_dir)
+
+
+def evict_supplier_cache(max_bytes: int, cache_dir=None) -> int:
+    """Supprime les entrées les moins récemment utilisées au-delà de max_bytes. Returns le nombre supprimé."""
+    entries = []
+    for path in Path(cache_dir or SUPPLIER_CACHE_PATH).glob("*.pkl"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:    # évincée par un autre worker
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    if removed:
+        logger.info(f"🧹 Cache fournisseurs: {removed} entrées évincées (LRU)")
+    return removed
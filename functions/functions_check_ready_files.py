@@ -6,7 +6,7 @@ from dotenv import dotenv_values
 from functions.functions_FTP import *
 from config.logging_config import logger
 from config.config_path_variables import *
-from utils import get_entity_mappings, YAML_REFERENCE_NAME, YAML_QUANTITY_NAME
+from utils import get_entity_mappings, get_entity_read_options, dataset_file_exists, YAML_REFERENCE_NAME, YAML_QUANTITY_NAME
 
 # ----------------------------------------------------------------------
 #            Lire les info de l'FTP stockées en fichier .env
@@ -27,7 +27,8 @@ def keep_data_with_header_specified(list_fichiers):
               YAML_REFERENCE_NAME: str,
               YAML_QUANTITY_NAME: str,
               'no_header': bool,
-              'multi_file': bool
+              'multi_file': bool,
+              'read_options': dict    # ex. {'csv_backend': 'pyarrow'}
           }, ...
         }
     '''
@@ -46,7 +47,8 @@ def keep_data_with_header_specified(list_fichiers):
             YAML_REFERENCE_NAME: nom_ref,
             YAML_QUANTITY_NAME: qte_stock,
             'no_header': no_header,
-            'multi_file': multi_file
+            'multi_file': multi_file,
+            'read_options': get_entity_read_options(item)
         }
     return items_valides
 
@@ -60,13 +62,13 @@ def verifier_fichiers_existent(list_files):
     for item_file, infos in list_files.items():
         chemin = infos.get("chemin_fichier")
         if isinstance(chemin, list):
-            all_exist = all(os.path.isfile(f) for f in chemin)
+            all_exist = all(dataset_file_exists(f) for f in chemin)
             if all_exist:
                 item_valides[item_file] = infos
             else:
                 logger.error(f"-- ⚠️ --  Un ou plusieurs fichiers introuvables pour {item_file} → '{chemin}' → supprimé.")
         else:
-            if chemin and os.path.isfile(chemin):
+            if chemin and dataset_file_exists(chemin):
                 item_valides[item_file] = infos
             else:
                 logger.error(f"-- ⚠️ --  Fichier introuvable pour {item_file} → '{chemin}' → supprimé.")
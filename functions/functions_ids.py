@@ -0,0 +1,211 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------------------------
+#    Dictionnaire des identifiants produit d'un run (texte canonique -> int32)
+# ------------------------------------------------------------------------------
+class ProductIdDictionary:
+    """
+    Codes entiers denses (int32) des identifiants produit canoniques, partagés par
+    tous les fournisseurs et plateformes d'un run: regroupements, sommes et
+    jointures se font sur des tableaux d'entiers, les textes ne sont retrouvés
+    (decode) qu'au moment d'écrire les résultats.
+    """
+
+    def __init__(self):
+        self._index = pd.Index([], dtype=object)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def encode(self, ids) -> np.ndarray:
+        """Codes des identifiants; les identifiants inconnus reçoivent un nouveau code."""
+        values = np.asarray(ids, dtype=object)
+        with self._lock:
+            uniques = pd.unique(values)
+            new = uniques[self._index.get_indexer(uniques) < 0]
+            if len(new):
+                self._index = self._index.append(pd.Index(new, dtype=object))
+            index = self._index
+        return index.get_indexer(values).astype(np.int32)
+
+    def lookup(self, ids) -> np.ndarray:
+        """Codes des identifiants sans en ajouter (-1 pour un identifiant inconnu)."""
+        return self._index.get_indexer(np.asarray(ids, dtype=object)).astype(np.int32)
+
+    def decode(self, codes) -> np.ndarray:
+        return self._index.to_numpy()[np.asarray(codes)]
+
+    def dense(self, codes, values, fill=np.nan) -> np.ndarray:
+        """Tableau indexé par code (taille du dictionnaire): values aux codes donnés, fill ailleurs."""
+        values = np.asarray(values)
+        out = np.full(len(self), fill, dtype=np.result_type(values.dtype, np.min_scalar_type(fill)))
+        out[np.asarray(codes)] = values
+        return out
+
+
+# Moteurs de jointure/agrégation: tables de hachage (pandas) ou tri unique + searchsorted/reduceat
+JOIN_ENGINES = ('hash', 'sort')
+
+
+def sort_keys(product_ids) -> np.ndarray | None:
+    """
+    Identifiants en octets de largeur fixe (dtype 'S'): tri et searchsorted en C,
+    dans le même ordre que les textes pour des identifiants ASCII (canoniques).
+    None si un identifiant n'est pas ASCII.
+    """
+    try:
+        return np.asarray(product_ids, dtype=object).astype('S')
+    except UnicodeEncodeError:
+        return None
+
+
+def segment_sum(codes, values) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Somme des valeurs par clé (moteur 'sort'): clés (codes ou sort_keys) triées une
+    fois, puis une somme par segment avec np.add.reduceat. NaN compté 0, comme
+    groupby().sum(). Returns (clés distinctes croissantes, sommes).
+    """
+    codes = np.asarray(codes)
+    values = np.asarray(values)
+    if len(codes) == 0:
+        return codes[:0], values[:0]
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+    if sorted_values.dtype.kind == 'f':
+        sorted_values = np.nan_to_num(sorted_values, nan=0.0)
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    return sorted_codes[starts], np.add.reduceat(sorted_values, starts)
+
+
+def last_value_by_code(codes, values) -> np.ndarray:
+    """
+    Pour chaque ligne, la valeur de la dernière ligne portant le même code
+    (équivaut à dict(zip(codes, values)) puis .map(), sans table de hachage).
+    """
+    codes = np.asarray(codes)
+    if len(codes) == 0:
+        return np.asarray(values)
+    last = np.full(int(codes.max()) + 1, -1, dtype=np.int64)
+    np.maximum.at(last, codes, np.arange(len(codes)))
+    return np.asarray(values)[last[codes]]
+
+
+# ------------------------------------------------------------------------------
+#     Index figé du stock cumulé (construit une fois, interrogé par chaque plateforme)
+# ------------------------------------------------------------------------------
+class StockIndex:
+    """
+    Stock cumulé des fournisseurs figé en un pd.Index d'identifiants uniques et
+    un tableau de quantités aligné en lecture seule. Chaque plateforme ne fait
+    qu'un get_indexer: pas de fusion ni de dictionnaire intermédiaire.
+    """
+
+    def __init__(self, product_ids, quantities, engine: str = 'hash'):
+        index = pd.Index(np.asarray(product_ids, dtype=object), dtype=object)
+        if not index.is_unique:
+            raise ValueError("StockIndex: identifiants produit en double")
+        quantities = np.array(quantities)
+        if engine == 'sort' and not index.is_monotonic_increasing:
+            order = index.argsort()
+            index, quantities = index[order], quantities[order]
+        quantities.flags.writeable = False
+        self.index = index
+        self.quantities = quantities
+        self.engine = engine
+        # Moteur 'sort': identifiants triés en octets, recherche dichotomique sans table de hachage
+        self._keys = sort_keys(index) if engine == 'sort' else None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, id_column: str = 'ID_Product',
+                   quantity_column: str = 'Quantity', engine: str = 'hash') -> 'StockIndex':
+        return cls(df[id_column].to_numpy(), df[quantity_column].to_numpy(), engine=engine)
+
+    def positions(self, product_ids) -> np.ndarray:
+        """Position de chaque identifiant dans l'index (-1 s'il est absent)."""
+        product_ids = np.asarray(product_ids, dtype=object)
+        wanted = sort_keys(product_ids) if self._keys is not None else None
+        if wanted is None:
+            return self.index.get_indexer(product_ids)
+        if len(self._keys) == 0:
+            return np.full(len(product_ids), -1, dtype=np.intp)
+        positions = np.searchsorted(self._keys, wanted).clip(max=len(self._keys) - 1)
+        return np.where(self._keys[positions] == wanted, positions, -1)
+
+    def lookup(self, product_ids) -> np.ndarray:
+        """Quantité cumulée de chaque identifiant, NaN s'il est absent (dtype d'origine si tous présents)."""
+        positions = self.positions(product_ids)
+        found = positions >= 0
+        if found.all():
+            return self.quantities[positions]
+        out = np.full(len(positions), np.nan, dtype=np.result_type(self.quantities.dtype, np.float64))
+        out[found] = self.quantities[positions[found]]
+        return out
+
+
+# ------------------------------------------------------------------------------
+#     Contributions des fournisseurs (code produit x fournisseur), en colonnes
+# ------------------------------------------------------------------------------
+class SupplierContributions:
+    """
+    Stock de chaque fournisseur pour chaque produit, en trois tableaux alignés
+    triés par code produit (codes, fournisseur, quantité): une matrice creuse
+    code x fournisseur au format ligne compressée, construite en une passe
+    vectorisée au lieu d'un dictionnaire {produit: {fournisseur: qte}}.
+    Si un fournisseur liste un produit plusieurs fois, ses lignes sont sommées,
+    comme dans le cumul (et comme les données déjà agrégées du mode streaming).
+    """
+
+    def __init__(self, ids: ProductIdDictionary, suppliers, codes, supplier_idx, quantities):
+        self.ids = ids
+        self.suppliers = list(suppliers)
+        self.codes = codes
+        self.supplier_idx = supplier_idx
+        self.quantities = quantities
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def from_suppliers(cls, tables: dict, ids: ProductIdDictionary,
+                       id_column: str = 'ID_Product', quantity_column: str = 'Quantity') -> 'SupplierContributions':
+        """tables: {fournisseur: DataFrame (id_column, quantity_column)} aux identifiants canoniques."""
+        suppliers = list(tables)
+        if not suppliers:
+            return cls(ids, [], np.empty(0, np.int32), np.empty(0, np.int16), np.empty(0, np.int64))
+        codes = np.concatenate([ids.encode(df[id_column]) for df in tables.values()])
+        supplier_idx = np.repeat(np.arange(len(suppliers), dtype=np.int16), [len(df) for df in tables.values()])
+        quantities = np.concatenate([df[quantity_column].to_numpy() for df in tables.values()])
+        # Somme par couple (code, fournisseur), triée par code puis fournisseur
+        keys, sums = segment_sum(codes.astype(np.int64) * len(suppliers) + supplier_idx, quantities)
+        return cls(ids, suppliers, (keys // len(suppliers)).astype(np.int32),
+                   (keys % len(suppliers)).astype(np.int16), sums)
+
+    def frame(self, product_ids) -> pd.DataFrame:
+        """
+        Stock des fournisseurs pour chaque identifiant demandé (une ligne par
+        identifiant, dans l'ordre): une colonne Int64 par fournisseur listant au
+        moins un de ces produits (triées par nom), <NA> s'il ne le liste pas.
+        """
+        wanted = self.ids.lookup(product_ids)
+        left = np.searchsorted(self.codes, wanted, side='left')
+        counts = np.searchsorted(self.codes, wanted, side='right') - left
+        counts[wanted < 0] = 0
+        rows = np.repeat(np.arange(len(wanted)), counts)
+        entries = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(left, counts)
+        present = np.unique(self.supplier_idx[entries])
+        out = {}
+        for j in sorted(present, key=lambda j: self.suppliers[j]):
+            column = np.full(len(wanted), np.nan)
+            selected = self.supplier_idx[entries] == j
+            column[rows[selected]] = self.quantities[entries[selected]]
+            out[self.suppliers[j]] = pd.Series(column).astype('Int64').array
+        return pd.DataFrame(out, index=pd.RangeIndex(len(wanted)))
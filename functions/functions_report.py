@@ -1,4 +1,5 @@
 import time
+import threading
 from datetime import datetime
 from typing import List
 import logging
@@ -11,6 +12,40 @@ from pathlib import Path
 from utils import load_yaml_config
 from config.config_path_variables import CONFIG, LOG_FOLDER
 
+
+# Table des changements de stock: une ligne par produit modifié, puis une colonne
+# stock_<fournisseur> par fournisseur (stock du produit chez ce fournisseur, <NA> s'il ne le liste pas)
+CHANGE_COLUMNS = ['product_id', 'old_quantity', 'new_quantity', 'platform']
+SUPPLIER_STOCK_PREFIX = 'stock_'
+
+
+def empty_change_table() -> pd.DataFrame:
+    return pd.DataFrame({'product_id': pd.Series(dtype=object), 'old_quantity': pd.Series(dtype='int64'),
+                         'new_quantity': pd.Series(dtype='int64'), 'platform': pd.Series(dtype=object)})
+
+
+def change_table(changes) -> pd.DataFrame:
+    """
+    Table des changements: DataFrame retourné tel quel, ancienne liste de dicts
+    ({'product_id', 'old_quantity', 'new_quantity', 'platform', 'supplier_details'})
+    convertie en colonnes.
+    """
+    if isinstance(changes, pd.DataFrame):
+        return changes
+    changes = list(changes or [])
+    if not changes:
+        return empty_change_table()
+    df = pd.DataFrame([{k: c.get(k) for k in CHANGE_COLUMNS} for c in changes])
+    details = pd.DataFrame([c.get('supplier_details') or {} for c in changes])
+    for supplier in sorted(details.columns):
+        df[f'{SUPPLIER_STOCK_PREFIX}{supplier}'] = details[supplier].astype('Int64')
+    return df
+
+
+def supplier_stock_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if str(c).startswith(SUPPLIER_STOCK_PREFIX)]
+
+
 class ReportGenerator:
     def __init__(self):
         self.start_time = None
@@ -21,11 +56,13 @@ class ReportGenerator:
             'files_successful': [],
             'files_failed': [],
             'products_updated': 0,
-            'stock_changes': [],  # New field to track actual changes
+            'stock_changes': empty_change_table(),  # Table des changements (voir CHANGE_COLUMNS)
             'errors': [],
             'warnings': []
         }
         self.html_report = None
+        self.supplier_contributions = None  # SupplierContributions du run (stock par fournisseur)
+        self._lock = threading.RLock()  # les plateformes peuvent rapporter depuis plusieurs threads
         self.logger = logging.getLogger("ReportGenerator")
 
     def start_operation(self):
@@ -37,11 +74,12 @@ class ReportGenerator:
             'files_successful': [],
             'files_failed': [],
             'products_updated': 0,
-            'stock_changes': [],  # Reset stock changes
+            'stock_changes': empty_change_table(),  # Reset stock changes
             'errors': [],
             'warnings': []
         }
         self.html_report = None
+        self.supplier_contributions = None
         self.logger.info("Début de l'opération de mise à jour.")
 
     def end_operation(self):
@@ -49,33 +87,58 @@ class ReportGenerator:
         self.logger.info("Fin de l'opération de mise à jour.")
 
     def add_supplier_processed(self, supplier_name):
-        self.stats['suppliers_processed'].add(supplier_name)
+        with self._lock:
+            self.stats['suppliers_processed'].add(supplier_name)
 
     def add_platform_processed(self, platform_name):
-        self.stats['platforms_processed'].add(platform_name)
+        with self._lock:
+            self.stats['platforms_processed'].add(platform_name)
 
     def add_file_result(self, file_path, success, error_msg=None):
-        if success:
-            self.stats['files_successful'].append(file_path)
-        else:
-            self.stats['files_failed'].append({'file': file_path, 'error': error_msg})
-            if error_msg:
-                self.stats['errors'].append(error_msg)
+        with self._lock:
+            if success:
+                self.stats['files_successful'].append(file_path)
+            else:
+                self.stats['files_failed'].append({'file': file_path, 'error': error_msg})
+                if error_msg:
+                    self.stats['errors'].append(error_msg)
 
     def add_products_count(self, count):
-        self.stats['products_updated'] += count
+        with self._lock:
+            self.stats['products_updated'] += count
 
     def add_error(self, error_msg):
-        self.stats['errors'].append(error_msg)
+        with self._lock:
+            self.stats['errors'].append(error_msg)
 
     def add_warning(self, warning_msg):
-        self.stats['warnings'].append(warning_msg)
+        with self._lock:
+            self.stats['warnings'].append(warning_msg)
     
     def add_stock_changes(self, changes):
-        """Add stock changes to the report"""
-        self.stats['stock_changes'].extend(changes)
-        # Update the count of products actually updated
-        self.stats['products_updated'] = len(self.stats['stock_changes'])
+        """Add stock changes to the report (table des changements ou liste de dicts)"""
+        changes = change_table(changes)
+        if changes.empty:
+            return
+        with self._lock:
+            current = self.stats['stock_changes']
+            self.stats['stock_changes'] = changes.copy() if current.empty else pd.concat([current, changes], ignore_index=True)
+            # Update the count of products actually updated
+            self.stats['products_updated'] = len(self.stats['stock_changes'])
+
+    def set_supplier_contributions(self, contributions):
+        """Stock de chaque fournisseur (SupplierContributions), lu à la génération des rapports"""
+        self.supplier_contributions = contributions
+
+    def _stock_changes_table(self) -> pd.DataFrame:
+        """Changements de stock avec les colonnes stock_<fournisseur> lues dans les contributions"""
+        changes = self.stats['stock_changes']
+        if self.supplier_contributions is None or changes.empty:
+            return changes
+        breakdown = self.supplier_contributions.frame(changes['product_id'])
+        columns = {f'{SUPPLIER_STOCK_PREFIX}{supplier}': breakdown[supplier].array for supplier in breakdown.columns
+                   if f'{SUPPLIER_STOCK_PREFIX}{supplier}' not in changes.columns}
+        return changes.assign(**columns) if columns else changes
 
     def generate_html_report(self):
         try:
@@ -108,34 +171,27 @@ class ReportGenerator:
             if context['sections'].get('products_updated', True):
                 context['products_updated'] = self.stats['products_updated']
                 # Add stock changes details
-                context['stock_changes'] = self.stats['stock_changes']
-                context['has_stock_changes'] = len(self.stats['stock_changes']) > 0
+                changes = self._stock_changes_table()
+                context['stock_changes'] = changes
+                context['has_stock_changes'] = len(changes) > 0
 
                 # Build per-platform summary: changed_count and supplier contribution percentages using real supplier names
                 per_platform = {}
-                for change in self.stats['stock_changes']:
-                    platform = change.get('platform')
-                    if not platform:
-                        continue
-                    entry = per_platform.setdefault(platform, {
-                        'changed_count': 0,
-                        'total_new_quantity': 0,
-                        'supplier_totals': {},
-                        'supplier_article_counts': {}
-                    })
-                    entry['changed_count'] += 1
-                    new_q = change.get('new_quantity', 0) or 0
-                    entry['total_new_quantity'] += int(new_q)
-                    supplier_details = change.get('supplier_details', {}) or {}
-                    for supplier, qty in supplier_details.items():
-                        entry['supplier_totals'][supplier] = entry['supplier_totals'].get(supplier, 0) + (qty or 0)
+                supplier_cols = supplier_stock_columns(changes)
+                changes = changes[changes['platform'].notna() & (changes['platform'] != '')]
+                for platform, group in changes.groupby('platform', sort=False):
+                    supplier_stock = group[supplier_cols]
+                    listed = supplier_stock.notna().any()
+                    per_platform[platform] = {
+                        'changed_count': len(group),
+                        'total_new_quantity': int(group['new_quantity'].fillna(0).sum()),
+                        # Fournisseurs listant au moins un des produits modifiés
+                        'supplier_totals': {c[len(SUPPLIER_STOCK_PREFIX):]: supplier_stock[c].sum()
+                                            for c in supplier_cols if listed[c]},
                         # Count articles per supplier (only count if supplier contributes > 0)
-                        try:
-                            qty_val = int(qty)
-                        except Exception:
-                            qty_val = 0
-                        if qty_val > 0:
-                            entry['supplier_article_counts'][supplier] = entry['supplier_article_counts'].get(supplier, 0) + 1
+                        'supplier_article_counts': {c[len(SUPPLIER_STOCK_PREFIX):]: int((supplier_stock[c] > 0).sum())
+                                                    for c in supplier_cols if (supplier_stock[c] > 0).any()},
+                    }
 
                 # Compute percentages per supplier
                 platform_change_summary = []
@@ -152,9 +208,7 @@ class ReportGenerator:
                         pass
                     # Fallback to per-platform scan if global set is empty
                     if not all_suppliers:
-                        for ch in self.stats['stock_changes']:
-                            if ch.get('platform') == platform and isinstance(ch.get('supplier_details'), dict):
-                                all_suppliers.update(ch['supplier_details'].keys())
+                        all_suppliers.update(data['supplier_totals'].keys())
                     # Build percentages
                     candidate_suppliers = sorted(all_suppliers) if include_zero else sorted(data['supplier_totals'].keys())
                     for supplier in candidate_suppliers:
@@ -197,53 +251,23 @@ class ReportGenerator:
     def generate_csv_report(self):
         """Generate CSV files with stock changes - one per platform"""
         try:
-            if not self.stats['stock_changes']:
+            changes = self._stock_changes_table()
+            if changes.empty:
                 self.logger.info("Aucun changement de stock à exporter en CSV.")
                 return []
             
             # Create timestamp for consistent naming
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
-            # Create DataFrame from stock changes
-            df_all = pd.DataFrame(self.stats['stock_changes'])
-            
-            # Get all unique supplier names
-            all_suppliers = set()
-            for change in self.stats['stock_changes']:
-                if 'supplier_details' in change and isinstance(change['supplier_details'], dict):
-                    all_suppliers.update(change['supplier_details'].keys())
-            
-            sorted_suppliers = sorted(list(all_suppliers))
-            
-            # Prepare data for DataFrame
-            records = []
-            for change in self.stats['stock_changes']:
-                record = {
-                    'platform': change['platform'],
-                    'product_id': change['product_id'],
-                    'old_quantity': change['old_quantity'],
-                    'new_quantity': change['new_quantity'],
-                    'difference': change['new_quantity'] - change['old_quantity'],
-                    'run_timestamp': timestamp
-                }
-                
-                # Add individual supplier quantities
-                if 'supplier_details' in change and isinstance(change['supplier_details'], dict):
-                    for supplier in sorted_suppliers:
-                        record[f'stock_{supplier}'] = change['supplier_details'].get(supplier, 0)
-                
-                records.append(record)
-            
-            df_all = pd.DataFrame(records)
             # Enforce column order: core columns first, then supplier columns (sorted)
             core_cols = ['platform', 'product_id', 'old_quantity', 'new_quantity', 'difference', 'run_timestamp']
-            supplier_cols = [f'stock_{s}' for s in sorted_suppliers]
-            for col in core_cols:
-                if col not in df_all.columns:
-                    df_all[col] = None
+            supplier_cols = sorted(supplier_stock_columns(changes))
+            df_all = changes.assign(difference=changes['new_quantity'] - changes['old_quantity'],
+                                    run_timestamp=timestamp)
+            # Produit listé par au moins un fournisseur: 0 pour les autres fournisseurs
+            listed = df_all[supplier_cols].notna().any(axis=1)
             for col in supplier_cols:
-                if col not in df_all.columns:
-                    df_all[col] = None
+                df_all[col] = df_all[col].mask(listed & df_all[col].isna(), 0)
             df_all = df_all[core_cols + supplier_cols]
             platforms = df_all['platform'].unique()
             csv_files = []
@@ -299,7 +323,7 @@ class ReportGenerator:
             contents = [self.html_report]
             
             # Generate and attach CSV files if enabled and there are stock changes
-            if report_settings.get('attach_csv', True) and self.stats['stock_changes']:
+            if report_settings.get('attach_csv', True) and not self.stats['stock_changes'].empty:
                 csv_paths = self.generate_csv_report()
                 if csv_paths:
                     # Enforce total size cap for attachments
@@ -2,6 +2,8 @@ import os
 import warnings
 from pathlib import Path
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from utils import *
 from functions.functions_FTP import * 
@@ -9,6 +11,11 @@ from config.logging_config import logger
 from config.config_path_variables import *
 from config.temporary_data_list import current_dataFiles
 from functions.functions_check_ready_files import *
+from functions.functions_cache import supplier_cache_key, load_cached_supplier, store_cached_supplier
+from functions.functions_artifacts import IntermediateStore
+from functions.functions_ids import (JOIN_ENGINES, ProductIdDictionary, StockIndex, SupplierContributions,
+                                     last_value_by_code, segment_sum, sort_keys)
+from functions.functions_report import SUPPLIER_STOCK_PREFIX, empty_change_table
 
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
@@ -24,56 +31,124 @@ def canonicalize_product_id(value: object) -> str:
     except Exception:
         return str(value)
 
-def update_plateforme(df_platform, df_fournisseurs, name_platform, name_fournisseur, supplier_details=None): 
+
+# Noyau de canonicalize_product_ids: majuscules ASCII puis suppression de tout octet hors A-Z/0-9
+_ID_UPPER_TABLE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ID_DELETE_BYTES = bytes(c for c in range(256) if not (48 <= c <= 57 or 65 <= c <= 90 or 97 <= c <= 122 or c == 10))
+# Marqueur (DataFrame.attrs) des colonnes d'identifiants déjà canoniques
+CANONICAL_IDS_ATTR = 'canonical_ids'
+
+
+def canonicalize_product_ids(series: pd.Series) -> pd.Series:
+    """
+    canonicalize_product_id sur toute une colonne. Les valeurs distinctes sont
+    jointes en un seul texte, passées en majuscules, réduites à l'ASCII puis
+    filtrées par bytes.translate en un appel, et redistribuées par leurs codes.
+    """
+    key = series
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        # Colonne mixte: factorize confond 12, 12.0 et True; clé = texte de chaque valeur
+        key = series.map(str, na_action='ignore')
+    codes, uniques = pd.factorize(key, use_na_sentinel=True)
+    texts = [v if isinstance(v, str) else str(v) for v in np.asarray(uniques, dtype=object)]
+    if any('\n' in t for t in texts):
+        canonical = [canonicalize_product_id(t) for t in texts]
+    else:
+        # upper() peut produire des lettres ASCII ('ß' -> 'SS'); le reste du non-ASCII est supprimé
+        blob = '\n'.join(texts).upper().encode('ascii', 'ignore')
+        canonical = blob.translate(_ID_UPPER_TABLE, _ID_DELETE_BYTES).decode('ascii').split('\n')
+    values = np.array(canonical + [''], dtype=object)[codes]
+    na_positions = np.flatnonzero(codes < 0)
+    if len(na_positions):
+        # None -> 'NONE', NaN -> 'NAN', comme la version scalaire
+        values[na_positions] = [canonicalize_product_id(v) for v in series.iloc[na_positions]]
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def ensure_canonical_ids(df: pd.DataFrame, column: str = ID_PRODUCT) -> pd.DataFrame:
+    """
+    Canonicalise la colonne d'identifiants une seule fois: un DataFrame déjà
+    marqué (attrs, conservé par copy/concat/merge/groupby) est retourné tel quel.
+    """
+    if column in df.attrs.get(CANONICAL_IDS_ATTR, ()):
+        return df
+    df[column] = canonicalize_product_ids(df[column])
+    mark_canonical_ids(df, column)
+    return df
+
+
+def mark_canonical_ids(df: pd.DataFrame, column: str = ID_PRODUCT) -> pd.DataFrame:
+    df.attrs[CANONICAL_IDS_ATTR] = sorted({*df.attrs.get(CANONICAL_IDS_ATTR, ()), column})
+    return df
+
+
+def update_plateforme(df_platform, df_fournisseurs, name_platform, name_fournisseur, supplier_details=None,
+                      ids=None, platform_codes=None, supplier_codes=None, stock_index=None):
+    """
+    stock_index: StockIndex du stock cumulé, construit une fois pour toutes les
+    plateformes; df_fournisseurs n'est alors pas relu (un get_indexer par plateforme).
+    supplier_details: SupplierContributions optionnelle; le stock de chaque fournisseur
+    est alors joint aux changements (colonnes stock_<fournisseur>).
+    ids: dictionnaire des identifiants du run (ProductIdDictionary). Avec des
+    identifiants fournisseur uniques, la jointure se fait par code entier et les
+    lignes de df_platform sont conservées telles quelles (même ordre, même index).
+    platform_codes / supplier_codes: codes des colonnes ID_PRODUCT s'ils sont déjà calculés.
+    """
     os.makedirs(VERIFIED_FILES_PATH, exist_ok=True)
-    stock_changes = []  # Track actual changes
+    stock_changes = empty_change_table()  # Track actual changes
     try:
         # Keep original quantities for comparison
         df_platform_original = df_platform.copy()
         
-        # Nettoyage du stock fournisseur
-        df_fournisseurs[QUANTITY] = df_fournisseurs[QUANTITY].apply(process_stock_value)
-
-        # Canonicalize product IDs before merge (both frames)
-        df_platform[ID_PRODUCT] = df_platform[ID_PRODUCT].apply(canonicalize_product_id)
-        df_fournisseurs[ID_PRODUCT] = df_fournisseurs[ID_PRODUCT].apply(canonicalize_product_id)
+        # Canonicalize product IDs before merge (both frames, sauf si déjà marqués)
+        ensure_canonical_ids(df_platform)
+        if stock_index is None:
+            # Nettoyage du stock fournisseur
+            df_fournisseurs[QUANTITY] = process_stock_series(df_fournisseurs[QUANTITY])
+            ensure_canonical_ids(df_fournisseurs)
 
         # Ajouter le suffixe _fournisseur après merge sur ID_PRODUCT
         # df_merged = df_platform.merge(df_fournisseurs, on=ID_PRODUCT, how='left', suffixes=('', '_fournisseur'))
         
         # Removed: Unnecessary backup of differences
-         
-        df_platform = df_platform.merge(
-            df_fournisseurs[[ID_PRODUCT, QUANTITY]],
-            on=ID_PRODUCT,
-            how='left',
-            suffixes=('', '_fournisseur')
-        )
-        
-        # Track changes before updating
-        mask = df_platform[f'{QUANTITY}_fournisseur'].notna()
-        changed_products = df_platform[mask].copy()
+        codes_f = None
+        if stock_index is None and ids is not None:
+            codes_f = supplier_codes if supplier_codes is not None else ids.encode(df_fournisseurs[ID_PRODUCT])
+        if stock_index is not None:
+            # Stock cumulé figé: une seule recherche vectorisée, lignes de df_platform conservées
+            df_platform = df_platform.assign(**{f'{QUANTITY}_fournisseur': stock_index.lookup(df_platform[ID_PRODUCT])})
+        elif codes_f is not None and (len(codes_f) == 0 or np.bincount(codes_f).max() == 1):
+            # Jointure par code: stock fournisseur rangé par code puis lu aux codes de la plateforme
+            if platform_codes is None:
+                platform_codes = ids.encode(df_platform[ID_PRODUCT])
+            supplier_qty = ids.dense(codes_f, df_fournisseurs[QUANTITY].to_numpy())[platform_codes]
+            if not np.isnan(supplier_qty).any():
+                supplier_qty = supplier_qty.astype(df_fournisseurs[QUANTITY].dtype)
+            df_platform = df_platform.assign(**{f'{QUANTITY}_fournisseur': supplier_qty})
+        else:
+            df_platform = df_platform.merge(
+                df_fournisseurs[[ID_PRODUCT, QUANTITY]],
+                on=ID_PRODUCT,
+                how='left',
+                suffixes=('', '_fournisseur')
+            )
         
-        # Compare old and new values
-        for idx, row in changed_products.iterrows():
-            old_qty = row[QUANTITY]
-            new_qty = row[f'{QUANTITY}_fournisseur']
-            if pd.notna(new_qty) and old_qty != new_qty:
-                change_data = {
-                    'product_id': row[ID_PRODUCT],
-                    'old_quantity': int(old_qty) if pd.notna(old_qty) else 0,
-                    'new_quantity': int(new_qty),
-                    'platform': name_platform
-                }
-                
-                # Add supplier details if provided
-                if supplier_details:
-                    pid_norm = canonicalize_product_id(row[ID_PRODUCT])
-                    if pid_norm in supplier_details:
-                        change_data['supplier_details'] = supplier_details[pid_norm]
-                
-                stock_changes.append(change_data)
-                
+        # Track changes before updating: masque vectorisé (stock fournisseur connu et différent)
+        new_qty = df_platform[f'{QUANTITY}_fournisseur']
+        old_qty = df_platform[QUANTITY]
+        changed = (new_qty.notna() & old_qty.ne(new_qty)).to_numpy()
+        stock_changes = pd.DataFrame({
+            'product_id': df_platform[ID_PRODUCT].to_numpy()[changed],
+            'old_quantity': old_qty[changed].fillna(0).to_numpy().astype('int64'),
+            'new_quantity': new_qty[changed].to_numpy().astype('int64'),
+            'platform': name_platform,
+        })
+        # Stock de chaque fournisseur en colonnes stock_<fournisseur>, lu dans la table des contributions
+        if supplier_details is not None and len(stock_changes):
+            breakdown = supplier_details.frame(stock_changes['product_id'])
+            for supplier in breakdown.columns:
+                stock_changes[f'{SUPPLIER_STOCK_PREFIX}{supplier}'] = breakdown[supplier].array
+
         df_platform[QUANTITY] = df_platform[f'{QUANTITY}_fournisseur'].combine_first(df_platform[QUANTITY])
         df_platform.drop(columns=[f'{QUANTITY}_fournisseur'], inplace=True)
 
@@ -82,7 +157,7 @@ def update_plateforme(df_platform, df_fournisseurs, name_platform, name_fourniss
         return df_platform, stock_changes
     except Exception as e:
         logger.error(f"-- -- ❌ -- --  Erreur lors de la mise à jour de fichier...: {e}")
-        return None, []
+        return None, empty_change_table()
 
 
 # =========================================================================================
@@ -146,31 +221,34 @@ def mettre_a_jour_Stock_old(valide_fichiers_platforms, valide_fichiers_fournisse
 
 
 
-def read_fournisseur(data_f):
+def read_fournisseur(data_f, name=None, settings=None):
+    if resolve_read_option('streaming', data_f.get('read_options'), settings, default=False):
+        return read_fournisseur_streaming(data_f, name=name, settings=settings)
     chemin_fichier_f = data_f['chemin_fichier']
     nom_reference_f = data_f[YAML_REFERENCE_NAME]    # nom_ref
     quantite_stock_f = data_f[YAML_QUANTITY_NAME]       # nom_qte
     no_header = data_f.get('no_header', False)
     multi_file = data_f.get('multi_file', False)
     header = None if no_header else 'infer'
+    # Seules les colonnes référence/quantité sont lues (projection d'après header_mappings.yaml)
+    projection = build_projection_plan(nom_reference_f, quantite_stock_f, no_header)
+    backend = resolve_csv_backend(data_f.get('read_options'), settings)
+    ragged_rows = bool(resolve_read_option('ragged_rows', data_f.get('read_options'), settings, default=False))
+    rules = stock_rules((data_f.get('read_options') or {}).get('stock_tokens'))
     if multi_file and isinstance(chemin_fichier_f, list):
-        # Process all files, concatenate, and sum stock per reference
-        dfs = []
-        for file_path in chemin_fichier_f:
-            df_f_info = read_dataset_file(file_name=file_path, header=header)
-            df_f = df_f_info['dataset'].copy()
-            ref_col = get_column_by_mapping(df_f, nom_reference_f)
-            qty_col = get_column_by_mapping(df_f, quantite_stock_f)
-            df_f[qty_col] = df_f[qty_col].apply(process_stock_value)
-            reduced_cols_df = df_f[[ref_col, qty_col]].copy()
-            reduced_cols_df[qty_col] = reduced_cols_df[qty_col].astype(int)
-            reduced_cols_df.columns = [ID_PRODUCT, QUANTITY]
-            reduced_cols_df[ID_PRODUCT] = reduced_cols_df[ID_PRODUCT].apply(canonicalize_product_id)
-            dfs.append(reduced_cols_df)
-        if dfs:
-            all_data = pd.concat(dfs, ignore_index=True)
-            # Sum stock per reference
-            reduced_cols_df = all_data.groupby(ID_PRODUCT, as_index=False)[QUANTITY].sum()
+        # Fichiers lus en parallèle, chacun pré-agrégé (stock sommé par référence)
+        def read_file_totals(file_path):
+            df_f_info = read_dataset_file(file_name=file_path, header=header, entity=name, projection=projection,
+                                          backend=backend, ragged_rows=ragged_rows)
+            ref_col, qty_col = _projected_columns(df_f_info, file_path)
+            return _normalize_supplier_frame(df_f_info['dataset'], ref_col, qty_col, rules).groupby(ID_PRODUCT)[QUANTITY].sum()
+
+        with ThreadPoolExecutor(max_workers=file_workers(settings, len(chemin_fichier_f))) as pool:
+            partials = list(pool.map(read_file_totals, chemin_fichier_f))
+        if partials:
+            # Une seule réduction sur les agrégats partiels
+            totals = pd.concat(partials).groupby(level=0).sum()
+            reduced_cols_df = mark_canonical_ids(totals.rename(QUANTITY).rename_axis(ID_PRODUCT).reset_index())
         else:
             reduced_cols_df = pd.DataFrame(columns=[ID_PRODUCT, QUANTITY])
         return {
@@ -183,39 +261,243 @@ def read_fournisseur(data_f):
             'encoding': None
         }
     else:
-        df_f_info = read_dataset_file(file_name=chemin_fichier_f, header=header)   # df_info
-        pd.set_option('display.max_columns', None) 
-        df_f = df_f_info['dataset'].copy()  # df
-        # Use new helper for mapping by index or name
-        ref_col = get_column_by_mapping(df_f, nom_reference_f)
-        qty_col = get_column_by_mapping(df_f, quantite_stock_f)
-        df_f[qty_col] = df_f[qty_col].apply(process_stock_value)   # df[nom_qte]
+        df_f_info = read_dataset_file(file_name=chemin_fichier_f, header=header, entity=name, projection=projection,
+                                      backend=backend, ragged_rows=ragged_rows)   # df_info
+        df_f = df_f_info['dataset'].copy()  # df (colonnes projetées uniquement)
+        ref_col, qty_col = _projected_columns(df_f_info, chemin_fichier_f)
+        df_f[qty_col] = process_stock_series(df_f[qty_col], rules)   # df[nom_qte]
         reduced_cols_df = df_f[[ref_col, qty_col]].copy()
         reduced_cols_df[qty_col] = reduced_cols_df[qty_col].astype(int)
         reduced_cols_df.columns = [ID_PRODUCT, QUANTITY]
-        reduced_cols_df[ID_PRODUCT] = reduced_cols_df[ID_PRODUCT].apply(canonicalize_product_id)
+        ensure_canonical_ids(reduced_cols_df)
         return {
             'Chemin': chemin_fichier_f,
             'ref': ref_col,
             'qte': qty_col,
-            'main_data': df_f,  # données brutes
+            'main_data': df_f,  # données brutes (colonnes référence/quantité)
             'reduced_data': reduced_cols_df,  # données nettoyées
             'sep': df_f_info['sep'],
             'encoding': df_f_info['encoding']
         }
 
 
-def read_all_fournisseurs(valide_fichiers_fournisseurs):
+def _normalize_supplier_frame(df, ref_col, qty_col, rules=None):
+    """Colonnes (ID_PRODUCT, QUANTITY) nettoyées: stock entier (table de jetons rules), identifiant canonique."""
+    reduced_cols_df = df[[ref_col, qty_col]].copy()
+    reduced_cols_df[qty_col] = process_stock_series(reduced_cols_df[qty_col], rules).astype(int)
+    reduced_cols_df.columns = [ID_PRODUCT, QUANTITY]
+    return ensure_canonical_ids(reduced_cols_df)
+
+
+def read_fournisseur_streaming(data_f, name=None, settings=None):
+    """
+    Mode streaming: chaque fichier est lu par chunks de chunk_size lignes; chaque
+    chunk est normalisé puis ajouté à une somme courante par produit. La mémoire
+    dépend du nombre de produits distincts, pas de la taille du fichier.
+    Même résultat que read_fournisseur pour cumule_fournisseurs (stock sommé par produit).
+    """
+    chemin_fichier_f = data_f['chemin_fichier']
+    chemins = chemin_fichier_f if isinstance(chemin_fichier_f, list) else [chemin_fichier_f]
+    no_header = data_f.get('no_header', False)
+    header = None if no_header else 'infer'
+    projection = build_projection_plan(data_f[YAML_REFERENCE_NAME], data_f[YAML_QUANTITY_NAME], no_header)
+    chunk_size = int(resolve_read_option('chunk_size', data_f.get('read_options'), settings,
+                                         default=PIPELINE_SETTINGS_DEFAULTS['chunk_size']))
+    ragged_rows = bool(resolve_read_option('ragged_rows', data_f.get('read_options'), settings, default=False))
+    rules = stock_rules((data_f.get('read_options') or {}).get('stock_tokens'))
+    totals, dialect = pd.Series(dtype='int64'), {}
+    for file_path in chemins:
+        try:
+            file_totals, dialect = _fold_supplier_chunks(file_path, projection, chunk_size, header, name,
+                                                         ragged_rows=ragged_rows, rules=rules)
+        except UnicodeDecodeError:
+            # Octets 8 bits après l'échantillon: le fichier est relu une fois depuis le début
+            logger.info(f"🔁 Octets non UTF-8 dans {file_path}, relecture par chunks en 'cp1252'")
+            file_totals, dialect = _fold_supplier_chunks(file_path, projection, chunk_size, header, name,
+                                                         encoding='cp1252', ragged_rows=ragged_rows, rules=rules)
+        totals = pd.concat([totals, file_totals]).groupby(level=0).sum()
+    reduced_cols_df = mark_canonical_ids(totals.astype(int).rename(QUANTITY).rename_axis(ID_PRODUCT).reset_index())
+    single_file = len(chemins) == 1
+    return {
+        'Chemin': chemin_fichier_f,
+        'ref': ID_PRODUCT,
+        'qte': QUANTITY,
+        'main_data': reduced_cols_df,  # pas de données brutes conservées en streaming
+        'reduced_data': reduced_cols_df,  # stock sommé par produit
+        'sep': dialect.get('sep') if single_file else None,
+        'encoding': dialect.get('encoding') if single_file else None
+    }
+
+
+def _fold_supplier_chunks(file_path, projection, chunk_size, header, name, encoding=None, ragged_rows=False,
+                          rules=None):
+    """Somme du stock par produit d'un fichier, chunk par chunk. Returns (Series, dialect)."""
+    totals, dialect, n_rows = pd.Series(dtype='int64'), {}, 0
+    for chunk in iter_dataset_chunks(file_path, projection, chunk_size, header=header, entity=name,
+                                     encoding=encoding, ragged_rows=ragged_rows):
+        dialect = chunk.attrs.get('dialect') or {}
+        ref_col, qty_col = chunk.attrs['projection']['ref'], chunk.attrs['projection']['qte']
+        partial = _normalize_supplier_frame(chunk, ref_col, qty_col, rules).groupby(ID_PRODUCT)[QUANTITY].sum()
+        totals = pd.concat([totals, partial]).groupby(level=0).sum()
+        n_rows += len(chunk)
+    logger.info(f"📄 Fichier lu par chunks : {file_path} -- ({n_rows} lignes, {len(totals)} produits)")
+    return totals, dialect
+
+
+def _projected_columns(df_info, chemin):
+    """Noms réels (ref, qte) résolus par read_dataset_file; erreur si la lecture a échoué."""
+    projection = df_info.get('projection')
+    if projection is None:
+        raise ValueError(f"Colonnes référence/quantité introuvables dans {chemin}")
+    return projection['ref'], projection['qte']
+
+
+def read_all_fournisseurs(valide_fichiers_fournisseurs, settings=None, report_gen=None):
+    """
+    Lit tous les fournisseurs. Avec plusieurs workers (réglage workers), chaque
+    fournisseur est parsé dans un processus séparé qui ne renvoie que les colonnes
+    (ID_PRODUCT, QUANTITY). Dans les deux modes, un fournisseur illisible est
+    signalé dans report_gen (fichier en échec + erreur) puis ignoré.
+    """
     data_fournisseurs = {}
-    # Use actual supplier names as keys (instead of Fournisseur1, ...)
-    for name, data_f in valide_fichiers_fournisseurs.items():
-        data_fournisseurs[name] = read_fournisseur(data_f)
+    workers = supplier_workers(settings, len(valide_fichiers_fournisseurs))
+    if workers > 1 and not process_pool_supported():
+        logger.warning("-- ⚠️ -- Exécutable sans freeze_support: lecture séquentielle des fournisseurs")
+        workers = 1
+    if workers > 1:
+        try:
+            outcomes = _read_fournisseurs_parallel(valide_fichiers_fournisseurs, settings, workers)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"-- ⚠️ -- Lecture parallèle indisponible ({e}), lecture séquentielle")
+            workers = 1
+    if workers <= 1:
+        outcomes = ((name, *_read_fournisseur_safe(name, data_f, settings))
+                    for name, data_f in valide_fichiers_fournisseurs.items())
 
-    #print('\n\nhere \n', data_fournisseurs['Fournisseur1']['reduced_data'].head())
+    # Use actual supplier names as keys (instead of Fournisseur1, ...)
+    for name, result, error in outcomes:
+        if error is None:
+            data_fournisseurs[name] = result
+            continue
+        chemin = valide_fichiers_fournisseurs[name]['chemin_fichier']
+        logger.error(f"-- ❌ -- Lecture du fournisseur {name} impossible: {error}")
+        if report_gen:
+            report_gen.add_file_result(', '.join(map(str, chemin)) if isinstance(chemin, list) else str(chemin),
+                                       success=False, error_msg=f"Lecture fournisseur {name}: {error}")
     return data_fournisseurs
 
 
-def cumule_fournisseurs(data_fournisseurs):
+def supplier_workers(settings, n_suppliers):
+    """Nombre de processus de lecture: réglage workers, sinon un par fournisseur dans la limite des cœurs."""
+    workers = (settings or {}).get('workers')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_suppliers))
+
+
+def file_workers(settings, n_files):
+    """
+    Threads de lecture des fichiers d'un fournisseur multi_file: réglage file_workers,
+    sinon les cœurs partagés entre les processus de lecture des fournisseurs (au plus
+    workers x file_workers threads au total, pas workers²).
+    """
+    workers = (settings or {}).get('file_workers')
+    if workers is None:
+        workers = (os.cpu_count() or 1) // _SUPPLIER_PROCESSES
+    return max(1, min(int(workers), n_files))
+
+
+def _read_fournisseur_safe(name, data_f, settings):
+    """
+    _read_fournisseur_cached sans exception. Returns (résultat, None) ou (None, message d'erreur).
+    main_data est remplacé par la table (ID_PRODUCT, QUANTITY), seule utilisée ensuite:
+    même résultat en séquentiel, dans un worker ou depuis le cache.
+    """
+    try:
+        result = _read_fournisseur_cached(name, data_f, settings)
+    except Exception as e:
+        return None, str(e)
+    result['main_data'] = result['reduced_data']
+    return result, None
+
+
+def _read_fournisseur_cached(name, data_f, settings):
+    """read_fournisseur, sauf si les mêmes fichiers avec le même mapping sont en cache (réglage supplier_cache)."""
+    settings = settings or {}
+    if not settings.get('supplier_cache'):
+        return read_fournisseur(data_f, name=name, settings=settings)
+    key = supplier_cache_key(data_f)
+    cached = load_cached_supplier(key)
+    if cached is not None:
+        logger.info(f"♻️ {name}: fichiers inchangés, données normalisées reprises du cache")
+        return {**cached, 'Chemin': data_f['chemin_fichier']}
+    result = read_fournisseur(data_f, name=name, settings=settings)
+    max_mb = settings.get('supplier_cache_max_mb') or PIPELINE_SETTINGS_DEFAULTS['supplier_cache_max_mb']
+    store_cached_supplier(key, result, int(max_mb) * 1024 * 1024)
+    return result
+
+
+# Processus de lecture des fournisseurs en cours (1 hors pool); borne les threads de file_workers
+_SUPPLIER_PROCESSES = 1
+
+
+def _init_supplier_worker(processes=1):
+    global _SUPPLIER_PROCESSES
+    _SUPPLIER_PROCESSES = max(1, processes)
+    # Seul le processus principal écrit le cache des dialectes (voir _read_fournisseur_task)
+    set_dialect_cache_persistence(False)
+
+
+def _read_fournisseur_task(name, data_f, settings, memory_files=None):
+    """
+    Tâche d'un worker: lecture d'un fournisseur. Seules les colonnes
+    (ID_PRODUCT, QUANTITY) repartent vers le processus principal, avec les
+    compteurs d'encodage et les dialectes détectés pour ce fournisseur.
+    memory_files: {chemin: octets} des fichiers téléchargés en mémoire (ftp_in_memory).
+    """
+    for path, data in (memory_files or {}).items():
+        register_memory_file(path, data)
+    tiers_before = Counter(encoding_tier_stats())
+    try:
+        result, error = _read_fournisseur_safe(name, data_f, settings)
+    finally:
+        release_memory_files(list(memory_files or ()))
+    return result, error, dict(Counter(encoding_tier_stats()) - tiers_before), load_dialect_cache().get(name, {})
+
+
+def _read_fournisseurs_parallel(valide_fichiers_fournisseurs, settings, workers, mp_context=None):
+    """
+    Lecture des fournisseurs dans un pool de processus; résultats dans l'ordre des fournisseurs.
+    mp_context: contexte multiprocessing (ex. 'spawn', celui de Windows), sinon celui par défaut.
+    """
+    logger.info(f"⚙️ Lecture de {len(valide_fichiers_fournisseurs)} fournisseurs sur {workers} processus")
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_supplier_worker,
+                             initargs=(workers,)) as pool:
+        futures = {name: pool.submit(_read_fournisseur_task, name, data_f, settings, _memory_files_of(data_f))
+                   for name, data_f in valide_fichiers_fournisseurs.items()}
+        for name, future in futures.items():
+            try:
+                result, error, tiers, dialects = future.result()
+            except Exception as e:     # worker tué, résultat non sérialisable...
+                outcomes.append((name, None, f"{type(e).__name__}: {e}"))
+                continue
+            record_encoding_tiers(tiers)
+            for signature, dialect in dialects.items():
+                update_dialect_cache(name, signature, dialect)
+            outcomes.append((name, result, error))
+    return outcomes
+
+
+def _memory_files_of(data_f):
+    """Fichiers du fournisseur gardés en mémoire, à transmettre au worker (None si tous sur disque)."""
+    chemin = data_f['chemin_fichier']
+    chemins = chemin if isinstance(chemin, list) else [chemin]
+    files = {c: memory_file(c) for c in chemins}
+    return {c: data for c, data in files.items() if data is not None} or None
+
+
+def cumule_fournisseurs(data_fournisseurs, ids=None, engine='hash'):
 
     '''data_fournisseurs {'Fournisseur1': {'Chemin': './fichiers_fournisseurs/1210021_SBShop-Artikelstamm-Gekürzt_1747871859797.csv', 
                                         'ref': 'Article number', 
@@ -224,155 +506,248 @@ def cumule_fournisseurs(data_fournisseurs):
                                         'reduced_data':       ID_Product  Quantity
                                         'sep': ';', 'encoding': 'utf-8'}
     '''
+    # ids: dictionnaire des identifiants du run; somme et report par code entier
+    # engine: 'hash' (groupby sur codes) ou 'sort' (identifiants triés une fois, sommes par segment avec reduceat)
+    ids = ids if ids is not None else ProductIdDictionary()
     list_df = []
     for key, item in data_fournisseurs.items():
-        list_df.append(item['reduced_data'])
+        list_df.append(ensure_canonical_ids(item['reduced_data']))
 
         #print('-->This is reduced row original processed', item['reduced_data'][item['reduced_data'][ID_PRODUCT] == 'BM91518H'])
         #print(len(item['reduced_data']))
 
 
-    df_all_fournisseus = pd.concat(list_df, ignore_index=True)
+    df_all_fournisseus = mark_canonical_ids(pd.concat(list_df, ignore_index=True))
     #print('df_all_fournisseus\n', df_all_fournisseus.head())
     #print(df_all_fournisseus.shape)
-
-    # Force canonical ID_PRODUCT
-    df_all_fournisseus[ID_PRODUCT] = df_all_fournisseus[ID_PRODUCT].apply(canonicalize_product_id)
+    # Moteur 'sort': identifiants ASCII triés une fois en octets, sans dictionnaire de codes
+    keys = sort_keys(df_all_fournisseus[ID_PRODUCT]) if engine == 'sort' else None
+    codes = ids.encode(df_all_fournisseus[ID_PRODUCT]) if keys is None else None
     logger.debug(f"[DEBUG] ID_PRODUCT dtype: {df_all_fournisseus[ID_PRODUCT].dtype}, unique: {df_all_fournisseus[ID_PRODUCT].unique()[:10]}")
     # Debug before sort/groupby
     logger.debug(f"[DEBUG] cumule_fournisseurs: df_all_fournisseus[QUANTITY] dtype: {df_all_fournisseus[QUANTITY].dtype}, unique values: {df_all_fournisseus[QUANTITY].unique()[:10]}")
     try:
-        df_all_fournisseus = df_all_fournisseus.sort_values(by=ID_PRODUCT, ascending=True)
-        df_cumule = df_all_fournisseus.groupby(ID_PRODUCT, as_index=False)[QUANTITY].sum()
+        # Somme par code, puis tri des seuls produits distincts par identifiant
+        if keys is not None:
+            # Segments déjà dans l'ordre des identifiants
+            unique_keys, sums = segment_sum(keys, df_all_fournisseus[QUANTITY].to_numpy())
+            df_cumule = mark_canonical_ids(pd.DataFrame({ID_PRODUCT: unique_keys.astype(str).astype(object),
+                                                         QUANTITY: sums}))
+        else:
+            totals = df_all_fournisseus[QUANTITY].groupby(codes).sum()
+            names = ids.decode(totals.index)
+            order = np.argsort(names, kind='stable')
+            df_cumule = mark_canonical_ids(pd.DataFrame({ID_PRODUCT: names[order], QUANTITY: totals.to_numpy()[order]}))
     except Exception as e:
         logger.error(f"[DEBUG] Error during aggregation in cumule_fournisseurs: {e}")
         logger.error(f"[DEBUG] Problematic values: {df_all_fournisseus[QUANTITY].unique()[:20]}")
         raise
     # Debug after groupby
     logger.debug(f"[DEBUG] cumule_fournisseurs: df_cumule[QUANTITY] dtype: {df_cumule[QUANTITY].dtype}, unique values: {df_cumule[QUANTITY].unique()[:10]}")
-    # ------ Sauvgarde pour validation ------
+    # Report du cumul sur chaque fournisseur: seulement en mode verify (write_cumule_verification)
+    return df_cumule # data_fournisseurs
+
+
+def write_cumule_verification(data_fournisseurs, stock_index, store):
+    """
+    Artefacts de vérification du cumul (réglage verify), dans l'IntermediateStore du
+    run (Verifier/<run_id>/verification__<fournisseur>): données réduites de chaque
+    fournisseur avec le stock cumulé de chaque ligne, lu dans stock_index.
+    data_fournisseurs n'est pas modifié. Returns le nombre d'artefacts écrits.
+    """
+    written = 0
     for fournisseur, infos in data_fournisseurs.items():
-        df = infos['reduced_data']
         try:
-            chemin = infos['Chemin']
-            if isinstance(chemin, list):
-                chemin_for_name = chemin[0]
-            else:
-                chemin_for_name = chemin
-            # Force canonical ID for merge
-            df[ID_PRODUCT] = df[ID_PRODUCT].apply(canonicalize_product_id)
-            df_merged = df.merge(df_cumule, left_on=df[ID_PRODUCT], right_on=ID_PRODUCT, how='left', suffixes=('', '_Fourniss_After_Cumule'))
-            df_merged[infos['qte']] = df_merged[QUANTITY+'_Fourniss_After_Cumule']
-            df_final = df_merged.drop(columns=[ID_PRODUCT+'_Fourniss_After_Cumule'])
-            infos['reduced_data'] = df_final
-            # Optional: Save verification file for debugging (disabled to reduce unnecessary saves)
-            # VERIFIED_FILES_PATH.mkdir(parents=True, exist_ok=True)
-            # logger.info('---------- Juste pour Verifier (Cumule) -----------')
-            # save_file(f"{Path(VERIFIED_FILES_PATH) / Path(chemin_for_name).name}", infos['reduced_data'],infos['encoding'], infos['sep'])
+            df = infos['reduced_data']
+            after_cumule = stock_index.lookup(df[ID_PRODUCT])
+            df_final = df.reset_index(drop=True).assign(**{QUANTITY + '_Fourniss_After_Cumule': after_cumule,
+                                                           infos['qte']: after_cumule})
+            if store.save('verification', fournisseur, df_final) is not None:
+                written += 1
         except Exception as e:
-            logger.error(f"[DEBUG] Error during merge in cumule_fournisseurs for {fournisseur}: {e}")
-            logger.error(f"[DEBUG] Problematic df: {df.head()} | df_cumule: {df_cumule.head()}")
-            raise
-    return df_cumule # data_fournisseurs
-
+            logger.warning(f"-- ⚠️ -- Artefact de vérification du cumul impossible pour {fournisseur}: {e}")
+    return written
+
+
+def collect_supplier_details(data_fournisseurs, ids=None):
+    """Stock de chaque fournisseur pour chaque produit (SupplierContributions, code produit x fournisseur)"""
+    ids = ids if ids is not None else ProductIdDictionary()
+    tables = {name: ensure_canonical_ids(data['reduced_data']) for name, data in data_fournisseurs.items()}
+    return SupplierContributions.from_suppliers(tables, ids, ID_PRODUCT, QUANTITY)
+
+def run_platform_updates(valide_fichiers_platforms, stock_index, settings=None, report_gen=None, store=None):
+    """
+    Met à jour et enregistre chaque plateforme à partir du stock cumulé figé.
+    Les plateformes sont indépendantes: avec plusieurs workers (réglage
+    platform_workers), elles sont traitées dans un pool de threads qui partagent
+    stock_index en lecture seule et rapportent dans report_gen (verrouillé).
+    """
+    workers = platform_workers(settings, len(valide_fichiers_platforms))
+    if workers <= 1:
+        for name_p, data_p in valide_fichiers_platforms.items():
+            _update_platform(name_p, data_p, stock_index, settings, report_gen, store)
+        return
+    logger.info(f"⚙️ Mise à jour de {len(valide_fichiers_platforms)} plateformes sur {workers} threads")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='plateforme') as pool:
+        futures = {name_p: pool.submit(_update_platform, name_p, data_p, stock_index, settings, report_gen, store)
+                   for name_p, data_p in valide_fichiers_platforms.items()}
+        for name_p, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:    # _update_platform rapporte ses propres erreurs
+                logger.error(f"Erreur lors de la mise à jour de la plateforme {name_p}: {e}")
+                if report_gen:
+                    report_gen.add_error(f"Erreur mise à jour plateforme {name_p}: {e}")
+
+
+def join_engine(settings) -> str:
+    """Moteur de jointure/agrégation du run (réglage join_engine): hash ou sort."""
+    engine = (settings or {}).get('join_engine') or 'hash'
+    if engine not in JOIN_ENGINES:
+        logger.warning(f"-- ⚠️ -- Moteur de jointure inconnu '{engine}', utilisation de hash")
+        engine = 'hash'
+    return engine
+
+
+def platform_workers(settings, n_platforms):
+    """Nombre de threads de mise à jour: réglage platform_workers, sinon une par plateforme dans la limite des cœurs."""
+    workers = (settings or {}).get('platform_workers')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_platforms))
+
+
+def _update_platform(name_p, data_p, stock_index, settings, report_gen=None, store=None):
+    """Lit une plateforme, applique le stock cumulé et écrit <plateforme>-latest.<ext> (erreurs rapportées)."""
+    df_p = None
+    try:
+        chemin_fichier_p = data_p['chemin_fichier']
+        nom_reference_p = data_p[YAML_REFERENCE_NAME]
+        quantite_stock_p = data_p[YAML_QUANTITY_NAME]
+        read_options_p = data_p.get('read_options')
+        df_p_info = read_dataset_file(file_name=chemin_fichier_p, entity=name_p,
+                                      backend=resolve_csv_backend(read_options_p, settings),
+                                      ragged_rows=bool(resolve_read_option('ragged_rows', read_options_p,
+                                                                           settings, default=False)))
+        df_p = df_p_info['dataset']
+        sep_p = df_p_info['sep']
+        encoding_p = df_p_info['encoding']
+        # Handle NaN/None before processing
+        df_p[quantite_stock_p] = df_p[quantite_stock_p].fillna(0)
+        df_p[quantite_stock_p] = process_stock_series(df_p[quantite_stock_p],
+                                                      stock_rules((read_options_p or {}).get('stock_tokens')))
+        logger.debug(f"[DEBUG] Platform '{name_p}' stock column dtype: {df_p[quantite_stock_p].dtype}, unique values: {df_p[quantite_stock_p].unique()[:10]}")
+        # Références canoniques calculées une fois: merge puis report dans df_p
+        canon_ids_p = canonicalize_product_ids(df_p[nom_reference_p])
+        reduced_data_p = pd.DataFrame({ID_PRODUCT: canon_ids_p, QUANTITY: df_p[quantite_stock_p]})
+        mark_canonical_ids(reduced_data_p)
+        codes_p = pd.factorize(canon_ids_p)[0]
+        logger.debug(f"[DEBUG] reduced_data_p[QUANTITY] dtype: {reduced_data_p[QUANTITY].dtype}, unique values: {reduced_data_p[QUANTITY].unique()[:10]}")
+        try:
+            df_updated, stock_changes = update_plateforme(reduced_data_p, None, name_p, 'cumule',
+                                                          stock_index=stock_index)
+        except Exception as merge_exc:
+            logger.error(f"[MERGE ERROR] Platform {name_p}: {merge_exc}")
+            if report_gen:
+                report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg=f"Merge error: {merge_exc}")
+            return  # Skip this platform
+        if df_updated is None:
+            logger.error(f"[SKIP] Platform {name_p}: update_plateforme returned None.")
+            if report_gen:
+                report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg="update_plateforme returned None.")
+            return
+        reduced_data_p = df_updated
+        if store:
+            store.save('plateforme', name_p, df_updated)
+        
+        # Add stock changes to report
+        if report_gen and not stock_changes.empty:
+            report_gen.add_stock_changes(stock_changes)
+        if nom_reference_p is None or quantite_stock_p is None:
+            logger.error(f"[SKIP] Platform {name_p}: Mapping extraction failed (nom_reference_p or quantite_stock_p is None)")
+            if report_gen:
+                report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg="Mapping extraction failed.")
+            return
+        # Map using canonicalized platform reference: lignes alignées sur df_p (StockIndex),
+        # dernière quantité de chaque référence, sans dictionnaire Python
+        quantites = last_value_by_code(codes_p, reduced_data_p[QUANTITY].to_numpy())
+        df_p[quantite_stock_p] = pd.Series(quantites, index=df_p.index).fillna(df_p[quantite_stock_p])
+        platform_dir = UPDATED_FILES_PATH / name_p
+        platform_dir.mkdir(parents=True, exist_ok=True)
+        # Detect original extension
+        platform_ext = Path(chemin_fichier_p).suffix.lower()
+        # Build output file path with same extension
+        latest_file = platform_dir / f"{name_p}-latest{platform_ext}"
+        force_excel = platform_ext in {'.xls', '.xlsx'}
+        # Save only the latest file (removed duplicate archive save)
+        save_file(str(latest_file), df_p, encoding=encoding_p, sep=sep_p, force_excel=force_excel)
+        logger.info(f"-- -- ✅ -- --  Mise à jour effectuée et fichiers sauvegardés pour : {name_p}")
+        if report_gen:
+            report_gen.add_platform_processed(name_p)
+            report_gen.add_file_result(str(latest_file), success=True)
+            # The actual count of updated products is now handled by add_stock_changes
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour de la plateforme {name_p}: {e}")
+        if df_p is not None:
+            logger.error(f"[DEBUG] Platform '{name_p}' DataFrame: {df_p.head()}")
+        if report_gen:
+            report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg=str(e))
+            report_gen.add_error(f"Erreur mise à jour plateforme {name_p}: {e}")
 
-def collect_supplier_details(data_fournisseurs):
-    """Collects individual supplier stock for each product"""
-    supplier_details = {}
-    for supplier_name, data in data_fournisseurs.items():
-        for _, row in data['reduced_data'].iterrows():
-            product_id = canonicalize_product_id(row[ID_PRODUCT])
-            quantity = row[QUANTITY]
-            if product_id not in supplier_details:
-                supplier_details[product_id] = {}
-            supplier_details[product_id][supplier_name] = quantity
-    return supplier_details
 
-def mettre_a_jour_Stock(valide_fichiers_platforms, valide_fichiers_fournisseurs, report_gen=None):
+def mettre_a_jour_Stock(valide_fichiers_platforms, valide_fichiers_fournisseurs, report_gen=None, settings=None):
     logger.info('--------------------- Mettre A Jour le Stock -------------------')
+    # Réglages du run (pipeline_settings.yaml + options CLI de run_daily.py)
+    settings = settings if settings is not None else load_pipeline_settings()
+    store = None
+    if settings.get('intermediate_store'):
+        store = IntermediateStore(fmt=settings.get('intermediate_format') or 'parquet')
+        logger.info(f"📦 Artefacts intermédiaires du run {store.run_id}: {store.run_dir}")
     if len(valide_fichiers_platforms) > 0 and len(valide_fichiers_fournisseurs)> 0:
         try: 
-            data_fournisseurs = read_all_fournisseurs(valide_fichiers_fournisseurs)
+            data_fournisseurs = read_all_fournisseurs(valide_fichiers_fournisseurs, settings=settings,
+                                                      report_gen=report_gen)
+            if not data_fournisseurs:
+                raise ValueError("aucun fichier fournisseur lisible")
+            if store:
+                for name_f, data_f in data_fournisseurs.items():
+                    store.save('fournisseur', name_f, data_f['reduced_data'])
+            logger.info(f"🔍 Détection d'encodage par niveau: {encoding_tier_stats()}")
             if report_gen is not None:
                 try:
                     report_gen.stats['all_suppliers'] = set(data_fournisseurs.keys())
                 except Exception:
                     report_gen.stats['all_suppliers'] = list(data_fournisseurs.keys())
-            supplier_details = collect_supplier_details(data_fournisseurs)
+            # Dictionnaire des identifiants du run: jointures et regroupements sur codes int32
+            ids = ProductIdDictionary()
+            # Contributions des fournisseurs: lues par le rapport, pas recopiées dans chaque changement
+            supplier_details = collect_supplier_details(data_fournisseurs, ids=ids)
+            if report_gen is not None:
+                report_gen.set_supplier_contributions(supplier_details)
             
             logger.info('----------- Calcule de cumule ------------------')
-            data_fournisseurs_cumule = cumule_fournisseurs(data_fournisseurs)
-            for name_p, data_p in valide_fichiers_platforms.items():
+            engine = join_engine(settings)
+            data_fournisseurs_cumule = cumule_fournisseurs(data_fournisseurs, ids=ids, engine=engine)
+            # Stock cumulé nettoyé et figé une fois pour toutes les plateformes
+            data_fournisseurs_cumule[QUANTITY] = process_stock_series(data_fournisseurs_cumule[QUANTITY])
+            stock_index = StockIndex.from_frame(data_fournisseurs_cumule, ID_PRODUCT, QUANTITY, engine=engine)
+            if store:
+                store.save('cumule', 'fournisseurs', data_fournisseurs_cumule)
+            verification = None
+            if settings.get('verify'):
+                # Artefacts de vérification écrits en arrière-plan pendant la mise à jour des plateformes
+                verify_store = store or IntermediateStore(fmt=settings.get('intermediate_format') or 'parquet')
+                verify_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='verification')
+                verification = verify_pool.submit(write_cumule_verification, data_fournisseurs, stock_index,
+                                                  verify_store)
+                verify_pool.shutdown(wait=False)
+            run_platform_updates(valide_fichiers_platforms, stock_index, settings=settings,
+                                 report_gen=report_gen, store=store)
+            if verification is not None:
                 try:
-                    chemin_fichier_p = data_p['chemin_fichier']
-                    nom_reference_p = data_p[YAML_REFERENCE_NAME]
-                    quantite_stock_p = data_p[YAML_QUANTITY_NAME]
-                    df_p_info = read_dataset_file(file_name=chemin_fichier_p)
-                    df_p = df_p_info['dataset']
-                    sep_p = df_p_info['sep']
-                    encoding_p = df_p_info['encoding']
-                    # Handle NaN/None before processing
-                    df_p[quantite_stock_p] = df_p[quantite_stock_p].fillna(0)
-                    df_p[quantite_stock_p] = df_p[quantite_stock_p].apply(process_stock_value)
-                    logger.debug(f"[DEBUG] Platform '{name_p}' stock column dtype: {df_p[quantite_stock_p].dtype}, unique values: {df_p[quantite_stock_p].unique()[:10]}")
-                    reduced_data_p = df_p[[nom_reference_p, quantite_stock_p]].copy()
-                    reduced_data_p.columns = [ID_PRODUCT, QUANTITY]
-                    reduced_data_p[ID_PRODUCT] = reduced_data_p[ID_PRODUCT].apply(canonicalize_product_id)
-                    logger.debug(f"[DEBUG] reduced_data_p[QUANTITY] dtype: {reduced_data_p[QUANTITY].dtype}, unique values: {reduced_data_p[QUANTITY].unique()[:10]}")
-                    # Ensure canonical IDs before merging
-                    reduced_data_p[ID_PRODUCT] = reduced_data_p[ID_PRODUCT].apply(canonicalize_product_id)
-                    data_fournisseurs_cumule[ID_PRODUCT] = data_fournisseurs_cumule[ID_PRODUCT].apply(canonicalize_product_id)
-                    try:
-                        df_updated, stock_changes = update_plateforme(reduced_data_p, data_fournisseurs_cumule, name_p, 'cumule', supplier_details=supplier_details)
-                    except Exception as merge_exc:
-                        logger.error(f"[MERGE ERROR] Platform {name_p}: {merge_exc}")
-                        if report_gen:
-                            report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg=f"Merge error: {merge_exc}")
-                        continue  # Skip this platform
-                    if df_updated is None:
-                        logger.error(f"[SKIP] Platform {name_p}: update_plateforme returned None.")
-                        if report_gen:
-                            report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg="update_plateforme returned None.")
-                        continue
-                    reduced_data_p = df_updated
-                    
-                    # Add stock changes to report
-                    if report_gen and stock_changes:
-                        report_gen.add_stock_changes(stock_changes)
-                    map_quantites = dict(zip(reduced_data_p[ID_PRODUCT], reduced_data_p[QUANTITY]))
-                    if nom_reference_p is None or quantite_stock_p is None:
-                        logger.error(f"[SKIP] Platform {name_p}: Mapping extraction failed (nom_reference_p or quantite_stock_p is None)")
-                        if report_gen:
-                            report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg="Mapping extraction failed.")
-                        continue
-                    # Map using canonicalized platform reference
-                    try:
-                        canon_ref_col = '__canon_ref__'
-                        df_p[canon_ref_col] = df_p[nom_reference_p].apply(canonicalize_product_id)
-                        df_p[quantite_stock_p] = df_p[canon_ref_col].map(map_quantites).fillna(df_p[quantite_stock_p])
-                        df_p.drop(columns=[canon_ref_col], errors='ignore', inplace=True)
-                    except Exception:
-                        df_p[quantite_stock_p] = df_p[nom_reference_p].map(map_quantites).fillna(df_p[quantite_stock_p])
-                    platform_dir = UPDATED_FILES_PATH / name_p
-                    platform_dir.mkdir(parents=True, exist_ok=True)
-                    # Detect original extension
-                    platform_ext = Path(chemin_fichier_p).suffix.lower()
-                    # Build output file path with same extension
-                    latest_file = platform_dir / f"{name_p}-latest{platform_ext}"
-                    force_excel = platform_ext in {'.xls', '.xlsx'}
-                    # Save only the latest file (removed duplicate archive save)
-                    save_file(str(latest_file), df_p, encoding=encoding_p, sep=sep_p, force_excel=force_excel)
-                    logger.info(f"-- -- ✅ -- --  Mise à jour effectuée et fichiers sauvegardés pour : {name_p}")
-                    if report_gen:
-                        report_gen.add_platform_processed(name_p)
-                        report_gen.add_file_result(str(latest_file), success=True)
-                        # The actual count of updated products is now handled by add_stock_changes
+                    logger.info(f"🔎 Vérification du cumul: {verification.result()} artefacts dans {verify_store.run_dir}")
                 except Exception as e:
-                    logger.error(f"Erreur lors de la mise à jour de la plateforme {name_p}: {e}")
-                    logger.error(f"[DEBUG] Platform '{name_p}' DataFrame: {df_p.head()}")
-                    if report_gen:
-                        report_gen.add_file_result(str(latest_file) if 'latest_file' in locals() else name_p, success=False, error_msg=str(e))
-                        report_gen.add_error(f"Erreur mise à jour plateforme {name_p}: {e}")
+                    logger.warning(f"-- ⚠️ -- Vérification du cumul impossible: {e}")
             logger.info('---------------------------------------------------------------')
             logger.info('================================================================')
             return True
@@ -265,7 +265,7 @@ class FournisseurAdminFrame(ctk.CTkFrame):
         if not self.selected_fournisseur:
             messagebox.showinfo("Info", "Sélectionnez un fournisseur pour gérer les mappings.")
             return
-        from utils import get_entity_mappings, set_entity_mappings, ALLOWED_TARGETS, read_dataset_file, get_column_by_mapping
+        from utils import get_entity_mappings, set_entity_mappings, ALLOWED_TARGETS, FileProbe, get_column_by_mapping
         columns, no_header, multi_file = get_entity_mappings(self.selected_fournisseur)
         modal = ctk.CTkToplevel(self)
         modal.title(f"Mappings de colonnes pour {self.selected_fournisseur}")
@@ -319,8 +319,8 @@ class FournisseurAdminFrame(ctk.CTkFrame):
         def validate_mappings_against_file(file_path, new_mappings):
             try:
                 header = None if no_header_var.get() else 'infer'
-                data = read_dataset_file(file_path, header=header)
-                df = data['dataset']
+                # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+                df = FileProbe.get(file_path).head(header)
                 columns_ = list(df.columns)
                 missing = []
                 for m in new_mappings:
@@ -381,8 +381,8 @@ class FournisseurAdminFrame(ctk.CTkFrame):
                 return
             try:
                 header = None if no_header_var.get() else 'infer'
-                data = read_dataset_file(file_path, header=header)
-                df = data['dataset']
+                # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+                df = FileProbe.get(file_path).head(header)
                 
                 # DEBUG: Show actual column names found in CSV
                 print("=== DEBUG: Actual column names in CSV ===")
@@ -1,5 +1,6 @@
 import os 
 import sys 
+import multiprocessing
 import customtkinter as ctk
 from PIL import Image
 from pathlib import Path
@@ -21,7 +22,7 @@ from gui_app.gui_platforms import PlateformFrame
 from gui_app.gui_verification import VerificationFrame
 from gui_app.gui_configuration import ConfigurationFrame
 
-from utils import get_resource_path
+from utils import get_resource_path, mark_freeze_support
 from config.config_path_variables import *
 
 # Configuration CTk
@@ -157,6 +158,9 @@ class MainApp(ctk.CTk):
     """
 
 if __name__ == "__main__":
+    # Workers de lecture des fournisseurs (pool de processus) dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
+    mark_freeze_support()
     try:
         app = MainApp()
         app.mainloop()
@@ -71,7 +71,7 @@ class MajManuelleFrame(ctk.CTkFrame):
             self.supplier_mapping_valid = False
 
     def preview_mapping(self):
-        from utils import get_entity_mappings, read_dataset_file
+        from utils import get_entity_mappings, FileProbe
         if not self.supplier_file_path:
             self.mapping_status.configure(text="Mapping : Aucun fichier", text_color="#d6470e")
             return
@@ -82,8 +82,8 @@ class MajManuelleFrame(ctk.CTkFrame):
         mappings, no_header, multi_file = get_entity_mappings(platform)
         try:
             header = None if no_header else 'infer'
-            data = read_dataset_file(self.supplier_file_path, header=header)
-            df = data['dataset']
+            # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+            df = FileProbe.get(self.supplier_file_path).head(header)
             
             # DEBUG: Show actual column names found in CSV
             print("=== DEBUG: Actual column names in CSV ===")
@@ -212,7 +212,7 @@ class MajManuelleFrame(ctk.CTkFrame):
             traceback.print_exc()
 
     def run_manual_update(self):
-        from utils import get_entity_mappings, read_dataset_file
+        from utils import get_entity_mappings, FileProbe
         platform = self.selected_platform.get()
         if not platform:
             self.result_label.configure(text="Veuillez sélectionner une plateforme.", text_color="#d6470e")
@@ -224,8 +224,8 @@ class MajManuelleFrame(ctk.CTkFrame):
         mappings, no_header, multi_file = get_entity_mappings(platform)
         try:
             header = None if no_header else 'infer'
-            data = read_dataset_file(self.supplier_file_path, header=header)
-            df = data['dataset']
+            # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+            df = FileProbe.get(self.supplier_file_path).head(header)
             ref_col = next((m['source'] for m in mappings if m['target'] == 'nom_reference'), None)
             qty_col = next((m['source'] for m in mappings if m['target'] == 'quantite_stock'), None)
             missing = []
@@ -260,7 +260,7 @@ class PlateformFrame(ctk.CTkFrame):
         if not self.selected_plateform:
             messagebox.showinfo("Info", "Sélectionnez une plateforme pour gérer les mappings.")
             return
-        from utils import get_entity_mappings, set_entity_mappings, ALLOWED_TARGETS, read_dataset_file, get_column_by_mapping
+        from utils import get_entity_mappings, set_entity_mappings, ALLOWED_TARGETS, FileProbe, get_column_by_mapping
         mappings, no_header, _ = get_entity_mappings(self.selected_plateform)
         modal = ctk.CTkToplevel(self)
         modal.title(f"Mappings de colonnes pour {self.selected_plateform}")
@@ -302,8 +302,8 @@ class PlateformFrame(ctk.CTkFrame):
         def validate_mappings_against_file(file_path, new_mappings):
             try:
                 header = None if no_header else 'infer'
-                data = read_dataset_file(file_path, header=header)
-                df = data['dataset']
+                # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+                df = FileProbe.get(file_path).head(header)
                 columns = list(df.columns)
                 missing = []
                 for m in new_mappings:
@@ -359,8 +359,8 @@ class PlateformFrame(ctk.CTkFrame):
                 return
             try:
                 header = None if no_header else 'infer'
-                data = read_dataset_file(file_path, header=header)
-                df = data['dataset']
+                # Tête du fichier sondée une fois (FileProbe), sans lecture complète
+                df = FileProbe.get(file_path).head(header)
                 
                 # DEBUG: Show actual column names found in CSV
                 print("=== DEBUG: Actual column names in CSV ===")
@@ -1,5 +1,6 @@
 import sys
 import argparse
+import multiprocessing
 import shutil
 from pathlib import Path
 
@@ -15,7 +16,9 @@ from functions.functions_FTP import (
 )
 from functions.functions_check_ready_files import check_ready_files
 from functions.functions_update import mettre_a_jour_Stock
-from utils import load_fournisseurs_config, load_plateformes_config
+from functions.functions_ids import JOIN_ENGINES
+from utils import (load_fournisseurs_config, load_plateformes_config, load_pipeline_settings, mark_freeze_support,
+                   CSV_BACKENDS)
 
 
 def parse_args() -> argparse.Namespace:
@@ -44,6 +47,82 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip sending the HTML report email",
     )
+    parser.add_argument(
+        "--csv-backend",
+        choices=CSV_BACKENDS,
+        default=None,
+        help="CSV reader for this run (default: per-entity csv_backend in header_mappings.yaml, else pandas)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        default=None,
+        help="Read supplier files in fixed-size chunks with bounded memory",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Rows per chunk in streaming mode (default: chunk_size in pipeline_settings.yaml)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes reading supplier files in parallel (default: workers in pipeline_settings.yaml, 1 = sequential)",
+    )
+    parser.add_argument(
+        "--platform-workers",
+        type=int,
+        default=None,
+        help="Threads updating and writing platform files in parallel (default: platform_workers in pipeline_settings.yaml, 1 = sequential)",
+    )
+    parser.add_argument(
+        "--supplier-cache",
+        dest="supplier_cache",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Reuse normalized supplier data when the files and mapping are unchanged (cache/fournisseurs)",
+    )
+    parser.add_argument(
+        "--no-supplier-cache",
+        dest="supplier_cache",
+        action="store_const",
+        const=False,
+        default=None,
+        help="Re-read every supplier file even if an identical file is in the normalized-data cache",
+    )
+    parser.add_argument(
+        "--save-intermediates",
+        dest="intermediate_store",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Write typed intermediate tables (suppliers, cumulated stock, platforms) to Verifier/<run_id>/",
+    )
+    parser.add_argument(
+        "--join-engine",
+        choices=JOIN_ENGINES,
+        default=None,
+        help="Join/aggregate engine for this run: hash (default) or sort (searchsorted/reduceat, very large catalogs)",
+    )
+    parser.add_argument(
+        "--verify",
+        dest="verify",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Write cumulation verification artifacts (supplier rows with their cumulated stock) to Verifier/<run_id>/",
+    )
+    parser.add_argument(
+        "--ftp-in-memory",
+        dest="ftp_in_memory",
+        action="store_const",
+        const=True,
+        default=None,
+        help="Keep supplier downloads in memory up to ftp_spool_max_mb instead of writing them to disk",
+    )
     return parser.parse_args()
 
 
@@ -93,6 +172,19 @@ def main() -> int:
     else:
         list_platforms = list(plateformes_config.keys())
 
+    settings = load_pipeline_settings({
+        "csv_backend": args.csv_backend,
+        "streaming": args.streaming,
+        "chunk_size": args.chunk_size,
+        "workers": args.workers,
+        "platform_workers": args.platform_workers,
+        "supplier_cache": args.supplier_cache,
+        "intermediate_store": args.intermediate_store,
+        "verify": args.verify,
+        "join_engine": args.join_engine,
+        "ftp_in_memory": args.ftp_in_memory,
+    })
+
     report_gen = ReportGenerator()
     report_gen.start_operation()
 
@@ -111,7 +203,7 @@ def main() -> int:
             report_gen.add_warning("Pre-run backup failed")
 
         # 2) Download latest inputs via FTP (suppliers) and load local platform files
-        fichiers_fournisseurs = load_fournisseurs_ftp(list_fournisseurs, report_gen=report_gen)
+        fichiers_fournisseurs = load_fournisseurs_ftp(list_fournisseurs, report_gen=report_gen, settings=settings)
         # NEW: Load platform files from local storage instead of FTP download
         fichiers_platforms = load_platforms_local(list_platforms, report_gen=report_gen)
 
@@ -125,7 +217,7 @@ def main() -> int:
 
         # 4) Update stock and write outputs
         is_store_updated = mettre_a_jour_Stock(
-            platforms_files_valides, fournisseurs_files_valides, report_gen=report_gen
+            platforms_files_valides, fournisseurs_files_valides, report_gen=report_gen, settings=settings
         )
 
         # 5) Upload updated files to platform FTP (unless dry run)
@@ -160,6 +252,8 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    mark_freeze_support()
     sys.exit(main())
 
 
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def data_f():
+    """Fabrique de configuration fournisseur (format fournisseurs.yaml) pour un fichier CSV 'Ref;Stock'."""
+    def make(chemin, **kwargs):
+        return {'chemin_fichier': chemin, 'nom_reference': 'Ref', 'quantite_stock': 'Stock',
+                'no_header': False, 'multi_file': False, 'read_options': {}, **kwargs}
+    return make
@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from functions.functions_artifacts import IntermediateStore, list_runs
+
+
+@pytest.mark.parametrize("fmt", ['parquet', 'feather'])
+def test_intermediate_store_roundtrip_keeps_dtypes(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    store = IntermediateStore(run_id="20250101_120000", fmt=fmt, root=tmp_path)
+    cumule = pd.DataFrame({'ID_Product': ['007', '1E5', 'AB12'], 'Quantity': [3, 0, 12]})
+    mixte = pd.DataFrame({0: ['A', 'B'], 1: [1, 'x']})    # colonne non typable par pyarrow
+
+    store.save('cumule', 'fournisseurs', cumule)
+    store.save('fournisseur', 'NTY/1', mixte)
+
+    relu = IntermediateStore.latest(root=tmp_path).load('cumule', 'fournisseurs')
+    pd.testing.assert_frame_equal(relu, cumule)
+    assert store.load('fournisseur', 'NTY/1')[['0', '1']].values.tolist() == [['A', 1], ['B', 'x']]
+    assert store.artifacts() == [('cumule', 'fournisseurs'), ('fournisseur', 'NTY_1')]
+    assert list_runs(tmp_path) == ["20250101_120000"]
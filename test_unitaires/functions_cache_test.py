@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+
+import functions.functions_cache as cache
+import functions.functions_update as update
+
+
+def test_supplier_cache_skips_unchanged_file(tmp_path, monkeypatch, data_f):
+    monkeypatch.setattr(cache, 'SUPPLIER_CACHE_PATH', tmp_path / "cache")
+    fichier = tmp_path / "fournisseur.csv"
+    fichier.write_text("Ref;Stock\nab1;3\nab2;>10\n", encoding="utf-8")
+    settings = {'supplier_cache': True, 'supplier_cache_max_mb': 1}
+
+    premier = update._read_fournisseur_cached("F", data_f(str(fichier)), settings)
+
+    def relecture(*args, **kwargs):
+        raise AssertionError("fichier inchangé relu")
+    monkeypatch.setattr(update, 'read_fournisseur', relecture)
+    second = update._read_fournisseur_cached("F", data_f(str(fichier)), settings)
+    pd.testing.assert_frame_equal(second['reduced_data'], premier['reduced_data'])
+
+    # Même contenu publié ailleurs: entrée reprise, mais avec le chemin courant
+    copie = tmp_path / "copie.csv"
+    copie.write_bytes(fichier.read_bytes())
+    troisieme = update._read_fournisseur_cached("F", data_f(str(copie)), settings)
+    assert troisieme['Chemin'] == str(copie)
+    pd.testing.assert_frame_equal(troisieme['reduced_data'], premier['reduced_data'])
+
+    # Contenu ou mapping modifié: nouvelle clé
+    cle = cache.supplier_cache_key(data_f(str(fichier)))
+    assert cache.supplier_cache_key({**data_f(str(fichier)), 'quantite_stock': 'Autre'}) != cle
+    fichier.write_text("Ref;Stock\nab1;4\n", encoding="utf-8")
+    assert cache.supplier_cache_key(data_f(str(fichier))) != cle
+
+
+def test_supplier_cache_lru_eviction(tmp_path):
+    resultat = {'ref': 'ID_Product', 'qte': 'Quantity', 'sep': ';', 'encoding': 'utf-8',
+                'reduced_data': pd.DataFrame({'ID_Product': ['A'] * 100, 'Quantity': range(100)})}
+    for i, cle in enumerate(['a', 'b', 'c']):
+        cache.store_cached_supplier(cle, resultat, max_bytes=10 ** 9, cache_dir=tmp_path)
+        os.utime(tmp_path / f"{cle}.pkl", ns=(i * 10 ** 9, i * 10 ** 9))
+    taille = (tmp_path / "a.pkl").stat().st_size
+
+    # 'a' relue: devient la plus récente, 'b' est la moins récemment utilisée
+    assert cache.load_cached_supplier('a', cache_dir=tmp_path) is not None
+    assert cache.evict_supplier_cache(2 * taille, cache_dir=tmp_path) == 1
+    assert sorted(p.stem for p in tmp_path.glob("*.pkl")) == ['a', 'c']
@@ -0,0 +1,262 @@
+import pandas as pd
+
+from functions.functions_update import read_fournisseur
+
+
+def test_read_fournisseur_streaming_matches_full_read(tmp_path, data_f):
+    fichier = tmp_path / "fournisseur.csv"
+    # Échantillon ASCII, octet cp1252 au-delà: le flux est relu une fois en 8 bits
+    lignes = [f"r-{i % 700};{i % 5};x" for i in range(8000)] + ["Ä-1;>=10;y", "r-1;N/A;z"]
+    fichier.write_bytes(("Ref;Stock;Autre\n" + "\n".join(lignes) + "\n").encode("cp1252"))
+
+    complet = read_fournisseur(data_f(str(fichier)), settings={})
+    streaming = read_fournisseur(data_f(str(fichier)), settings={'streaming': True, 'chunk_size': 500})
+
+    attendu = complet['reduced_data'].groupby('ID_Product', as_index=False)['Quantity'].sum()
+    pd.testing.assert_frame_equal(streaming['reduced_data'], attendu, check_dtype=False)
+    assert (streaming['sep'], streaming['encoding']) == (';', 'cp1252')
+
+    # Rapport: mêmes colonnes stock_<fournisseur> dans les deux modes (lignes en double sommées)
+    from functions.functions_update import collect_supplier_details
+    from functions.functions_report import ReportGenerator
+    changements = pd.DataFrame({'product_id': attendu['ID_Product'], 'old_quantity': 0,
+                                'new_quantity': attendu['Quantity'], 'platform': "P"})
+    tables = {}
+    for mode, resultat in (('complet', complet), ('streaming', streaming)):
+        report = ReportGenerator()
+        report.set_supplier_contributions(collect_supplier_details({'F': {'reduced_data': resultat['reduced_data']}}))
+        report.add_stock_changes(changements)
+        tables[mode] = report._stock_changes_table()
+    pd.testing.assert_series_equal(tables['streaming']['stock_F'], tables['complet']['stock_F'])
+    assert tables['complet']['stock_F'].tolist() == attendu['Quantity'].tolist()
+
+
+def test_read_all_fournisseurs_parallel_matches_sequential(tmp_path, monkeypatch, data_f):
+    import utils
+    from functions.functions_update import read_all_fournisseurs
+    from functions.functions_report import ReportGenerator
+    monkeypatch.setattr(utils, 'DIALECT_CACHE_PATH', tmp_path / "dialect_cache.yaml")
+    monkeypatch.setattr(utils, '_DIALECT_CACHE', None)
+    fournisseurs = {}
+    for i in range(3):
+        fichier = tmp_path / f"F{i}.csv"
+        fichier.write_text("Ref;Stock\n" + "".join(f"A-{j};{i + j}\n" for j in range(20)), encoding="utf-8")
+        fournisseurs[f"F{i}"] = data_f(str(fichier))
+    fournisseurs["CASSE"] = data_f(str(tmp_path / "absent.csv"))
+
+    resultats = {}
+    for workers in (1, 2):
+        report_gen = ReportGenerator()
+        data = read_all_fournisseurs(fournisseurs, settings={'workers': workers}, report_gen=report_gen)
+        resultats[workers] = (data, report_gen.stats['files_failed'])
+
+    (sequentiel, echecs_seq), (parallele, echecs_par) = resultats[1], resultats[2]
+    assert list(parallele) == list(sequentiel) == ['F0', 'F1', 'F2']
+    for name in sequentiel:
+        pd.testing.assert_frame_equal(parallele[name]['reduced_data'], sequentiel[name]['reduced_data'])
+        # main_data compacté dans les deux chemins
+        pd.testing.assert_frame_equal(parallele[name]['main_data'], sequentiel[name]['main_data'])
+        assert sequentiel[name]['main_data'] is sequentiel[name]['reduced_data']
+    assert echecs_par == echecs_seq and echecs_seq[0]['file'].endswith("absent.csv")
+    assert set(utils.load_dialect_cache()) == {'F0', 'F1', 'F2'}
+
+
+def test_read_fournisseurs_parallel_spawn_context(tmp_path, monkeypatch, data_f):
+    import sys
+    import multiprocessing
+    import functions.functions_update as update
+    fournisseurs = {}
+    for i in range(2):
+        fichier = tmp_path / f"F{i}.csv"
+        fichier.write_text("Ref;Stock\n" + "".join(f"A-{j};{i + j}\n" for j in range(5)), encoding="utf-8")
+        fournisseurs[f"F{i}"] = data_f(str(fichier))
+    settings = {'supplier_cache': False}
+
+    # Démarrage 'spawn' (Windows): les workers réimportent les modules au lieu d'hériter du processus
+    outcomes = update._read_fournisseurs_parallel(fournisseurs, settings, 2,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+    for name, result, error in outcomes:
+        assert error is None
+        attendu = update.read_fournisseur(fournisseurs[name], name=name)['reduced_data']
+        pd.testing.assert_frame_equal(result['reduced_data'], attendu)
+
+    # Exécutable figé sans freeze_support: pas de pool de processus
+    monkeypatch.setattr(sys, 'frozen', True, raising=False)
+    monkeypatch.setattr(update, 'process_pool_supported', lambda: False)
+    def pool_interdit(*args, **kwargs):
+        raise AssertionError("pool de processus démarré")
+    monkeypatch.setattr(update, '_read_fournisseurs_parallel', pool_interdit)
+    assert list(update.read_all_fournisseurs(fournisseurs, settings={**settings, 'workers': 2})) == ['F0', 'F1']
+
+
+def test_read_fournisseur_multi_file_sums_partial_aggregates(tmp_path, data_f):
+    chemins = []
+    for i in range(4):
+        fichier = tmp_path / f"entrepot_{i}.csv"
+        fichier.write_text("Ref;Stock\n" + "".join(f"ab{j % 7};{i + j}\n" for j in range(30)), encoding="utf-8")
+        chemins.append(str(fichier))
+
+    data = read_fournisseur(data_f(chemins, multi_file=True), settings={'workers': 3})
+
+    lues = pd.concat([pd.read_csv(c, sep=';') for c in chemins])
+    attendu = lues.assign(Ref=lues['Ref'].str.upper()).groupby('Ref')['Stock'].sum()
+    assert data['reduced_data']['ID_Product'].tolist() == attendu.index.tolist()
+    assert data['reduced_data']['Quantity'].tolist() == attendu.tolist()
+
+
+def test_file_workers_share_cores_with_supplier_processes(monkeypatch):
+    import functions.functions_update as update
+    monkeypatch.setattr(update.os, 'cpu_count', lambda: 8)
+    assert update.file_workers({}, 10) == 8
+    # Dans un worker d'un pool de 4 processus: 8 cœurs / 4
+    monkeypatch.setattr(update, '_SUPPLIER_PROCESSES', 4)
+    assert update.file_workers({'workers': 4}, 10) == 2
+    assert update.file_workers({'file_workers': 3}, 10) == 3 and update.file_workers({}, 1) == 1
+
+
+def test_canonicalize_product_ids_matches_scalar_and_marks_frame():
+    import numpy as np
+    from functions.functions_update import canonicalize_product_id, canonicalize_product_ids, ensure_canonical_ids
+    valeurs = ["ab-1", " Ab 1 ", "x/2.b", "Straße", "é-7", "ﬁx", "a\nb", "", None, np.nan, 12, 3.5, "ab-1"]
+    serie = pd.Series(valeurs, dtype=object, index=range(10, 23))
+
+    assert canonicalize_product_ids(serie).tolist() == [canonicalize_product_id(v) for v in valeurs]
+    assert canonicalize_product_ids(serie[serie.map(lambda v: isinstance(v, str) and '\n' not in v)]).tolist() == \
+        ["AB1", "AB1", "X2B", "STRASSE", "7", "FIX", "", "AB1"]
+
+    # Entiers, flottants et booléens égaux pour factorize: chacun garde son propre texte, quel que soit l'ordre
+    for mixte in ([12, 12.0, 1, True, "x"], [True, 1, 12.0, 12, None]):
+        serie = pd.Series(mixte, dtype=object)
+        assert canonicalize_product_ids(serie).tolist() == [canonicalize_product_id(v) for v in mixte]
+    assert canonicalize_product_ids(pd.Series([12, 12.0, 1, True], dtype=object)).tolist() == ["12", "120", "1", "TRUE"]
+
+    df = ensure_canonical_ids(pd.DataFrame({'ID_Product': ["ab-1", "c d"], 'Quantity': [1, 2]}))
+    assert df['ID_Product'].tolist() == ["AB1", "CD"]
+    # Marqueur conservé: pas de seconde passe
+    suite = pd.concat([df, df])
+    suite.loc[0, 'ID_Product'] = "non-canonique"
+    assert ensure_canonical_ids(suite)['ID_Product'].iloc[0] == "non-canonique"
+
+
+def test_update_plateforme_integer_join_matches_merge():
+    import numpy as np
+    from functions.functions_update import update_plateforme
+    from functions.functions_ids import ProductIdDictionary, last_value_by_code
+    plateforme = pd.DataFrame({'ID_Product': ["A1", "B2", "ZZ", "A1", "C3"], 'Quantity': [0, 4, 1, 9, 2]})
+    fournisseurs = pd.DataFrame({'ID_Product': ["C3", "A1", "B2", "NEW"], 'Quantity': [2, 7, 5, 3]})
+
+    attendu, changements_attendus = update_plateforme(plateforme.copy(), fournisseurs.copy(), "P", "cumule")
+    ids = ProductIdDictionary()
+    obtenu, changements = update_plateforme(plateforme.copy(), fournisseurs.copy(), "P", "cumule", ids=ids)
+
+    pd.testing.assert_frame_equal(obtenu.reset_index(drop=True), attendu)
+    pd.testing.assert_frame_equal(changements, changements_attendus)
+    assert ids.decode(ids.lookup(["B2", "ZZ"])).tolist() == ["B2", "ZZ"] and ids.lookup(["absent"])[0] == -1
+    # Dernière valeur par code, comme dict(zip(...)) puis map
+    codes = ids.encode(plateforme['ID_Product'])
+    assert last_value_by_code(codes, np.arange(5)).tolist() == [3, 1, 2, 3, 4]
+
+
+def test_update_plateforme_change_table_and_report():
+    from functions.functions_update import update_plateforme, collect_supplier_details
+    from functions.functions_report import ReportGenerator
+    plateforme = pd.DataFrame({'ID_Product': ["A1", "B2", "C3"], 'Quantity': [0, 4, 2]})
+    fournisseurs = pd.DataFrame({'ID_Product': ["A1", "B2", "C3"], 'Quantity': [7, 4, 5]})
+    details = collect_supplier_details({
+        "F1": {'reduced_data': pd.DataFrame({'ID_Product': ["A1", "C3", "C3"], 'Quantity': [7, 9, 2]})},
+        "F2": {'reduced_data': pd.DataFrame({'ID_Product': ["C3", "X"], 'Quantity': [3, 1]})},
+    })
+
+    _, changements = update_plateforme(plateforme, fournisseurs, "P", "cumule", supplier_details=details)
+
+    assert changements['product_id'].tolist() == ["A1", "C3"]
+    assert changements['old_quantity'].tolist() == [0, 2] and changements['new_quantity'].tolist() == [7, 5]
+    # Lignes d'un fournisseur pour un même produit sommées, <NA> si le fournisseur ne le liste pas
+    assert changements['stock_F1'].tolist() == [7, 11] and changements['stock_F2'].tolist() == [pd.NA, 3]
+
+    # Le rapport lit les contributions lui-même et accepte l'ancien format liste de dictionnaires
+    report = ReportGenerator()
+    report.set_supplier_contributions(details)
+    report.add_stock_changes(changements[['product_id', 'old_quantity', 'new_quantity', 'platform']])
+    report.add_stock_changes([{'product_id': "X", 'old_quantity': 0, 'new_quantity': 1, 'platform': "P"}])
+    table = report._stock_changes_table()
+    assert table['product_id'].tolist() == ["A1", "C3", "X"]
+    assert table['stock_F2'].tolist() == [pd.NA, 3, 1]
+
+
+def test_update_plateforme_stock_index_matches_merge():
+    from functions.functions_update import update_plateforme
+    from functions.functions_ids import StockIndex
+    cumule = pd.DataFrame({'ID_Product': ["A1", "B2", "C3"], 'Quantity': [7, 5, 2]})
+    index = StockIndex.from_frame(cumule)
+    assert index.lookup(["C3", "A1"]).tolist() == [2, 7] and index.positions(["absent"])[0] == -1
+
+    for plateforme in ({'ID_Product': ["A1", "ZZ", "A1", "C3"], 'Quantity': [0, 1, 9, 2]},
+                       {'ID_Product': ["B2", "C3"], 'Quantity': [1, 1]}):
+        attendu, changements_attendus = update_plateforme(pd.DataFrame(plateforme), cumule.copy(), "P", "cumule")
+        obtenu, changements = update_plateforme(pd.DataFrame(plateforme), None, "P", "cumule", stock_index=index)
+        pd.testing.assert_frame_equal(obtenu, attendu)
+        pd.testing.assert_frame_equal(changements, changements_attendus)
+
+
+def test_run_platform_updates_threads_match_sequential(tmp_path, monkeypatch):
+    import functions.functions_update as update
+    from functions.functions_ids import StockIndex
+    from functions.functions_report import ReportGenerator
+    index = StockIndex.from_frame(pd.DataFrame({'ID_Product': ["A1", "B2"], 'Quantity': [7, 5]}))
+    plateformes = {}
+    for i in range(4):
+        chemin = tmp_path / f"P{i}.csv"
+        chemin.write_text(f"SKU;Qty\na-1;0\nb2;{i}\nzz;1\n", encoding="utf-8")
+        plateformes[f"P{i}"] = {'chemin_fichier': str(chemin), 'nom_reference': 'SKU', 'quantite_stock': 'Qty'}
+
+    sorties = {}
+    for workers in (1, 3):
+        monkeypatch.setattr(update, 'UPDATED_FILES_PATH', tmp_path / f"out{workers}")
+        report = ReportGenerator()
+        update.run_platform_updates(plateformes, index, settings={'platform_workers': workers}, report_gen=report)
+        assert report.stats['platforms_processed'] == set(plateformes) and not report.stats['files_failed']
+        assert report.stats['products_updated'] == 8
+        sorties[workers] = {p: (tmp_path / f"out{workers}" / p / f"{p}-latest.csv").read_text(encoding="utf-8")
+                            for p in plateformes}
+    assert sorties[1] == sorties[3]
+
+
+def test_cumule_verification_is_opt_in(tmp_path):
+    import functions.functions_update as update
+    from functions.functions_ids import StockIndex
+    from functions.functions_artifacts import IntermediateStore
+    fournisseurs = {
+        nom: {'Chemin': f"{nom}.csv", 'qte': 'Stock', 'sep': ';', 'encoding': 'utf-8',
+              'reduced_data': pd.DataFrame({'ID_Product': ids, 'Quantity': qtes})}
+        for nom, ids, qtes in (("F1", ["007", "B2"], [3, 1]), ("F2", ["007"], [4]))}
+
+    cumule = update.cumule_fournisseurs(fournisseurs)
+    assert cumule['Quantity'].tolist() == [7, 1]
+    # Sans verify: données fournisseur inchangées
+    assert fournisseurs["F1"]['reduced_data'].columns.tolist() == ['ID_Product', 'Quantity']
+
+    store = IntermediateStore(run_id="20250101_000000", root=tmp_path)
+    assert update.write_cumule_verification(fournisseurs, StockIndex.from_frame(cumule), store) == 2
+    verif = store.load('verification', "F1")
+    # Artefact typé: identifiants relus en texte
+    assert verif['ID_Product'].tolist() == ["007", "B2"]
+    assert verif['Quantity_Fourniss_After_Cumule'].tolist() == [7, 1] and verif['Stock'].tolist() == [7, 1]
+
+
+def test_sort_join_engine_matches_hash():
+    import numpy as np
+    import functions.functions_update as update
+    from functions.functions_ids import StockIndex, segment_sum
+    cles, sommes = segment_sum(np.array([3, 1, 3, 2]), np.array([1.0, np.nan, 2.0, 4.0]))
+    assert cles.tolist() == [1, 2, 3] and sommes.tolist() == [0.0, 4.0, 3.0]
+
+    fournisseurs = {nom: {'reduced_data': pd.DataFrame({'ID_Product': ids, 'Quantity': qtes})}
+                    for nom, ids, qtes in (("F1", ["B2", "A10", "A9"], [3, 1, 2]), ("F2", ["A9", "Z"], [4, 0]))}
+    cumule = {engine: update.cumule_fournisseurs(fournisseurs, engine=engine) for engine in ('hash', 'sort')}
+    pd.testing.assert_frame_equal(cumule['sort'], cumule['hash'])
+
+    demandes = ["A9", "absent", "Z", "É1", "B2"]
+    positions = {engine: StockIndex.from_frame(cumule['hash'], engine=engine).positions(demandes)
+                 for engine in ('hash', 'sort')}
+    assert positions['sort'].tolist() == positions['hash'].tolist() == [1, -1, 3, -1, 2]
@@ -0,0 +1,243 @@
+import pandas as pd
+import pytest
+
+from utils import sniff_csv_dialect, robust_read_csv
+
+
+def test_sniff_semicolon_utf8(tmp_path):
+    fichier = tmp_path / "fournisseur.csv"
+    fichier.write_text("Article;Marque, Modèle;Stock\nA1;Bosch, X;5\nA2;Valeo, Y;0\n", encoding="utf-8")
+
+    dialect = sniff_csv_dialect(fichier)
+
+    assert dialect['encoding'] == 'utf-8'
+    assert dialect['sep'] == ';'
+    assert dialect['n_columns'] == 3
+    assert dialect['confidence'] > 0.9
+
+
+def test_sniff_quoted_comma_with_bom(tmp_path):
+    fichier = tmp_path / "export.csv"
+    fichier.write_bytes('﻿"id","name, x","qty"\n"1","a, b","3"\n"2","c, d","4"\n'.encode("utf-8"))
+
+    dialect = sniff_csv_dialect(fichier)
+
+    assert dialect['encoding'] == 'utf-8-sig'
+    assert dialect['sep'] == ','
+    assert dialect['n_columns'] == 3
+
+
+def test_robust_read_csv_single_parse_returns_dialect(tmp_path):
+    fichier = tmp_path / "stock.csv"
+    # Échantillon ASCII, caractère cp1252 en fin de fichier
+    fichier.write_bytes(b"ref;qty\n" + b"ABC;1\n" * 20000 + "Ä;2\n".encode("cp1252"))
+
+    df, encoding, sep, dialect = robust_read_csv(fichier)
+
+    assert (encoding, sep) == ('cp1252', ';')
+    assert dialect['confidence'] > 0.5
+    assert df.shape == (20001, 2)
+    assert df['ref'].iloc[-1] == 'Ä'
+
+
+def test_read_dataset_file_dialect_cache(tmp_path, monkeypatch):
+    import utils
+    monkeypatch.setattr(utils, 'DIALECT_CACHE_PATH', tmp_path / "cache" / "dialect_cache.yaml")
+    monkeypatch.setattr(utils, '_DIALECT_CACHE', None)
+    fichier = tmp_path / "NTX.csv"
+    fichier.write_text("ref;qty\nA;1\nB;2\nC;3\n", encoding="utf-8")
+
+    utils.read_dataset_file(str(fichier), entity="FOURNISSEUR_A")
+    signature = utils.file_signature(str(fichier))
+    assert utils.get_cached_dialect("FOURNISSEUR_A", signature)['sep'] == ';'
+
+    # Un dialecte en cache invalide est détecté à nouveau puis écrasé
+    utils.load_dialect_cache()["FOURNISSEUR_A"][signature]['sep'] = '|'
+    result = utils.read_dataset_file(str(fichier), entity="FOURNISSEUR_A")
+    assert result['sep'] == ';'
+    assert result['dataset'].shape == (3, 2)
+    assert utils.get_cached_dialect("FOURNISSEUR_A", signature)['sep'] == ';'
+    assert (tmp_path / "cache" / "dialect_cache.yaml").is_file()
+
+
+def test_read_dataset_file_projection(tmp_path):
+    from utils import read_dataset_file, build_projection_plan
+    fichier = tmp_path / "plateforme.csv"
+    fichier.write_text("Marque;Réf;Prix;Stock\nBosch;A-1;10,5;3\nValeo;B-2;7,0;>=10\n", encoding="utf-8")
+
+    by_name = read_dataset_file(str(fichier), projection=build_projection_plan('Réf', 'Stock'))
+    by_index = read_dataset_file(str(fichier), header=None, projection=build_projection_plan('1', '3', no_header=True))
+
+    assert list(by_name['dataset'].columns) == ['Réf', 'Stock']
+    assert by_name['projection'] == {'ref': 'Réf', 'qte': 'Stock'}
+    assert by_index['dataset'].shape == (3, 2)
+    assert by_index['dataset'].iloc[2].tolist() == ['B-2', '>=10']
+    # Passthrough: toutes les colonnes
+    assert read_dataset_file(str(fichier))['dataset'].shape == (2, 4)
+
+
+def test_pyarrow_backend_matches_pandas(tmp_path):
+    pytest.importorskip("pyarrow")
+    from utils import read_dataset_file, build_projection_plan
+    fichier = tmp_path / "fournisseur.csv"
+    fichier.write_bytes("Réf;Stock;Date;Prix;Stock\nA-1;3;2024-01-02;1,5;x\n007;;2024-01-03;2;y\n".encode("cp1252"))
+    courte = tmp_path / "courte.csv"
+    courte.write_text("ref;qty;prix\nA;1;2\nB;2\n", encoding="utf-8")
+
+    for chemin, kwargs in [(fichier, {}), (fichier, {'header': None}), (courte, {}),
+                           (fichier, {'projection': build_projection_plan('Réf', 'Stock')}),
+                           (fichier, {'header': None, 'projection': build_projection_plan('0', '1', no_header=True)})]:
+        attendu = read_dataset_file(str(chemin), **kwargs)
+        obtenu = read_dataset_file(str(chemin), backend='pyarrow', **kwargs)
+        pd.testing.assert_frame_equal(obtenu['dataset'], attendu['dataset'], check_dtype=False)
+        assert (obtenu['encoding'], obtenu['sep'], obtenu['projection']) == \
+               (attendu['encoding'], attendu['sep'], attendu['projection'])
+
+
+def test_resolve_csv_backend_precedence():
+    from utils import resolve_csv_backend
+    assert resolve_csv_backend() == 'pandas'
+    assert resolve_csv_backend({'csv_backend': 'pyarrow'}, {'csv_backend': None}) == 'pyarrow'
+    assert resolve_csv_backend({'csv_backend': 'pyarrow'}, {'csv_backend': 'pandas'}) == 'pandas'
+    assert resolve_csv_backend({'csv_backend': 'polars'}) == 'pandas'
+
+
+def test_read_excel_streaming_matches_read_excel(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    from utils import read_dataset_file, build_projection_plan
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Marque', 'Réf', None, 'Stock', 'Stock'])
+    ws.append(['Bosch', '007', 1.0, 3, 'x'])
+    ws.append([])
+    ws.append(['Valeo', 'B-2', None, None, 'y', 'extra'])
+    fichier = tmp_path / "stock.xls"    # extension trompeuse: le contenu est lu d'après les octets magiques
+    wb.save(fichier)
+
+    complet = read_dataset_file(str(fichier))
+    projete = read_dataset_file(str(fichier), projection=build_projection_plan('Réf', 'Stock.1'))
+
+    attendu = pd.read_excel(fichier, engine='openpyxl')
+    pd.testing.assert_frame_equal(complet['dataset'], attendu)
+    assert complet['dialect']['header'] == 0
+    pd.testing.assert_frame_equal(projete['dataset'], attendu[['Réf', 'Stock.1']])
+
+
+def test_decode_sample_reports_tier():
+    from utils import _decode_sample, DEFAULT_ENCODINGS
+    allemand = "Artikel;Größe;Menge\nSchäfer;€ 5;Ä\n".encode("cp1252") * 50
+
+    assert _decode_sample(b"\xef\xbb\xbfref;qty\n", DEFAULT_ENCODINGS)[3] == 'bom'
+    assert _decode_sample("Réf;Qté\n".encode("utf-8"), DEFAULT_ENCODINGS)[3] == 'utf8'
+    encoding, _, texte, tier = _decode_sample(allemand, DEFAULT_ENCODINGS)
+    assert (encoding, tier) == ('cp1252', 'single_byte')
+    assert texte.startswith("Artikel;Größe")
+    # Texte cyrillique: trop d'octets hauts pour le discriminant, niveau lent
+    assert _decode_sample("Размер;Кол\n".encode("cp1251") * 50, DEFAULT_ENCODINGS)[3] not in ('single_byte', 'utf8')
+
+
+def test_detect_encoding_fast_sample_size_and_threaded_tiers(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from utils import detect_encoding_fast, encoding_tier_stats, _decode_sample, DEFAULT_ENCODINGS
+    fichier = tmp_path / "f.csv"
+    fichier.write_bytes(b"ref;qty\n" * 1000 + "Schäfer;€ 5\n".encode("cp1252") * 50)
+    assert detect_encoding_fast(str(fichier), size_bytes=2048) in ('utf-8', 'utf8', 'ascii')
+    assert detect_encoding_fast(str(fichier), size_bytes=64 * 1024) == 'cp1252'
+
+    # Compteurs de niveaux mis à jour depuis plusieurs threads: aucun incrément perdu
+    avant = encoding_tier_stats().get('bom', 0)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: _decode_sample(b"\xef\xbb\xbfref\n", DEFAULT_ENCODINGS), range(2000)))
+    assert encoding_tier_stats()['bom'] == avant + 2000
+
+
+def test_file_probe_excel_head_closes_workbook(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    import utils
+    wb = openpyxl.Workbook()
+    for i in range(100):
+        wb.active.append([f"R{i}", i])
+    fichier = tmp_path / "stock.xlsx"
+    wb.save(fichier)
+
+    fermes = []
+    lecture = utils._iter_excel_rows
+    def lecture_suivie(*args):
+        try:
+            yield from lecture(*args)
+        finally:
+            fermes.append(True)
+    monkeypatch.setattr(utils, '_iter_excel_rows', lecture_suivie)
+
+    assert len(utils.FileProbe(fichier).head()) == utils.FileProbe.HEAD_ROWS
+    # Classeur fermé dès l'aperçu lu, sans attendre le ramasse-miettes
+    assert fermes == [True]
+
+
+def test_file_probe_shared_and_invalidated(tmp_path):
+    import os
+    from utils import FileProbe
+    fichier = tmp_path / "plateforme.csv"
+    fichier.write_text("ref;qty\n" + "".join(f"A{i};{i}\n" for i in range(50)), encoding="utf-8")
+
+    probe = FileProbe.get(fichier)
+    assert FileProbe.get(str(fichier)) is probe
+    assert probe.sniff()['sep'] == ';'
+    assert probe.head('infer').shape == (FileProbe.HEAD_ROWS, 2)
+
+    # Fichier modifié (taille et mtime): nouvel échantillon
+    fichier.write_text("ref|qty\nB|1\nC|2\n", encoding="utf-8")
+    os.utime(fichier, ns=(0, 0))
+    nouveau = FileProbe.get(fichier)
+    assert nouveau is not probe
+    assert nouveau.sniff()['sep'] == '|'
+
+
+def test_read_dataset_file_through_mmap(tmp_path, monkeypatch):
+    import utils
+    fichier = tmp_path / "plateforme.csv"
+    fichier.write_bytes(b"ref;qty\n" + b"ABC;1\n" * 20000 + "Ä;2\n".encode("cp1252"))
+    attendu = utils.read_dataset_file(str(fichier))['dataset']
+
+    monkeypatch.setattr(utils, 'MMAP_MIN_BYTES', 0)
+    probe = utils.FileProbe.get(fichier)
+    with probe.mapped():
+        assert probe._map is not None
+        obtenu = utils.read_dataset_file(str(fichier))['dataset']
+    assert probe._map is None
+    pd.testing.assert_frame_equal(obtenu, attendu)
+
+
+def test_ragged_rows_padded_and_truncated(tmp_path):
+    from utils import read_dataset_file
+    fichier = tmp_path / "NTY.csv"
+    lignes = ["ref;a;b;qty"] + [f"R{i};x;y;{i}" for i in range(10)] + ["LONG;x;y;5;trop;long", "COURT;x"]
+    fichier.write_text("\r\n".join(lignes) + "\r\n", encoding="utf-8")
+
+    for backend in ('pandas', 'pyarrow'):
+        df = read_dataset_file(str(fichier), ragged_rows=True, backend=backend)['dataset']
+        assert df.shape == (12, 4)
+        assert df.iloc[10].tolist() == ['LONG', 'x', 'y', 5]
+        assert df.iloc[11, :2].tolist() == ['COURT', 'x'] and df.iloc[11, 2:].isna().all()
+
+
+def test_read_dataset_file_from_memory(tmp_path):
+    import utils
+    from functions.functions_FTP import SpoolingDownload
+    donnees = b"ref;qty\n" + b"".join(b"A%d;%d\n" % (i, i) for i in range(500))
+    chemin = tmp_path / "F-stock.csv"
+
+    petit = SpoolingDownload(chemin, max_bytes=len(donnees))
+    petit.write(donnees)
+    assert petit.finish() and not chemin.exists()
+    try:
+        assert utils.dataset_file_exists(chemin)
+        assert utils.read_dataset_file(str(chemin))['dataset'].shape == (500, 2)
+    finally:
+        utils.release_memory_files([chemin])
+
+    # Au-delà du seuil: déversé sur disque, contenu identique
+    gros = SpoolingDownload(chemin, max_bytes=100)
+    for i in range(0, len(donnees), 64):
+        gros.write(donnees[i:i + 64])
+    assert not gros.finish() and chemin.read_bytes() == donnees
@@ -0,0 +1,85 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import process_stock_value, process_stock_series
+
+
+def _scalar(values):
+    return [process_stock_value(v) for v in values]
+
+
+def test_process_stock_series_matches_scalar_exhaustive():
+    prefixes = ['', '>=', '<=', '>', '<', '+', '-', '=>', '>>', '+-', '~']
+    espaces = ['', ' ', '\t', '  ']
+    nombres = ['0', '7', '007', '10', '250', '1.5', '4.', '.5', '-3', '1e3', '12abc', '', 'x',
+               '10-20', '10 - 20', '10-20-30', '10-', '-10-20', '5-x', '²', '١٢', '999999999999999999']
+    valeurs = [f"{espace}{prefixe}{interieur}{nombre}{espace}"
+               for prefixe, espace, interieur, nombre in itertools.product(prefixes, espaces, ['', ' '], nombres)]
+    jetons = ["N/A", "NA", "NONE", "AVAILABLE", "IN STOCK", "INSTOCK", "EN STOCK", "ENSTOCK",
+              "OUT OF STOCK", "OUTOFSTOCK", "RUPTURE", "ÉPUISÉ", "EPUISE", "nan", "inf", "-inf", "infinity"]
+    valeurs += [v for jeton in jetons for v in (jeton, jeton.lower(), jeton.title(), f"  {jeton} ")]
+    valeurs += [None, np.nan, 0, 12, -4, 3.9, -3.9, 1e5, True, False, pd.NA]
+
+    serie = pd.Series(valeurs * 3, dtype=object)
+    assert process_stock_series(serie).tolist() == _scalar(serie)
+    # Même résultat avec le type texte de pandas
+    texte = serie[serie.map(lambda v: isinstance(v, str))].astype('str')
+    assert process_stock_series(texte).tolist() == _scalar(texte)
+
+
+@pytest.mark.parametrize('serie', [
+    pd.Series([1, 5, -2, 0]),
+    pd.Series([1.9, np.nan, -2.5, 0.0]),
+    pd.Series([True, False]),
+    pd.Series([1, None, 3], dtype='Int64'),
+    pd.Series([], dtype=float),
+    pd.Series(['>10', 'x', None], index=[5, 3, 9], name='Stock'),
+    # Hors int64: entiers Python comme process_stock_value
+    pd.Series([1.5, 2.0 ** 64, np.nan, -1e19]),
+    pd.Series(['3', '1e30', None, 2e19, '999999999999999999999'], dtype=object),
+])
+def test_process_stock_series_numeric_and_index(serie):
+    obtenu = process_stock_series(serie)
+    assert obtenu.tolist() == _scalar(serie)
+    assert obtenu.index.equals(serie.index) and obtenu.name == serie.name
+
+
+def test_stock_rules_table_and_entity_overrides(tmp_path, monkeypatch):
+    import utils
+    table = tmp_path / "stock_tokens.yaml"
+    table.write_text("tokens:\n  AVAILABLE: 50\n  'N/A': 0\n"
+                     "patterns:\n  - match: '^LIMIT'\n    value: 2\n  - match: '^>(.*)$'\n    value: int\n",
+                     encoding="utf-8")
+    monkeypatch.setattr(utils, 'STOCK_TOKENS_PATH', table)
+    serie = pd.Series(["available", "Limited", ">7", "sur commande", "IN STOCK", "3", None], dtype=object)
+
+    regles = utils.stock_rules()
+    assert utils.stock_rules() is regles
+    assert process_stock_series(serie, regles).tolist() == [50, 2, 7, 0, 0, 3, 0]
+
+    surcharge = utils.stock_rules({'Sur commande': 4, 'AVAILABLE': 1})
+    assert surcharge.fingerprint != regles.fingerprint
+    assert process_stock_series(serie, surcharge).tolist() == [1, 2, 7, 4, 0, 3, 0]
+    assert process_stock_series(serie, surcharge).tolist() == [process_stock_value(v, surcharge) for v in serie]
+
+
+def test_stock_rules_unanchored_pattern_matches_scalar(tmp_path, monkeypatch):
+    import pytest
+    import utils
+    table = tmp_path / "stock_tokens.yaml"
+    # Motifs non ancrés: appliqués à partir du début du texte dans les deux versions
+    table.write_text("tokens: {}\npatterns:\n  - match: 'QTY(\\d+)'\n    value: int\n"
+                     "  - match: 'LIMIT'\n    value: 2\n", encoding="utf-8")
+    monkeypatch.setattr(utils, 'STOCK_TOKENS_PATH', table)
+    serie = pd.Series(["QTY5", "X QTY5", "LIMITED", "NOT LIMITED", "qty12 ", "7"], dtype=object)
+
+    regles = utils.stock_rules()
+    assert process_stock_series(serie, regles).tolist() == [process_stock_value(v, regles) for v in serie]
+    assert process_stock_series(serie, regles).tolist() == [5, 0, 2, 0, 12, 7]
+
+    # value: int sans groupe de capture: table refusée
+    with pytest.raises(ValueError):
+        utils.StockRules({}, [{'match': '^\\d+$', 'value': 'int'}])
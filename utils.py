@@ -2,10 +2,21 @@ import os
 import re
 import sys
 import yaml
+import numpy as np
 import pandas as pd
 import smtplib
+import csv
+import io
+import codecs
+import hashlib
+import json
 import chardet
 import socket
+import itertools
+import threading
+import mmap
+import contextlib
+from collections import Counter, OrderedDict
 from ftplib import FTP
 
 from pathlib import Path
@@ -16,7 +27,7 @@ from config.logging_config import logger
 
 from config.config_path_variables import (
     YAML_ENCODING_SEP_FILE_PATH, YAML_REFERENCE_NAME, YAML_QUANTITY_NAME,
-    CONFIG
+    CONFIG, DIALECT_CACHE_PATH, PIPELINE_SETTINGS_PATH, STOCK_TOKENS_PATH
 )
 
 # Charger les variables du fichier .env
@@ -74,6 +85,74 @@ def save_yaml_config(data, file_path):
         logger.error(f"Erreur lors de la sauvegarde de {file_path}: {e}")
         return False
 
+# ------------------------------------------------------------------------------
+#                 Réglages d'exécution (config/pipeline_settings.yaml)
+# ------------------------------------------------------------------------------
+PIPELINE_SETTINGS_DEFAULTS = {
+    'csv_backend': None,
+    'streaming': None,
+    'chunk_size': 100_000,
+    'workers': None,
+    'platform_workers': None,
+    'file_workers': None,
+    'supplier_cache': False,
+    'supplier_cache_max_mb': 512,
+    'intermediate_store': False,
+    'intermediate_format': 'parquet',
+    'verify': False,
+    'join_engine': 'hash',
+    'ftp_in_memory': False,
+    'ftp_spool_max_mb': 64,
+}
+
+CSV_BACKENDS = ('pandas', 'pyarrow')
+
+# Exécutable figé (PyInstaller): un processus worker relance l'exécutable, qui doit
+# appeler multiprocessing.freeze_support() dans son point d'entrée (sinon il rouvre la GUI)
+_FREEZE_SUPPORT = False
+
+
+def mark_freeze_support() -> None:
+    """À appeler par un point d'entrée juste après multiprocessing.freeze_support()."""
+    global _FREEZE_SUPPORT
+    _FREEZE_SUPPORT = True
+
+
+def process_pool_supported() -> bool:
+    """Faux dans un exécutable figé dont le point d'entrée n'a pas appelé freeze_support."""
+    return _FREEZE_SUPPORT or not getattr(sys, 'frozen', False)
+
+
+def load_pipeline_settings(overrides: dict | None = None) -> dict:
+    """
+    Réglages du pipeline: valeurs par défaut < pipeline_settings.yaml < overrides
+    (options CLI du run). Les overrides à None sont ignorés.
+    """
+    settings = dict(PIPELINE_SETTINGS_DEFAULTS)
+    data = load_yaml_config(PIPELINE_SETTINGS_PATH) if Path(PIPELINE_SETTINGS_PATH).is_file() else None
+    if isinstance(data, dict):
+        settings.update(data)
+    settings.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return settings
+
+
+def resolve_read_option(name: str, read_options: dict | None = None, settings: dict | None = None, default=None):
+    """Option de lecture effective: réglage du run, sinon réglage de l'entité, sinon défaut."""
+    value = (settings or {}).get(name)
+    if value is None:
+        value = (read_options or {}).get(name)
+    return default if value is None else value
+
+
+def resolve_csv_backend(read_options: dict | None = None, settings: dict | None = None) -> str:
+    """Moteur CSV effectif: réglage du run, sinon réglage de l'entité, sinon pandas."""
+    backend = resolve_read_option('csv_backend', read_options, settings, default='pandas')
+    if backend not in CSV_BACKENDS:
+        logger.warning(f"-- ⚠️ -- Moteur CSV inconnu '{backend}', utilisation de pandas")
+        return 'pandas'
+    return backend
+
+
 def send_test_email(smtp_user, smtp_password, recipients):
     """Sends a simple test email to a list of recipients."""
     
@@ -165,10 +244,8 @@ def save_file(file_name: str, df: pd.DataFrame, encoding: str = 'utf-8', sep: st
 #                        Détection rapide de l'encodage
 # ------------------------------------------------------------------------
 def detect_encoding_fast(file_path: str, size_bytes: int = 2048) -> str:
-    with open(file_path, 'rb') as f:
-        raw_data = f.read(size_bytes)
-        result = chardet.detect(raw_data)
-    return result['encoding'] if result['encoding'] else 'utf-8'
+    # Sonde dédiée: échantillon de size_bytes octets (FileProbe.get garde l'échantillon standard)
+    return FileProbe(file_path, size_bytes).sniff()['encoding']
 
 
 # ------------------------------------------------------------------------
@@ -225,7 +302,7 @@ def has_valid_header(df: pd.DataFrame) -> bool:
 # ------------------------------------------------------------------------
 def try_read_csv(file_path: str, sep: str, encoding: str, usecols=None) -> pd.DataFrame | None:
     try:
-        temp_df = pd.read_csv(file_path, sep=sep, encoding=encoding, nrows=4)
+        temp_df = FileProbe.get(file_path).parse_head(encoding, sep, nrows=4)
         header_option = 0 if has_valid_header(temp_df) else None
         df = pd.read_csv(file_path, sep=sep, encoding=encoding, header=header_option, usecols=usecols)
         return df
@@ -233,46 +310,719 @@ def try_read_csv(file_path: str, sep: str, encoding: str, usecols=None) -> pd.Da
         return None
 
 
-def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, separators=None):
-    if encodings is None:
-        encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'latin1', 'iso-8859-1']
-    if separators is None:
-        # Prioritize semicolon for CSV files as it's more common in European data
-        separators = [';', ',', '|', '\t', ' ']
-    
-    # Check if this is likely an NTY file (contains specific patterns)
-    is_nty_file = False
-    file_name = Path(file_path).name.upper()
-    if 'NTY' in file_name or 'AJS-OFERTA' in file_name:
-        is_nty_file = True
-        logger.info(f"🔍 Detected NTY file pattern in: {file_name}")
-    
-    # Try chardet first and prioritize its detection
-    detected_encoding = None
+# ------------------------------------------------------------------------
+#        Détection du dialecte CSV (encodage, séparateur) sur un échantillon
+# ------------------------------------------------------------------------
+SNIFF_SAMPLE_BYTES = 64 * 1024     # taille de l'échantillon décodé une seule fois
+SNIFF_MAX_ROWS = 200               # lignes utilisées pour noter les séparateurs
+SNIFF_MIN_CONFIDENCE = 0.5         # en dessous: on repasse par la recherche exhaustive
+MMAP_MIN_BYTES = 1024 * 1024       # en dessous, les parseurs relisent simplement le fichier
+SNIFF_SLOW_WINDOW_BYTES = 16 * 1024   # fenêtre analysée par charset_normalizer / chardet
+SINGLE_BYTE_MAX_DENSITY = 0.2      # part max d'octets >= 0x80 pour un texte 8 bits d'Europe de l'Ouest
+SINGLE_BYTE_MIN_WESTERN = 0.8      # part min de ces octets parmi les lettres/ponctuations occidentales
+
+DEFAULT_ENCODINGS = ['utf-8', 'utf-8-sig', 'cp1252', 'latin1', 'iso-8859-1']
+# Prioritize semicolon for CSV files as it's more common in European data
+DEFAULT_SEPARATORS = [';', ',', '|', '\t', ' ']
+
+_ASCII_BYTES = bytes(range(0x80))
+_WESTERN_HIGH_BYTES = 'àâäçèéêëîïôöùûüÿßÀÂÄÇÈÉÊËÎÏÔÖÙÛÜñÑáíóúòìãõåøæœŒ€°²³µ«»–—‘’“”…·'.encode('cp1252')
+
+# Nombre de détections décidées par niveau (bom, utf8, single_byte, charset_normalizer, chardet, ...)
+ENCODING_TIER_COUNTS = Counter()
+_ENCODING_TIER_LOCK = threading.Lock()    # détections concurrentes (fichiers multi_file, plateformes)
+
+
+def encoding_tier_stats() -> dict:
+    """Compteurs des niveaux de détection d'encodage depuis le début du run."""
+    with _ENCODING_TIER_LOCK:
+        return dict(ENCODING_TIER_COUNTS)
+
+
+def record_encoding_tiers(tiers: dict) -> None:
+    """Ajoute des compteurs de niveaux (ex. ceux d'un processus de lecture) à ceux du run."""
+    with _ENCODING_TIER_LOCK:
+        ENCODING_TIER_COUNTS.update(tiers)
+
+
+def _guess_single_byte(raw: bytes) -> tuple[str, str] | None:
+    """
+    Discriminant cp1252 / latin-1 bon marché pour un échantillon non UTF-8: peu
+    d'octets hauts, et surtout des lettres accentuées ou ponctuations d'Europe de
+    l'Ouest. cp1252 est retenu s'il décode (sur-ensemble imprimable de latin-1),
+    sinon latin-1. None si l'échantillon ne ressemble pas à ce cas.
+    Returns (encoding, texte décodé) ou None.
+    """
+    if not raw or b'\x00' in raw:
+        return None
+    high = raw.translate(None, _ASCII_BYTES)
+    if len(high) > SINGLE_BYTE_MAX_DENSITY * len(raw):
+        return None
+    western = len(high) - len(high.translate(None, _WESTERN_HIGH_BYTES))
+    if western < SINGLE_BYTE_MIN_WESTERN * len(high):
+        return None
     try:
-        with open(file_path, 'rb') as f:
-            raw = f.read(100000)  # Read first 100KB for detection
-            guess = chardet.detect(raw)
-            if guess and guess['encoding'] and guess['confidence'] > 0.7:
-                detected_encoding = guess['encoding']
-                logger.info(f"🔍 Detected encoding: {detected_encoding} (confidence: {guess['confidence']:.2f})")
+        return 'cp1252', raw.decode('cp1252')
+    except UnicodeDecodeError:
+        return 'latin1', raw.decode('latin1')
+
+
+def _detect_with_library(window: bytes, encodings: list[str]) -> tuple[str, float, str] | None:
+    """Niveau lent: charset_normalizer limité aux encodages configurés, puis chardet. Returns (encoding, confidence, tier)."""
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(window, cp_isolation=encodings).best()
+        if best is not None and best.chaos <= 0.3:
+            return best.encoding, 1.0 - best.chaos, 'charset_normalizer'
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to detect encoding with charset_normalizer: {e}")
+    try:
+        guess = chardet.detect(window)
+        if guess and guess['encoding'] and guess['confidence'] > 0.7:
+            return guess['encoding'], float(guess['confidence']), 'chardet'
     except Exception as e:
         logger.warning(f"Failed to detect encoding with chardet: {e}")
-    
-    # Prioritize detected encoding
-    if detected_encoding and detected_encoding not in encodings:
-        encodings = [detected_encoding] + encodings
-    elif detected_encoding:
-        # Move detected encoding to front
-        encodings = [detected_encoding] + [enc for enc in encodings if enc != detected_encoding]
-    
-    # For NTY files, force semicolon as the first separator to try
+    return None
+
+
+def _decode_sample(raw: bytes, encodings: list[str]) -> tuple[str, float, str, str]:
+    """
+    Choisit l'encodage d'un échantillon par niveaux, du moins cher au plus cher:
+    BOM, UTF-8 strict, discriminant cp1252/latin-1, puis charset_normalizer /
+    chardet sur une fenêtre réduite, enfin le premier encodage configuré qui décode.
+    Returns (encoding, confidence, texte décodé, niveau qui a décidé).
+    """
+    result = _decode_sample_tiers(raw, encodings)
+    with _ENCODING_TIER_LOCK:
+        ENCODING_TIER_COUNTS[result[3]] += 1
+    return result
+
+
+def _decode_sample_tiers(raw: bytes, encodings: list[str]) -> tuple[str, float, str, str]:
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig', 1.0, raw[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace'), 'bom'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16', 1.0, raw.decode('utf-16', errors='replace'), 'bom'
+
+    # L'échantillon peut couper un caractère multi-octets en fin de buffer
+    try:
+        text = codecs.getincrementaldecoder('utf-8')().decode(raw, final=False)
+        return 'utf-8', 0.99, text, 'utf8'
+    except UnicodeDecodeError:
+        pass
+
+    single_byte = _guess_single_byte(raw)
+    if single_byte is not None:
+        return single_byte[0], 0.9, single_byte[1], 'single_byte'
+
+    detected = _detect_with_library(raw[:SNIFF_SLOW_WINDOW_BYTES], encodings)
+    if detected is not None:
+        encoding, confidence, tier = detected
+        return encoding, confidence, raw.decode(encoding, errors='replace'), tier
+
+    for encoding in encodings:
+        try:
+            return encoding, 0.5, raw.decode(encoding), 'configured'
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return 'latin1', 0.3, raw.decode('latin1'), 'fallback'
+
+
+def _score_separator(text: str, sep: str, max_rows: int = SNIFF_MAX_ROWS) -> tuple[float, int]:
+    """
+    Note un séparateur sur l'échantillon: régularité du nombre de colonnes
+    (lecture csv qui respecte les guillemets) + bonus si les champs sont
+    entourés de guillemets autour du séparateur ("a";"b").
+    Returns (score, nombre de colonnes modal).
+    """
+    try:
+        reader = csv.reader(io.StringIO(text), delimiter=sep, quotechar='"')
+        counts = Counter(len(row) for row in itertools.islice(reader, max_rows) if row)
+    except csv.Error:
+        return 0.0, 0
+    if not counts:
+        return 0.0, 0
+    n_columns, freq = counts.most_common(1)[0]
+    if n_columns < 2:
+        return 0.0, n_columns
+    consistency = freq / sum(counts.values())
+    n_lines = max(1, text.count('\n'))
+    quoted_ratio = min(1.0, text.count(f'"{sep}"') / (n_lines * (n_columns - 1)))
+    return consistency + 0.1 * quoted_ratio, n_columns
+
+
+def sniff_csv_dialect(file_path, encodings=None, separators=None, sample_bytes: int = SNIFF_SAMPLE_BYTES) -> dict:
+    """
+    Décode un échantillon borné du fichier une seule fois et en déduit le dialecte.
+    L'échantillon est celui de FileProbe: un second appel sur le même fichier ne relit rien.
+    Returns {'encoding', 'sep', 'quotechar', 'n_columns', 'confidence', 'encoding_tier'}.
+    """
+    probe = FileProbe.get(file_path) if sample_bytes == SNIFF_SAMPLE_BYTES else FileProbe(file_path, sample_bytes)
+    return probe.sniff(encodings, separators)
+
+
+def _dialect_from_sample(raw: bytes, truncated: bool, encodings: list[str], separators: list[str]) -> tuple[dict, str]:
+    """Dialecte d'un échantillon brut. Returns (dialect, texte décodé limité aux lignes complètes)."""
+    encoding, encoding_confidence, text, encoding_tier = _decode_sample(raw, encodings)
+    # Ne garder que des lignes complètes si l'échantillon a été tronqué
+    if truncated and '\n' in text:
+        text = text[:text.rindex('\n') + 1]
+
+    best = None
+    for order, sep in enumerate(separators):
+        score, n_columns = _score_separator(text, sep)
+        # Égalité à 1% près: plus de colonnes, puis ordre de la config
+        key = (round(score, 2), n_columns, -order)
+        if best is None or key > best[0]:
+            best = (key, sep, score, n_columns)
+    _, sep, score, n_columns = best
+
+    dialect = {
+        'kind': 'csv',
+        'encoding': encoding,
+        'sep': sep,
+        'quotechar': '"',
+        'n_columns': n_columns,
+        'confidence': round(encoding_confidence * min(1.0, score), 3),
+        'encoding_tier': encoding_tier,
+    }
+    return dialect, text
+
+
+# ------------------------------------------------------------------------
+#     FileProbe: tête de fichier lue une fois, partagée par les lecteurs
+# ------------------------------------------------------------------------
+class _MappedReader(io.RawIOBase):
+    """Lecteur binaire avec sa propre position sur une projection mmap partagée."""
+
+    def __init__(self, mapping):
+        self._map = mapping
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = max(0, min(len(buffer), len(self._map) - self._pos))
+        with memoryview(self._map) as view:
+            buffer[:n] = view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._map)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+# Fichiers téléchargés gardés en mémoire (chemin prévu -> octets), voir
+# functions_FTP.SpoolingDownload: lus par les mêmes fonctions que les fichiers sur disque.
+_MEMORY_FILES = {}
+_MEMORY_FILES_LOCK = threading.Lock()
+
+
+def register_memory_file(path, data: bytes) -> None:
+    with _MEMORY_FILES_LOCK:
+        _MEMORY_FILES[os.path.abspath(path)] = data
+
+
+def memory_file(path) -> bytes | None:
+    """Octets d'un fichier gardé en mémoire, None pour un fichier sur disque."""
+    return _MEMORY_FILES.get(os.path.abspath(path))
+
+
+def release_memory_files(paths=None) -> None:
+    """Libère les fichiers en mémoire donnés (tous si paths est None)."""
+    with _MEMORY_FILES_LOCK:
+        if paths is None:
+            _MEMORY_FILES.clear()
+        for path in paths or ():
+            _MEMORY_FILES.pop(os.path.abspath(path), None)
+
+
+def dataset_file_exists(path) -> bool:
+    return memory_file(path) is not None or os.path.isfile(path)
+
+
+def open_dataset_file(path):
+    """Flux binaire sur un fichier, qu'il soit sur disque ou gardé en mémoire."""
+    data = memory_file(path)
+    return io.BytesIO(data) if data is not None else open(path, 'rb')
+
+
+class FileProbe:
+    """
+    Tête d'un fichier lue une seule fois, et constats qui en découlent: dialecte
+    CSV (encodage, séparateur, nombre de colonnes), noms de colonnes, verdict
+    d'entête, premières lignes. Passer par FileProbe.get(): les instances sont
+    partagées (lecteurs, détection d'entête, modales de mapping de la GUI) et
+    mises en cache par (chemin, mtime, taille).
+    Dans un bloc mapped(), le fichier est projeté en mémoire une fois et toutes les
+    tentatives de lecture passent par source() au lieu de le rouvrir. Un fichier
+    gardé en mémoire (register_memory_file) est lu directement depuis ses octets.
+    """
+    HEAD_ROWS = 20          # lignes gardées pour les aperçus
+    MAX_CACHED = 64         # fichiers sondés gardés en mémoire
+
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, path, sample_bytes: int = SNIFF_SAMPLE_BYTES):
+        self.path = str(path)
+        self._resident = memory_file(path)
+        if self._resident is not None:
+            self.raw = self._resident[:sample_bytes]
+            self.size = len(self._resident)
+        else:
+            with open(path, 'rb') as f:
+                self.raw = f.read(sample_bytes)
+                self.size = os.fstat(f.fileno()).st_size
+        self.truncated = len(self.raw) == sample_bytes
+        self.excel_format = _excel_format_from_magic(self.raw[:8])
+        self._dialects = {}
+        self._texts = {}
+        self._columns = {}
+        self._heads = {}
+        self._map = self._resident    # octets en mémoire: lus comme une projection permanente
+        self._map_users = 0
+        self._map_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, path) -> 'FileProbe':
+        data = memory_file(path)
+        if data is not None:
+            key = (os.path.abspath(path), 'memory', id(data), len(data))
+        else:
+            stat = os.stat(path)
+            key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            probe = cls._cache.get(key)
+            if probe is not None:
+                cls._cache.move_to_end(key)
+                return probe
+        probe = cls(path)
+        with cls._lock:
+            cls._cache[key] = probe
+            while len(cls._cache) > cls.MAX_CACHED:
+                cls._cache.popitem(last=False)
+        return probe
+
+    @property
+    def is_excel(self) -> bool:
+        return self.excel_format is not None
+
+    @contextlib.contextmanager
+    def mapped(self):
+        """
+        Projection mmap (lecture seule) du fichier le temps du bloc; les blocs
+        imbriqués ou concurrents partagent la même projection. Sans effet pour les
+        petits fichiers (< MMAP_MIN_BYTES), les fichiers en mémoire, ou si la projection échoue.
+        """
+        if self._resident is not None:
+            yield self
+            return
+        with self._map_lock:
+            if self._map_users == 0 and self.size >= MMAP_MIN_BYTES:
+                try:
+                    with open(self.path, 'rb') as f:
+                        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError) as e:
+                    logger.info(f"Projection mémoire impossible pour {self.path}: {e}")
+            self._map_users += 1
+        try:
+            yield self
+        finally:
+            with self._map_lock:
+                self._map_users -= 1
+                if self._map_users == 0 and self._map is not None:
+                    try:
+                        self._map.close()
+                    except BufferError:
+                        pass    # buffer encore référencé (ex. pyarrow): libéré par le GC
+                    self._map = None
+
+    def buffer(self):
+        """Contenu complet du fichier: la projection si elle est active, sinon une lecture."""
+        if self._map is not None:
+            return self._map
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def source(self):
+        """Entrée pour pd.read_csv: lecteur sur la projection si elle est active, sinon le chemin."""
+        if self._map is None:
+            return self.path
+        return io.BufferedReader(_MappedReader(self._map))
+
+    def arrow_source(self):
+        """Entrée pour pyarrow.csv: buffer sans copie sur la projection si elle est active, sinon le chemin."""
+        if self._map is None:
+            return self.path
+        import pyarrow as pa
+        return pa.BufferReader(pa.py_buffer(self._map))
+
+    def sniff(self, encodings=None, separators=None) -> dict:
+        """Dialecte CSV de l'échantillon (calculé une fois par liste d'encodages/séparateurs)."""
+        key = (tuple(encodings or DEFAULT_ENCODINGS), tuple(separators or DEFAULT_SEPARATORS))
+        if key not in self._dialects:
+            dialect, text = _dialect_from_sample(self.raw, self.truncated, list(key[0]), list(key[1]))
+            self._texts.setdefault(dialect['encoding'], text)
+            self._dialects[key] = dialect
+        return dict(self._dialects[key])
+
+    def text(self, encoding: str) -> str:
+        """Échantillon décodé avec cet encodage, limité aux lignes complètes."""
+        if encoding not in self._texts:
+            text = self.raw.decode(encoding, errors='replace')
+            if self.truncated and '\n' in text:
+                text = text[:text.rindex('\n') + 1]
+            self._texts[encoding] = text
+        return self._texts[encoding]
+
+    def parse_head(self, encoding: str, sep: str, header='infer', nrows=None, **kwargs) -> pd.DataFrame:
+        """Premières lignes parsées depuis l'échantillon, sans rouvrir le fichier."""
+        return pd.read_csv(io.StringIO(self.text(encoding)), sep=sep, header=header, nrows=nrows, **kwargs)
+
+    def columns(self, dialect: dict, header='infer') -> list:
+        """Noms de colonnes que pd.read_csv donnerait sur le fichier avec ce dialecte."""
+        key = (dialect['encoding'], dialect['sep'], dialect.get('quotechar', '"'), header)
+        if key not in self._columns:
+            if self.truncated and '\n' not in self.text(dialect['encoding']):
+                # Entête plus longue que l'échantillon: lecture directe de la première ligne
+                head = pd.read_csv(self.source(), nrows=0, encoding=dialect['encoding'], sep=dialect['sep'],
+                                   quotechar=dialect.get('quotechar', '"'), header=header)
+            else:
+                head = self.parse_head(dialect['encoding'], dialect['sep'], header=header, nrows=0,
+                                       quotechar=dialect.get('quotechar', '"'))
+            self._columns[key] = list(head.columns)
+        return list(self._columns[key])
+
+    def head(self, header='infer') -> pd.DataFrame:
+        """
+        Premières lignes du fichier (CSV ou Excel) telles que read_dataset_file les
+        lirait; utilisé par les aperçus et la validation des mappings.
+        """
+        if header not in self._heads:
+            self._heads[header] = self._read_head(header)
+        return self._heads[header].copy()
+
+    def _read_head(self, header) -> pd.DataFrame:
+        try:
+            if self.is_excel:
+                # Générateur fermé tout de suite: classeur et fichier relâchés (sinon verrouillés sous Windows)
+                with contextlib.closing(iter_excel_chunks(self.path, chunk_rows=self.HEAD_ROWS)) as chunks:
+                    df = next(chunks)
+                df.attrs.pop('dialect', None)
+                return df.head(self.HEAD_ROWS)
+            encodings, separators = load_encoding_sep_config()
+            dialect = self.sniff(encodings, separators)
+            is_nty_file = _is_nty_file(self.path)
+            if is_nty_file:
+                dialect['sep'] = ';'
+            if dialect['confidence'] >= SNIFF_MIN_CONFIDENCE:
+                kwargs, _, _ = _csv_read_plan(self.path, dialect, header=header, is_nty_file=is_nty_file)
+                kwargs.pop('encoding')
+                df = pd.read_csv(io.StringIO(self.text(dialect['encoding'])), nrows=self.HEAD_ROWS, **kwargs)
+                if _is_valid_csv_frame(df, dialect['sep'], is_nty_file=is_nty_file)[0]:
+                    return df
+        except Exception as e:
+            logger.info(f"Aperçu depuis l'échantillon impossible pour {self.path}: {str(e)[:80]}")
+        # Dialecte incertain: même chemin que la lecture complète
+        return read_dataset_file(self.path, header=header)['dataset'].head(self.HEAD_ROWS)
+
+
+def _is_valid_csv_frame(df: pd.DataFrame, sep: str, is_nty_file: bool = False, min_columns: int = 2) -> tuple[bool, str]:
+    """Vérifie qu'une lecture CSV a produit des données exploitables (bon séparateur)."""
+    if df is None or df.shape[1] < min_columns or df.shape[0] <= 1:
+        return False, f"insufficient data: shape={df.shape if df is not None else 'None'}"
+    # Skip validation for NTY files as they may have complex data
+    if is_nty_file:
+        return True, ''
+    first_few_values = [str(df.iloc[i, 0]) for i in range(1, min(4, df.shape[0]))]
+    for sample_val in first_few_values:
+        # If we're using space as separator but data contains semicolons, reject this
+        if sep == ' ' and sample_val.count(';') >= 2:
+            return False, f"space sep with semicolons: '{sample_val[:30]}...'"
+        # If we're using comma as separator but data contains semicolons, be suspicious
+        if sep == ',' and sample_val.count(';') >= 3:
+            return False, f"comma sep with many semicolons: '{sample_val[:30]}...'"
+        # If we're using any separator but the first column contains the expected separator, reject
+        if sep != ';' and sample_val.count(';') >= 2:
+            return False, f"non-semicolon sep with semicolons: '{sample_val[:30]}...'"
+    return True, ''
+
+
+def _csv_read_plan(file_path, dialect: dict, usecols=None, header='infer', is_nty_file: bool = False,
+                   projection: dict | None = None) -> tuple[dict, list | None, dict | None]:
+    """
+    Arguments pd.read_csv pour un dialecte détecté; avec un plan de projection,
+    usecols est réduit aux colonnes référence/quantité.
+    Returns (kwargs, names imposés ou None, projection résolue ou None).
+    """
+    kwargs = dict(encoding=dialect['encoding'], sep=dialect['sep'], quotechar=dialect.get('quotechar', '"'),
+                  header=header)
+    names = None
+    if header is None and dialect.get('n_columns'):
+        names = list(range(dialect['n_columns']))
+        kwargs['names'] = names
+    resolved = None
+    if projection is not None:
+        columns = names if names is not None else FileProbe.get(file_path).columns(dialect, header=header)
+        resolved = resolve_projection(projection, columns)
+        usecols = resolved['positions']
+    kwargs['usecols'] = usecols
+    if is_nty_file:
+        # NTY: nombre de champs irrégulier, lignes en trop ignorées
+        kwargs.update(on_bad_lines='skip', engine='python')
+    elif names is not None:
+        kwargs['on_bad_lines'] = 'warn'
+    return kwargs, names, resolved
+
+
+def _normalize_ragged_rows(data, dialect: dict) -> tuple[bytes | None, int | None, int]:
+    """
+    Pré-passe des flux à nombre de champs irrégulier (option ragged_rows): les
+    séparateurs sont comptés par ligne sur les octets (numpy, sans décodage), puis
+    les lignes courtes sont complétées et les lignes longues tronquées au nombre
+    de champs modal, pour une lecture par le moteur C ou Arrow.
+    Returns (octets corrigés ou None si aucune ligne n'est à corriger, nombre de
+    champs, lignes corrigées); nombre de champs None si la pré-passe ne s'applique
+    pas (champs entre guillemets, séparateur ou encodage multi-octets).
+    """
+    try:
+        sep = dialect['sep'].encode(dialect['encoding'])
+        quote = dialect.get('quotechar', '"').encode(dialect['encoding'])
+    except (UnicodeEncodeError, LookupError):
+        return None, None, 0
+    if len(sep) != 1 or len(quote) != 1 or dialect['encoding'].lower().replace('_', '-').startswith('utf-16'):
+        return None, None, 0
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if len(arr) == 0 or (arr == quote[0]).any():
+        return None, None, 0
+
+    ends = np.flatnonzero(arr == 0x0A)
+    if len(ends) == 0 or ends[-1] != len(arr) - 1:
+        ends = np.append(ends, len(arr))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    sep_positions = np.flatnonzero(arr == sep[0])
+    n_fields = np.bincount(np.searchsorted(ends, sep_positions), minlength=len(ends)) + 1
+    # Fins de ligne \r\n: les champs sont complétés ou coupés avant le \r
+    line_ends = ends - ((arr[np.maximum(ends - 1, 0)] == 0x0D) & (ends > starts))
+    filled = line_ends > starts
+    if not filled.any():
+        return None, None, 0
+    modal = int(np.bincount(n_fields[filled]).argmax())
+    ragged = np.flatnonzero(filled & (n_fields != modal))
+    del arr
+    if len(ragged) == 0:
+        return None, modal, 0
+
+    pieces, pos = [], 0
+    for i in ragged:
+        start, end = int(starts[i]), int(line_ends[i])
+        pieces.append(data[pos:start])
+        if n_fields[i] < modal:
+            pieces.append(data[start:end] + sep * int(modal - n_fields[i]))
+        else:
+            first_sep = int(np.searchsorted(sep_positions, start))
+            pieces.append(data[start:int(sep_positions[first_sep + modal - 1])])
+        pos = end
+    pieces.append(data[pos:])
+    return b''.join(pieces), modal, len(ragged)
+
+
+def _ragged_rows_input(file_path, dialect: dict, header='infer') -> tuple[bytes | None, dict, bool]:
+    """
+    Pré-passe ragged_rows avant une lecture.
+    Returns (octets corrigés ou None pour lire le fichier tel quel, dialecte avec le
+    nombre de champs modal, True si la pré-passe ne s'applique pas et que les
+    lignes en trop doivent être ignorées par le moteur C).
+    """
+    data, n_fields, n_fixed = _normalize_ragged_rows(FileProbe.get(file_path).buffer(), dialect)
+    if n_fields is None:
+        logger.info(f"Pré-passe ragged_rows non applicable à {Path(file_path).name}, lignes en trop ignorées")
+        return None, dialect, True
+    if n_fixed:
+        logger.info(f"✂️ {n_fixed} lignes ramenées à {n_fields} champs dans {Path(file_path).name}")
+    if header is None:
+        dialect = {**dialect, 'n_columns': n_fields}
+    return data, dialect, False
+
+
+def _read_csv_with_dialect(file_path, dialect: dict, usecols=None, header='infer', is_nty_file: bool = False,
+                           projection: dict | None = None, backend: str = 'pandas',
+                           ragged_rows: bool = False) -> pd.DataFrame:
+    """
+    Une seule lecture complète du fichier avec le dialecte détecté.
+    Avec un plan de projection, seules les colonnes référence/quantité sont lues.
+    backend: 'pandas' (moteur C) ou 'pyarrow' (lecture multithread par blocs).
+    ragged_rows: lignes au nombre de champs irrégulier ramenées au nombre modal
+        (_normalize_ragged_rows) avant la lecture.
+    """
+    data, skip_bad_lines = None, False
+    if ragged_rows:
+        data, dialect, skip_bad_lines = _ragged_rows_input(file_path, dialect, header)
+    kwargs, names, resolved = _csv_read_plan(file_path, dialect, usecols=usecols, header=header,
+                                             is_nty_file=is_nty_file, projection=projection)
+    if skip_bad_lines:
+        kwargs['on_bad_lines'] = 'skip'
+
+    df = None
+    if backend == 'pyarrow':
+        try:
+            df = _read_csv_pyarrow(file_path, dialect, header=header, names=names, usecols=kwargs['usecols'],
+                                   is_nty_file=is_nty_file, data=data)
+        except ImportError:
+            logger.warning("-- ⚠️ -- pyarrow n'est pas installé, lecture avec pandas")
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            logger.warning(f"-- ⚠️ -- Lecture pyarrow échouée pour {Path(file_path).name}, repli pandas: {str(e)[:80]}")
+    if df is None:
+        df = pd.read_csv(io.BytesIO(data) if data is not None else FileProbe.get(file_path).source(), **kwargs)
+    if resolved is not None:
+        df.attrs['projection'] = {'ref': resolved['ref'], 'qte': resolved['qte']}
+    return df
+
+
+ARROW_BLOCK_SIZE = 4 * 1024 * 1024    # taille des blocs parsés en parallèle par pyarrow
+
+
+def _read_csv_pyarrow(file_path, dialect: dict, header='infer', names=None, usecols=None,
+                      is_nty_file: bool = False, data: bytes | None = None) -> pd.DataFrame:
+    """
+    Lecture CSV avec pyarrow.csv (blocs parsés en parallèle). Toutes les colonnes
+    sont lues en texte puis typées comme pandas (int64, sinon float64, sinon texte),
+    ce qui évite l'inférence de dates propre à Arrow. Les noms de colonnes sont
+    ceux que pandas produirait ('Unnamed: i', doublons suffixés).
+    data: contenu déjà corrigé (ragged_rows) à lire à la place du fichier.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+
+    encoding, sep, quotechar = dialect['encoding'], dialect['sep'], dialect.get('quotechar', '"')
+    columns = names if names is not None else FileProbe.get(file_path).columns(dialect, header=header)
+    synthetic = [f"c{i}" for i in range(len(columns))]
+    if usecols is None:
+        include = synthetic
+    else:
+        include = [synthetic[col if isinstance(col, int) else columns.index(col)] for col in usecols]
+
+    def _invalid_row(row):
+        # NTY: lignes irrégulières ignorées; sinon erreur -> repli pandas (qui complète les lignes courtes)
+        return 'skip' if is_nty_file else 'error'
+
+    try:
+        table = pa_csv.read_csv(
+            pa.BufferReader(data) if data is not None else FileProbe.get(file_path).arrow_source(),
+            read_options=pa_csv.ReadOptions(encoding=encoding, use_threads=True, block_size=ARROW_BLOCK_SIZE,
+                                            column_names=synthetic, skip_rows=0 if header is None else 1),
+            parse_options=pa_csv.ParseOptions(delimiter=sep, quote_char=quotechar, invalid_row_handler=_invalid_row),
+            convert_options=pa_csv.ConvertOptions(include_columns=include, strings_can_be_null=True,
+                                                  column_types={name: pa.string() for name in include}),
+        )
+    except pa.ArrowInvalid as e:
+        if 'invalid UTF8' in str(e):
+            # Même traitement que pandas: l'appelant relit une fois en encodage 8 bits
+            raise UnicodeDecodeError(encoding, b'', 0, 0, str(e)) from e
+        raise
+    arrays = []
+    for column in table.columns:
+        for target in (pa.int64(), pa.float64()):
+            try:
+                column = pc.cast(column, target)
+                break
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+        arrays.append(column)
+    df = pa.table(arrays, names=table.column_names).to_pandas()
+    df.columns = [columns[int(name[1:])] for name in table.column_names]
+    return df
+
+
+def _is_nty_file(file_path) -> bool:
+    """Check if this is likely an NTY file (contains specific patterns)."""
+    file_name = Path(file_path).name.upper()
+    return 'NTY' in file_name or 'AJS-OFERTA' in file_name
+
+
+def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, separators=None, projection=None,
+                    backend: str = 'pandas', ragged_rows: bool = False):
+    """
+    Lecture CSV en une passe: le dialecte est détecté sur un échantillon puis le
+    fichier est lu une seule fois. Si cette lecture échoue, on retombe sur la
+    recherche exhaustive encodage x séparateur (sans projection).
+    ragged_rows (option d'entité): pré-passe des lignes irrégulières au lieu de
+    l'ancien traitement NTY (moteur python) déclenché par le nom du fichier.
+    Returns (df, encoding, sep, dialect) — dialect contient aussi 'confidence'.
+    """
+    if encodings is None:
+        encodings = DEFAULT_ENCODINGS
+    if separators is None:
+        separators = DEFAULT_SEPARATORS
+
+    is_nty_file = _is_nty_file(file_path) and not ragged_rows
     if is_nty_file:
+        logger.info(f"🔍 Detected NTY file pattern in: {Path(file_path).name}")
         separators = [';'] + [sep for sep in separators if sep != ';']
-        logger.info("📌 NTY file detected - prioritizing semicolon separator")
-    
-    successful_attempts = []
+
+    dialect = None
+    try:
+        dialect = sniff_csv_dialect(file_path, encodings=encodings, separators=separators)
+        if is_nty_file:
+            dialect['sep'] = ';'
+        logger.info(f"🔍 Dialecte détecté: encoding='{dialect['encoding']}' ({dialect['encoding_tier']}), "
+                    f"separator='{dialect['sep']}', colonnes={dialect['n_columns']}, confiance={dialect['confidence']:.2f}")
+    except Exception as e:
+        logger.warning(f"Échec de la détection du dialecte pour {file_path}: {e}")
+
+    if dialect is not None and dialect['confidence'] >= SNIFF_MIN_CONFIDENCE:
+        try:
+            try:
+                df = _read_csv_with_dialect(file_path, dialect, usecols=usecols, header=header,
+                                            is_nty_file=is_nty_file, projection=projection, backend=backend,
+                                            ragged_rows=ragged_rows)
+            except UnicodeDecodeError:
+                # Échantillon ASCII mais octets 8 bits plus loin: une seule relecture en encodage 8 bits
+                dialect['encoding'] = next((enc for enc in encodings if not enc.lower().startswith('utf')), 'cp1252')
+                logger.info(f"🔁 Octets non UTF-8 après l'échantillon, relecture en '{dialect['encoding']}'")
+                df = _read_csv_with_dialect(file_path, dialect, usecols=usecols, header=header,
+                                            is_nty_file=is_nty_file, projection=projection, backend=backend,
+                                            ragged_rows=ragged_rows)
+            min_columns = 8 if is_nty_file and projection is None else 2
+            is_valid, reason = _is_valid_csv_frame(df, dialect['sep'], is_nty_file=is_nty_file, min_columns=min_columns)
+            if is_valid:
+                logger.info(f"✅ Successfully read file with encoding='{dialect['encoding']}', separator='{dialect['sep']}', shape={df.shape}")
+                return df, dialect['encoding'], dialect['sep'], dialect
+            logger.warning(f"Dialecte détecté rejeté pour {file_path}: {reason}")
+        except Exception as e:
+            logger.warning(f"Lecture avec le dialecte détecté échouée pour {file_path}: {str(e)[:80]}")
+
+    # Repli: recherche exhaustive, en commençant par le dialecte détecté
+    if dialect is not None:
+        encodings = [dialect['encoding']] + [enc for enc in encodings if enc != dialect['encoding']]
+        if not is_nty_file:
+            separators = [dialect['sep']] + [sep for sep in separators if sep != dialect['sep']]
+    df, encoding, sep = _brute_force_read_csv(file_path, usecols=usecols, header=header, encodings=encodings,
+                                             separators=separators, is_nty_file=is_nty_file)
+    fallback_dialect = {'kind': 'csv', 'encoding': encoding, 'sep': sep, 'quotechar': '"',
+                        'n_columns': df.shape[1] if usecols is None else None, 'confidence': 0.0}
+    return df, encoding, sep, fallback_dialect
+
+
+def _brute_force_read_csv(file_path, usecols=None, header='infer', encodings=None, separators=None, is_nty_file=False):
+    """Recherche exhaustive encodage x séparateur (ancien comportement, utilisé en repli)."""
     failed_attempts = []
+    probe = FileProbe.get(file_path)    # projection mémoire partagée entre les tentatives
     
     for encoding in encodings:
         for sep in separators:
@@ -282,7 +1032,7 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
                     try:
                         # For NTY files, use more lenient parsing
                         df = pd.read_csv(
-                            file_path, 
+                            probe.source(), 
                             encoding=encoding, 
                             sep=sep, 
                             usecols=usecols, 
@@ -302,7 +1052,7 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
                         # Try older pandas syntax if on_bad_lines not supported
                         try:
                             df = pd.read_csv(
-                                file_path, 
+                                probe.source(), 
                                 encoding=encoding, 
                                 sep=sep, 
                                 usecols=usecols, 
@@ -322,12 +1072,12 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
                     # For no-header files, try a more flexible approach
                     try:
                         # First, try to read a sample to understand the structure
-                        sample_df = pd.read_csv(file_path, encoding=encoding, sep=sep, header=None, nrows=5)
+                        sample_df = probe.parse_head(encoding, sep, header=None, nrows=5)
                         expected_cols = sample_df.shape[1]
                         
                         # Now read the full file with the detected column count
                         df = pd.read_csv(
-                            file_path, 
+                            probe.source(), 
                             encoding=encoding, 
                             sep=sep, 
                             usecols=usecols, 
@@ -339,7 +1089,7 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
                         # Fallback: try the older pandas approach
                         try:
                             df = pd.read_csv(
-                                file_path, 
+                                probe.source(), 
                                 encoding=encoding, 
                                 sep=sep, 
                                 usecols=usecols, 
@@ -349,42 +1099,19 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
                             )
                         except TypeError:
                             # If both approaches fail, read normally
-                            df = pd.read_csv(file_path, encoding=encoding, sep=sep, usecols=usecols, header=header)
+                            df = pd.read_csv(probe.source(), encoding=encoding, sep=sep, usecols=usecols, header=header)
                 else:
-                    df = pd.read_csv(file_path, encoding=encoding, sep=sep, usecols=usecols, header=header)
-                    
-                if df is not None and df.shape[1] >= 2 and df.shape[0] > 1:
-                    # Enhanced validation: check if we have reasonable data separation
-                    first_few_values = [str(df.iloc[i, 0]) if i < df.shape[0] else "" for i in range(1, min(4, df.shape[0]))]
-                    
-                    # Skip validation for NTY files as they may have complex data
-                    if not is_nty_file:
-                        # Check for common separator mismatches
-                        for sample_val in first_few_values:
-                            # If we're using space as separator but data contains semicolons, reject this
-                            if sep == ' ' and ';' in sample_val and sample_val.count(';') >= 2:
-                                failed_attempts.append((encoding, sep, f"space sep with semicolons: '{sample_val[:30]}...'"))
-                                raise ValueError("Wrong separator detected")
-                            
-                            # If we're using comma as separator but data contains semicolons, be suspicious
-                            if sep == ',' and ';' in sample_val and sample_val.count(';') >= 3:
-                                failed_attempts.append((encoding, sep, f"comma sep with many semicolons: '{sample_val[:30]}...'"))
-                                raise ValueError("Wrong separator detected")
-                            
-                            # If we're using any separator but the first column contains the expected separator, reject
-                            if sep != ';' and ';' in sample_val and sample_val.count(';') >= 2:
-                                failed_attempts.append((encoding, sep, f"non-semicolon sep with semicolons: '{sample_val[:30]}...'"))
-                                raise ValueError("Wrong separator detected")
+                    df = pd.read_csv(probe.source(), encoding=encoding, sep=sep, usecols=usecols, header=header)
                     
+                is_valid, reason = _is_valid_csv_frame(df, sep, is_nty_file=is_nty_file)
+                if is_valid:
                     logger.info(f"✅ Successfully read file with encoding='{encoding}', separator='{sep}', shape={df.shape}")
                     return df, encoding, sep
-                else:
-                    failed_attempts.append((encoding, sep, f"insufficient data: shape={df.shape if df is not None else 'None'}"))
+                failed_attempts.append((encoding, sep, reason))
             except UnicodeDecodeError as e:
                 failed_attempts.append((encoding, sep, f"Unicode error: {str(e)[:50]}..."))
             except Exception as e:
-                if "Wrong separator detected" not in str(e):
-                    failed_attempts.append((encoding, sep, f"Error: {str(e)[:50]}..."))
+                failed_attempts.append((encoding, sep, f"Error: {str(e)[:50]}..."))
     
     # Only log warnings if we couldn't read the file at all
     logger.error(f"❌ Failed to read {file_path} with any encoding/separator combination")
@@ -397,69 +1124,496 @@ def robust_read_csv(file_path, usecols=None, header='infer', encodings=None, sep
     raise ValueError(f"Could not read {file_path} with tried encodings: {encodings}")
 
 
+def load_encoding_sep_config(yaml_encoding_sep_path: Path = Path(YAML_ENCODING_SEP_FILE_PATH)) -> tuple[list, list]:
+    """Encodages et séparateurs à tester, d'après config_encodings_separateurs.yaml."""
+    yaml_info = read_yaml_file(yaml_encoding_sep_path)
+    return yaml_info['encodings'], yaml_info['separators']
+
+
 def read_csv_file_checking_encodings_sep(
     file_path: str,
     usecols=None,
     yaml_encoding_sep_path: Path = Path(YAML_ENCODING_SEP_FILE_PATH),
-    header='infer'
-    ) -> tuple[pd.DataFrame, str, str]:
+    header='infer',
+    projection=None,
+    backend: str = 'pandas',
+    ragged_rows: bool = False
+    ) -> tuple[pd.DataFrame, str, str, dict]:
     """
-    Reads a CSV file, trying different encodings and separators. Accepts header argument for pandas.
+    Reads a CSV file, detecting encoding and separator. Accepts header argument for pandas.
+    Returns (df, encoding, sep, dialect).
     """
-    yaml_info = read_yaml_file(yaml_encoding_sep_path)
-    encodings, separators = yaml_info['encodings'], yaml_info['separators']
+    encodings, separators = load_encoding_sep_config(yaml_encoding_sep_path)
     # Use robust_read_csv for better detection
-    return robust_read_csv(file_path, usecols=usecols, header=header, encodings=encodings, separators=separators)
+    return robust_read_csv(file_path, usecols=usecols, header=header, encodings=encodings, separators=separators,
+                           projection=projection, backend=backend, ragged_rows=ragged_rows)
+
+
+# ------------------------------------------------------------------------------
+#        Projection des colonnes (référence, quantité) d'après header_mappings
+# ------------------------------------------------------------------------------
+def build_projection_plan(nom_reference, quantite_stock, no_header: bool = False) -> dict:
+    """
+    Plan de projection pour read_dataset_file: les deux mappings (nom ou index
+    0-based, comme dans header_mappings.yaml) des colonnes à lire.
+    """
+    return {'ref': nom_reference, 'qte': quantite_stock, 'no_header': bool(no_header)}
+
+
+def resolve_projection(projection: dict, columns: list) -> dict:
+    """
+    Résout le plan sur les colonnes réelles du fichier (mêmes règles que
+    get_column_by_mapping). Returns {'ref', 'qte', 'positions'}.
+    """
+    header_df = pd.DataFrame(columns=columns)
+    ref_col = get_column_by_mapping(header_df, projection['ref'])
+    qty_col = get_column_by_mapping(header_df, projection['qte'])
+    columns = list(columns)
+    positions = sorted({columns.index(ref_col), columns.index(qty_col)})
+    return {'ref': ref_col, 'qte': qty_col, 'positions': positions}
+
+
+def _apply_projection(df: pd.DataFrame, projection: dict | None) -> tuple[pd.DataFrame, dict | None]:
+    """Ne garde que [ref, qte] (dans cet ordre) et renvoie les noms réels des colonnes."""
+    if projection is None or (df.empty and len(df.columns) == 0):
+        return df, None
+    resolved = df.attrs.get('projection')
+    if resolved is None:
+        # Lecture sans usecols (repli exhaustif): projection après coup
+        resolved = {'ref': get_column_by_mapping(df, projection['ref']),
+                    'qte': get_column_by_mapping(df, projection['qte'])}
+    columns = [resolved['ref']] if resolved['ref'] == resolved['qte'] else [resolved['ref'], resolved['qte']]
+    projected = df[columns]
+    projected.attrs['projection'] = resolved
+    return projected, resolved
+
+
+# ------------------------------------------------------------------------------
+#        Lecture Excel en une passe (flux read-only, entête jugée au vol)
+# ------------------------------------------------------------------------------
+EXCEL_HEADER_PROBE_ROWS = 5     # entête + 4 lignes du flux pour juger l'entête (ancien nrows=4)
+
+
+def _excel_format(file_name) -> str | None:
+    """Format réel d'après les octets magiques: 'xlsx', 'xls' ou None (ex. CSV renommé en .xlsx)."""
+    return FileProbe.get(file_name).excel_format
+
+
+def _excel_format_from_magic(magic: bytes) -> str | None:
+    if magic.startswith(b'PK\x03\x04'):
+        return 'xlsx'
+    if magic.startswith(b'\xd0\xcf\x11\xe0'):
+        return 'xls'
+    return None
+
+
+def _xls_cell_value(cell, datemode):
+    """Valeur d'une cellule xlrd, dates converties comme le fait pandas."""
+    import xlrd
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return float('nan')
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    return cell.value
+
+
+def _iter_excel_rows(file_name, fmt: str):
+    """Lignes brutes (tuples) de la première feuille, lues en flux sans charger le classeur."""
+    if fmt == 'xlsx':
+        import openpyxl
+        # Flux binaire: openpyxl refuserait un nom en .xls contenant en réalité du xlsx
+        with open_dataset_file(file_name) as stream:
+            wb = openpyxl.load_workbook(stream, read_only=True, data_only=True, keep_links=False)
+            try:
+                yield from wb.worksheets[0].iter_rows(values_only=True)
+            finally:
+                wb.close()
+    else:
+        import xlrd
+        data = memory_file(file_name)
+        book = (xlrd.open_workbook(file_contents=data, on_demand=True) if data is not None
+                else xlrd.open_workbook(file_name, on_demand=True))
+        try:
+            sheet = book.sheet_by_index(0)
+            for i in range(sheet.nrows):
+                yield tuple(_xls_cell_value(cell, book.datemode) for cell in sheet.row(i))
+        finally:
+            book.release_resources()
+
+
+def _excel_cell(value):
+    """Cellule convertie comme pd.read_excel: vide -> '', flottant entier -> int."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _excel_row(raw) -> list:
+    """Ligne convertie, cellules vides de fin retirées (une ligne vide donne [])."""
+    row = [_excel_cell(value) for value in raw]
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+def _excel_column_names(header_row: list, width: int) -> list:
+    """Noms de colonnes tels que pandas les produit: 'Unnamed: i' et doublons suffixés '.1'."""
+    names = [f"Unnamed: {i}" if i >= len(header_row) or header_row[i] == '' else header_row[i]
+             for i in range(width)]
+    counts = {}
+    for i, col in enumerate(names):
+        cur_count = counts.get(col, 0)
+        while cur_count > 0:
+            counts[col] = cur_count + 1
+            col = f"{col}.{cur_count}"
+            cur_count = counts.get(col, 0)
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+
+def read_excel_streaming(file_name: str, usecols=None, projection=None,
+                         header_option='detect') -> tuple[pd.DataFrame, dict]:
+    """
+    Lecture Excel en une seule passe sur la première feuille (openpyxl read-only
+    pour .xlsx, xlrd pour .xls). L'entête est jugée sur les premières lignes du
+    même flux (has_valid_header) et seules les colonnes utiles (projection ou
+    usecols) sont matérialisées. Types et noms de colonnes identiques à pd.read_excel.
+    header_option: 'detect', ou 0 / None (valeur connue, ex. dialecte en cache).
+    Returns (df, dialect).
+    """
+    df = next(iter_excel_chunks(file_name, usecols=usecols, projection=projection, header_option=header_option))
+    return df, df.attrs.pop('dialect')
+
+
+def iter_excel_chunks(file_name: str, usecols=None, projection=None, header_option='detect', chunk_rows=None):
+    """
+    Même flux que read_excel_streaming, découpé en DataFrames de chunk_rows lignes
+    (None: un seul DataFrame). Chaque chunk porte attrs['dialect'] et, avec une
+    projection, attrs['projection'].
+    """
+    from pandas.io.parsers import TextParser
+
+    fmt = _excel_format(file_name)
+    if fmt is None:
+        raise ValueError(f"Contenu non Excel: {file_name}")
+    rows = _iter_excel_rows(file_name, fmt)
+    try:
+        probe = list(itertools.islice(rows, EXCEL_HEADER_PROBE_ROWS))
+        probe_rows = [_excel_row(raw) for raw in probe]
+        width = max((len(row) for row in probe_rows), default=0)
+        header_row = probe_rows[0] if probe_rows else []
+        if header_option == 'detect':
+            header_names = _excel_column_names(header_row, width)
+            header_option = 0 if header_names and has_valid_header(pd.DataFrame(columns=header_names)) else None
+        if header_option == 0:
+            names = _excel_column_names(header_row, width)
+            data = probe[1:]
+        else:
+            header_row = []
+            names = list(range(width))
+            data = probe
+
+        resolved, positions = None, None
+        if projection is not None:
+            resolved = resolve_projection(projection, names)
+            positions = resolved['positions']
+        elif usecols is not None:
+            positions = [col if isinstance(col, int) else names.index(col) for col in usecols]
+        dialect = {'kind': 'excel', 'engine': 'openpyxl' if fmt == 'xlsx' else 'xlrd', 'header': header_option,
+                   'confidence': 1.0}
+
+        def _frame(kept: list, width: int) -> pd.DataFrame:
+            if positions is None:
+                columns = _excel_column_names(header_row, width) if header_option == 0 else list(range(width))
+                for row in kept:
+                    if len(row) < width:
+                        row.extend([''] * (width - len(row)))
+            else:
+                columns = [names[i] for i in positions]
+            df = (TextParser(kept, names=columns, header=None, skip_blank_lines=False).read() if kept
+                  else pd.DataFrame(columns=columns))
+            if resolved is not None:
+                df.attrs['projection'] = {'ref': resolved['ref'], 'qte': resolved['qte']}
+            df.attrs['dialect'] = dict(dialect)
+            return df
+
+        kept, blank_run, emitted = [], 0, False
+        for raw in itertools.chain(data, rows):
+            if positions is None:
+                row = _excel_row(raw)
+                if not row:
+                    blank_run += 1
+                    continue
+                width = max(width, len(row))
+            else:
+                if all(value is None or value == '' for value in raw):
+                    blank_run += 1
+                    continue
+                row = [_excel_cell(raw[i]) if i < len(raw) else '' for i in positions]
+            # Lignes vides intercalées conservées (NaN), celles de fin de feuille ignorées, comme pandas
+            kept.extend([''] * (width if positions is None else len(positions)) for _ in range(blank_run))
+            blank_run = 0
+            kept.append(row)
+            if chunk_rows and len(kept) >= chunk_rows:
+                yield _frame(kept, width)
+                kept, emitted = [], True
+        if kept or not emitted:
+            yield _frame(kept, width)
+    finally:
+        rows.close()
+
+
+# ------------------------------------------------------------------------------
+#            Cache persistant des dialectes (par entité + signature)
+# ------------------------------------------------------------------------------
+_DIALECT_CACHE = None
+_DIALECT_CACHE_PERSIST = True
+_DIALECT_CACHE_LOCK = threading.Lock()    # lectures multi_file concurrentes
+
+
+def file_signature(file_name: str, head_bytes: int = 1024) -> str:
+    """
+    Signature peu coûteuse d'un fichier: extension + hash des premiers octets.
+    Pour un CSV on ne hashe que la première ligne (l'entête, stable d'un jour à
+    l'autre); pour un Excel les octets magiques du conteneur.
+    """
+    ext = Path(file_name).suffix.lower()
+    head = FileProbe.get(file_name).raw[:head_bytes]
+    if ext in {'.xls', '.xlsx'}:
+        head = head[:8]
+    elif b'\n' in head:
+        head = head[:head.index(b'\n')]
+    return f"{ext}:{hashlib.sha1(head).hexdigest()[:16]}"
+
+
+def load_dialect_cache() -> dict:
+    global _DIALECT_CACHE
+    if _DIALECT_CACHE is None:
+        data = load_yaml_config(DIALECT_CACHE_PATH) if Path(DIALECT_CACHE_PATH).is_file() else None
+        _DIALECT_CACHE = data if isinstance(data, dict) else {}
+    return _DIALECT_CACHE
+
+
+def get_cached_dialect(entity: str, signature: str) -> dict | None:
+    return load_dialect_cache().get(entity, {}).get(signature)
+
+
+def set_dialect_cache_persistence(enabled: bool) -> None:
+    """
+    Active/désactive l'écriture du cache sur disque. Les workers de lecture
+    parallèle la désactivent: leurs dialectes sont renvoyés au processus
+    principal, seul à écrire le fichier.
+    """
+    global _DIALECT_CACHE_PERSIST
+    _DIALECT_CACHE_PERSIST = enabled
+
+
+def update_dialect_cache(entity: str, signature: str, dialect: dict) -> None:
+    """Enregistre (ou écrase) le dialecte d'une entité et le persiste sur disque."""
+    cache = load_dialect_cache()
+    with _DIALECT_CACHE_LOCK:
+        if cache.get(entity, {}).get(signature) == dialect:
+            return
+        cache.setdefault(entity, {})[signature] = dialect
+        if not _DIALECT_CACHE_PERSIST:
+            return
+        try:
+            Path(DIALECT_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(DIALECT_CACHE_PATH).with_suffix('.tmp')
+            if save_yaml_config(cache, tmp_path):
+                os.replace(tmp_path, DIALECT_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"-- ⚠️ -- Impossible d'enregistrer le cache des dialectes: {e}")
+
+
+def _read_with_cached_dialect(file_name: str, dialect: dict, usecols=None, header='infer', projection=None,
+                              backend: str = 'pandas', ragged_rows: bool = False) -> dict | None:
+    """Une seule lecture ciblée avec le dialecte en cache; None si le dialecte n'est plus valide."""
+    try:
+        if dialect.get('kind') == 'excel':
+            df, _ = read_excel_streaming(file_name, usecols=usecols, projection=projection,
+                                         header_option=dialect.get('header'))
+            if df.shape[1] < 2 or df.shape[0] <= 1:
+                return None
+            return {'dataset': df, 'encoding': '', 'sep': '', 'dialect': dialect}
+        is_nty_file = _is_nty_file(file_name) and not ragged_rows
+        df = _read_csv_with_dialect(file_name, dialect, usecols=usecols, header=header, is_nty_file=is_nty_file,
+                                    projection=projection, backend=backend, ragged_rows=ragged_rows)
+        is_valid, reason = _is_valid_csv_frame(df, dialect['sep'], is_nty_file=is_nty_file,
+                                               min_columns=8 if is_nty_file and projection is None else 2)
+        if not is_valid:
+            logger.info(f"Dialecte en cache rejeté pour {file_name}: {reason}")
+            return None
+        return {'dataset': df, 'encoding': dialect['encoding'], 'sep': dialect['sep'], 'dialect': dialect}
+    except Exception as e:
+        logger.info(f"Dialecte en cache inutilisable pour {file_name}: {str(e)[:80]}")
+        return None
 
 
 # ------------------------------------------------------------------------------
 #                   Open Files of differents formats
 # ------------------------------------------------------------------------------
-def read_dataset_file(file_name: str, usecols=None, header='infer') -> dict:
+def read_dataset_file(file_name: str, usecols=None, header='infer', entity: str | None = None,
+                      projection: dict | None = None, backend: str = 'pandas', ragged_rows: bool = False) -> dict:
     """
     Reads a dataset file with optional usecols and header arguments.
     header: 'infer' (default) for files with header, None for files without header.
+    entity: nom du fournisseur/plateforme; active le cache persistant des dialectes.
+    projection: plan de build_projection_plan(); seules les colonnes référence/quantité
+        sont lues. None (passthrough) lit toutes les colonnes, ex. plateformes réécrites en entier.
+    backend: moteur CSV, 'pandas' ou 'pyarrow' (voir resolve_csv_backend); sans effet sur Excel.
+    ragged_rows: option d'entité pour les flux à nombre de champs irrégulier (ex. NTY).
+    Returns {'dataset', 'encoding', 'sep', 'dialect', 'projection'}; 'dialect' porte aussi la
+    confiance de détection, 'projection' les noms réels {'ref', 'qte'} (None en passthrough).
     """
     logger.info(f"📥 Tentative de lecture du fichier : {file_name}  ...")
 
     try:
-        ext = Path(file_name).suffix.lower()
-        if ext in {'.csv', '.txt'}:
-            df,  encoding, sep = read_csv_file_checking_encodings_sep(file_name, usecols=usecols, header=header)
-            logger.info(f"📄 Fichier lu : {file_name} -- avec ({len(df)} lignes)")
-            return {'dataset':df, 'encoding':encoding, 'sep':sep}
-        
-        elif ext in {'.xls', '.xlsx'}:
-            # Prefer explicit engines and provide CSV fallback if content mismatch
-            engines_to_try = []
-            if ext == '.xlsx':
-                engines_to_try = ['openpyxl', None]  # None lets pandas infer
-            else:
-                engines_to_try = ['xlrd', None]
-            last_error = None
-            for engine in engines_to_try:
-                try:
-                    temp_df = pd.read_excel(file_name, nrows=4, header=0, engine=engine)
-                    header_option = 0 if has_valid_header(temp_df) else None
-                    df = pd.read_excel(file_name, header=header_option, usecols=usecols, engine=engine)
-                    logger.info(f"📄 Fichier lu : {file_name} -- avec ({len(df)} lignes)")
-                    return {'dataset': df, 'encoding': '', 'sep': ''}
-                except Exception as e:
-                    last_error = e
-                    continue
-            # Fallback: some .xlsx are actually CSV; try robust CSV reader
-            try:
-                df, encoding, sep = read_csv_file_checking_encodings_sep(file_name, usecols=usecols, header='infer')
-                logger.warning(f"[WARN] File '{file_name}' has Excel extension but was read as CSV (encoding='{encoding}', sep='{sep}').")
-                return {'dataset': df, 'encoding': encoding, 'sep': sep}
-            except Exception:
-                raise last_error if last_error else ValueError(f"Unsupported Excel file: {file_name}")
-       
-        else:
-            raise ValueError(f"Extension de fichier non supportée: {file_name}")
+        # Fichier projeté en mémoire une fois pour le dialecte en cache, la détection et les replis
+        with FileProbe.get(file_name).mapped():
+            signature = None
+            result = None
+            if entity:
+                signature = file_signature(file_name)
+                cached = get_cached_dialect(entity, signature)
+                if cached:
+                    result = _read_with_cached_dialect(file_name, cached, usecols=usecols, header=header, projection=projection,
+                                                       backend=backend, ragged_rows=ragged_rows)
+                    if result is not None:
+                        logger.info(f"📄 Fichier lu (dialecte en cache, {entity}) : {file_name} -- avec ({len(result['dataset'])} lignes)")
+                    else:
+                        logger.info(f"🔁 Dialecte en cache invalide pour {entity}, nouvelle détection")
+
+            if result is None:
+                result = _detect_and_read_dataset_file(file_name, usecols=usecols, header=header, projection=projection,
+                                                       backend=backend, ragged_rows=ragged_rows)
+                if entity and result['dialect']:
+                    update_dialect_cache(entity, signature, result['dialect'])
+        result['dataset'], result['projection'] = _apply_projection(result['dataset'], projection)
+        return result
     except Exception as e:
         logger.error(f"-- ❌ --  Erreur lors de la lecture de {file_name}: {e}")
-        return {'dataset':pd.DataFrame(), 'encoding':'', 'sep':''}  # Retourne un DataFrame vide en cas d'erreur
+        return {'dataset':pd.DataFrame(), 'encoding':'', 'sep':'', 'dialect':{}, 'projection':None}  # Retourne un DataFrame vide en cas d'erreur
+
+
+def _detect_and_read_dataset_file(file_name: str, usecols=None, header='infer', projection=None,
+                                  backend: str = 'pandas', ragged_rows: bool = False) -> dict:
+    """Détection complète du format (CSV ou Excel) puis lecture."""
+    ext = Path(file_name).suffix.lower()
+    if ext in {'.csv', '.txt'}:
+        df, encoding, sep, dialect = read_csv_file_checking_encodings_sep(file_name, usecols=usecols, header=header,
+                                                                          projection=projection, backend=backend,
+                                                                          ragged_rows=ragged_rows)
+        logger.info(f"📄 Fichier lu : {file_name} -- avec ({len(df)} lignes)")
+        return {'dataset':df, 'encoding':encoding, 'sep':sep, 'dialect':dialect}
+
+    elif ext in {'.xls', '.xlsx'}:
+        # Une seule passe en flux; le format réel (xlsx/xls) est lu dans les octets magiques
+        last_error = None
+        try:
+            df, dialect = read_excel_streaming(file_name, usecols=usecols, projection=projection)
+            logger.info(f"📄 Fichier lu : {file_name} -- avec ({len(df)} lignes)")
+            return {'dataset': df, 'encoding': '', 'sep': '', 'dialect': dialect}
+        except Exception as e:
+            last_error = e
+        # Fallback: some .xlsx are actually CSV; try robust CSV reader
+        try:
+            df, encoding, sep, dialect = read_csv_file_checking_encodings_sep(file_name, usecols=usecols, header='infer')
+            logger.warning(f"[WARN] File '{file_name}' has Excel extension but was read as CSV (encoding='{encoding}', sep='{sep}').")
+            return {'dataset': df, 'encoding': encoding, 'sep': sep, 'dialect': dialect}
+        except Exception:
+            raise last_error if last_error else ValueError(f"Unsupported Excel file: {file_name}")
+
+    else:
+        raise ValueError(f"Extension de fichier non supportée: {file_name}")
+
+
+# ------------------------------------------------------------------------------
+#            Lecture par chunks (mode streaming, mémoire bornée)
+# ------------------------------------------------------------------------------
+def iter_dataset_chunks(file_name: str, projection: dict, chunk_size: int, header='infer',
+                        entity: str | None = None, encoding: str | None = None, ragged_rows: bool = False):
+    """
+    Lit un fichier par chunks de chunk_size lignes, limités aux colonnes du plan
+    de projection. Le dialecte vient du cache (entity) ou d'une détection sur
+    échantillon; chaque chunk porte attrs['projection'] et attrs['dialect'].
+    encoding force l'encodage (relecture après un UnicodeDecodeError en cours de flux).
+    ragged_rows: pré-passe des lignes irrégulières, comme read_dataset_file.
+    Si le dialecte n'est pas fiable, le fichier est lu en entier puis découpé.
+    """
+    ext = Path(file_name).suffix.lower()
+    signature = file_signature(file_name) if entity else None
+    cached = get_cached_dialect(entity, signature) if entity else None
+
+    if ext in {'.xls', '.xlsx'} and _excel_format(file_name) is not None:
+        header_option = cached['header'] if cached and cached.get('kind') == 'excel' else 'detect'
+        dialect = None
+        for chunk in iter_excel_chunks(file_name, projection=projection, header_option=header_option,
+                                       chunk_rows=chunk_size):
+            dialect = chunk.attrs['dialect']
+            yield chunk
+        if entity and dialect and not cached:
+            update_dialect_cache(entity, signature, dialect)
+        return
+
+    dialect = None
+    is_nty_file = _is_nty_file(file_name) and not ragged_rows
+    if ext in {'.csv', '.txt'}:
+        if cached and cached.get('kind') == 'csv':
+            dialect = dict(cached)
+        else:
+            encodings, separators = load_encoding_sep_config()
+            sniffed = sniff_csv_dialect(file_name, encodings=encodings, separators=separators)
+            if sniffed['confidence'] >= SNIFF_MIN_CONFIDENCE:
+                dialect = sniffed
+        if dialect is not None and is_nty_file:
+            dialect['sep'] = ';'
+
+    if dialect is not None:
+        if encoding:
+            dialect['encoding'] = encoding
+        with FileProbe.get(file_name).mapped() as probe:
+            data, skip_bad_lines = None, False
+            if ragged_rows:
+                data, dialect, skip_bad_lines = _ragged_rows_input(file_name, dialect, header)
+            kwargs, _, resolved = _csv_read_plan(file_name, dialect, header=header, is_nty_file=is_nty_file,
+                                                 projection=projection)
+            if skip_bad_lines:
+                kwargs['on_bad_lines'] = 'skip'
+            source = io.BytesIO(data) if data is not None else probe.source()
+            with pd.read_csv(source, chunksize=chunk_size, **kwargs) as reader:
+                for i, chunk in enumerate(reader):
+                    if i == 0:
+                        is_valid, reason = _is_valid_csv_frame(chunk, dialect['sep'], is_nty_file=is_nty_file)
+                        if not is_valid:
+                            logger.warning(f"Dialecte rejeté pour la lecture par chunks de {file_name}: {reason}")
+                            dialect = None
+                            break
+                    chunk.attrs['projection'] = {'ref': resolved['ref'], 'qte': resolved['qte']}
+                    chunk.attrs['dialect'] = dialect
+                    yield chunk
+        if dialect is not None:
+            if entity and dialect != cached:
+                update_dialect_cache(entity, signature, dialect)
+            return
+
+    # Dialecte incertain: lecture complète (détection exhaustive) puis découpage
+    result = read_dataset_file(file_name, header=header, entity=entity, projection=projection, ragged_rows=ragged_rows)
+    if result['projection'] is None:
+        raise ValueError(f"Colonnes référence/quantité introuvables dans {file_name}")
+    df = result['dataset']
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        chunk.attrs['projection'] = result['projection']
+        chunk.attrs['dialect'] = result['dialect']
+        yield chunk
 
 
 # ------------------------------------------------------------------------------
@@ -477,74 +1631,109 @@ def get_resource_path(relative_path: str) -> str:    # used for creating .exe (m
     return os.path.join(base_path, relative_path)
 
 
+# ------------------------------------------------------------------------------
+#     Table des jetons de stock (config/stock_tokens.yaml), compilée une fois
+# ------------------------------------------------------------------------------
+# Table utilisée si stock_tokens.yaml est absent ou invalide
+DEFAULT_STOCK_TOKEN_TABLE = {
+    'tokens': {"": 0, "N/A": 0, "NA": 0, "NONE": 0,
+               "AVAILABLE": 100, "IN STOCK": 100, "INSTOCK": 100, "EN STOCK": 100, "ENSTOCK": 100,
+               "OUT OF STOCK": 0, "OUTOFSTOCK": 0, "RUPTURE": 0, "ÉPUISÉ": 0, "EPUISE": 0},
+    'patterns': [{'match': r'^(?:>=|<=|>|<|\+)(.*)$', 'value': 'int'},
+                 {'match': r'^(\d+)\s*-[^-]*$', 'value': 'int'}],
+}
+_STOCK_RULES = {}
+
+
+class StockRules:
+    """
+    Table de jetons compilée: dictionnaire texte -> quantité, puis expressions
+    régulières essayées dans l'ordre. Obtenir par stock_rules().
+    """
+
+    def __init__(self, tokens: dict, patterns: list):
+        self.tokens = {str(token).strip().upper(): int(value) for token, value in tokens.items()}
+        # value: 'int' (nombre du premier groupe) ou quantité fixe
+        self.patterns = [(re.compile(p['match']), p.get('value', 'int')) for p in patterns]
+        for regex, value in self.patterns:
+            if value == 'int' and regex.groups < 1:
+                raise ValueError(f"motif de stock '{regex.pattern}' (value: int) sans groupe de capture")
+        # Empreinte de la table (clé du cache fournisseurs)
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [sorted(self.tokens.items()), [(r.pattern, str(v)) for r, v in self.patterns]]).encode('utf-8')).hexdigest()[:16]
+
+    def match(self, value_str: str) -> int | None:
+        """Quantité d'un texte normalisé (strip + majuscules), None si aucune règle ne s'applique."""
+        quantity = self.tokens.get(value_str)
+        if quantity is not None:
+            return quantity
+        for regex, value in self.patterns:
+            m = regex.match(value_str)
+            if m:
+                return _stock_group_value(m.group(1)) if value == 'int' else int(value)
+        return None
+
+
+def _stock_group_value(text: str) -> int:
+    try:
+        return int(text.strip())
+    except Exception:
+        return 0
+
+
+def load_stock_token_table() -> dict:
+    data = load_yaml_config(STOCK_TOKENS_PATH) if Path(STOCK_TOKENS_PATH).is_file() else None
+    if not isinstance(data, dict) or not isinstance(data.get('tokens'), dict) \
+            or not isinstance(data.get('patterns', []), list):
+        if data is not None:
+            logger.warning(f"-- ⚠️ -- {STOCK_TOKENS_PATH} invalide, table de jetons par défaut")
+        return DEFAULT_STOCK_TOKEN_TABLE
+    return {'tokens': data['tokens'], 'patterns': data.get('patterns') or []}
+
+
+def stock_rules(overrides: dict | None = None) -> StockRules:
+    """
+    Table compilée (stock_tokens.yaml + jetons propres à l'entité, clé stock_tokens
+    de header_mappings.yaml). Compilée une fois par combinaison et version du fichier.
+    """
+    try:
+        version = os.stat(STOCK_TOKENS_PATH).st_mtime_ns
+    except OSError:
+        version = None
+    key = (version, json.dumps(overrides or {}, sort_keys=True, default=str))
+    rules = _STOCK_RULES.get(key)
+    if rules is None:
+        table = load_stock_token_table()
+        try:
+            rules = StockRules({**table['tokens'], **(overrides or {})}, table['patterns'])
+        except (TypeError, ValueError, KeyError, re.error) as e:
+            logger.warning(f"-- ⚠️ -- Jetons de stock invalides ({e}), table par défaut")
+            rules = StockRules(DEFAULT_STOCK_TOKEN_TABLE['tokens'], DEFAULT_STOCK_TOKEN_TABLE['patterns'])
+        _STOCK_RULES[key] = rules
+    return rules
+
+
 # ------------------------------------------------------------------------------
 #          Remove >= from Stock & change 'AVAILABLE' by 3 & 'N/A', -1 by 0
 # ------------------------------------------------------------------------------
-def process_stock_value(value):
+def process_stock_value(value, rules: StockRules | None = None):
     """
     Convert stock value to integer:
-    - '>10' -> 10
-    - '>=10' -> 10
-    - '<10' -> 10
-    - '<=10' -> 10
-    - 'AVAILABLE' -> 100 (or adjust as needed)
-    - 'N/A', 'NA', 'NONE', '' -> 0
+    - jetons et formes de config/stock_tokens.yaml ('AVAILABLE' -> 100, 'N/A' -> 0,
+      '>=10' / '<10' / '+10' -> 10, '10-20' -> 10...)
     - numeric strings -> int
     - float -> int
     - NaN/None -> 0
     - fallback: 0
     """
-    import pandas as pd
     if pd.isna(value):
         return 0
     if isinstance(value, (int, float)):
         return int(value)
     value_str = str(value).strip().upper()
-    if value_str in ["N/A", "NA", "NONE", ""]:
-        return 0
-    if value_str == "AVAILABLE":
-        return 100  # or adjust as needed
-    # Handle common stock representations
-    if value_str in ["IN STOCK", "INSTOCK", "EN STOCK", "ENSTOCK"]:
-        return 100  # or adjust as needed
-    if value_str in ["OUT OF STOCK", "OUTOFSTOCK", "RUPTURE", "ÉPUISÉ", "EPUISE"]:
-        return 0
-    # Handle >= and <=
-    if value_str.startswith(">="):
-        try:
-            return int(value_str[2:].strip())
-        except Exception:
-            return 0
-    if value_str.startswith("<="):
-        try:
-            return int(value_str[2:].strip())
-        except Exception:
-            return 0
-    # Handle > and <
-    if value_str.startswith(">"):
-        try:
-            return int(value_str[1:].strip())
-        except Exception:
-            return 0
-    if value_str.startswith("<"):
-        try:
-            return int(value_str[1:].strip())
-        except Exception:
-            return 0
-    # Handle + prefix (e.g., "+10" meaning more than 10)
-    if value_str.startswith("+"):
-        try:
-            return int(value_str[1:].strip())
-        except Exception:
-            return 0
-    # Handle range format (e.g., "10-20" -> take the minimum)
-    if "-" in value_str and not value_str.startswith("-"):
-        try:
-            parts = value_str.split("-")
-            if len(parts) == 2 and parts[0].strip().isdigit():
-                return int(parts[0].strip())
-        except Exception:
-            pass
+    quantity = (rules or stock_rules()).match(value_str)
+    if quantity is not None:
+        return quantity
     # Try to parse as integer
     try:
         return int(float(value_str))
@@ -552,6 +1741,79 @@ def process_stock_value(value):
         return 0
 
 
+_STOCK_INTEGER = r'^[0-9]{1,18}$'
+_STOCK_PLAIN_NUMBER = r'^-?(?:[0-9]{1,15}(?:\.[0-9]*)?|\.[0-9]+)$'   # '12', '-3', '4.7'
+
+
+def process_stock_series(series: pd.Series, rules: StockRules | None = None) -> pd.Series:
+    """
+    process_stock_value sur toute une colonne. Colonne numérique: conversion
+    directe; sinon seules les valeurs distinctes sont normalisées (table de jetons
+    et expressions régulières appliquées à toute la colonne) puis redistribuées
+    par leurs codes.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        if not series.hasnans:
+            return series.astype('int64')
+    elif pd.api.types.is_float_dtype(series):
+        values = series.fillna(0)
+        if values.empty or values.abs().max() < 2 ** 63:
+            return values.astype('int64')
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    normalized = _normalize_stock_uniques(np.asarray(uniques, dtype=object), rules or stock_rules())
+    return pd.Series(np.where(codes < 0, 0, normalized[codes]), index=series.index, name=series.name)
+
+
+def _normalize_stock_uniques(values: np.ndarray, rules: StockRules) -> np.ndarray:
+    """
+    Stock entier de valeurs distinctes non nulles (tableau object). Tableau int64,
+    ou object si une valeur dépasse int64.
+    """
+    result = np.zeros(len(values), dtype=np.int64)
+    pending = np.ones(len(values), dtype=bool)
+    is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    if is_str.any():
+        positions = np.flatnonzero(is_str)
+        text = pd.Series(values[positions], dtype=object).str.strip().str.upper()
+
+        tokens = text.map(rules.tokens)
+        done = tokens.notna().to_numpy().copy()
+        result[positions[done]] = tokens[done].astype('int64').to_numpy()
+
+        for regex, value in rules.patterns:
+            # Ancré au début du texte, comme regex.match dans StockRules.match
+            anchored = f'^(?:{regex.pattern})'
+            if value != 'int':
+                matched = text.str.match(anchored).to_numpy(dtype=bool) & ~done
+                result[positions[matched]] = int(value)
+                done |= matched
+                continue
+            group = text.str.extract(anchored, expand=True)[0]
+            matched = group.notna().to_numpy() & ~done
+            group = group[matched].str.strip()
+            integer = group.str.match(_STOCK_INTEGER).to_numpy(dtype=bool)
+            quantities = np.zeros(len(group), dtype=np.int64)
+            quantities[integer] = group[integer].astype('int64').to_numpy()
+            # Groupe non trivial ('1_0', chiffres non ASCII...): même conversion que la version scalaire
+            quantities[~integer] = [_stock_group_value(g) for g in group[~integer]]
+            result[positions[matched]] = quantities
+            done |= matched
+
+        plain = text.str.match(_STOCK_PLAIN_NUMBER).to_numpy(dtype=bool) & ~done
+        # int(float(x)): troncature vers zéro, comme la version scalaire
+        result[positions[plain]] = np.trunc(text[plain].astype(float).to_numpy())
+        done |= plain
+        pending[positions[done]] = False
+
+    rest = np.flatnonzero(pending)
+    quantities = [process_stock_value(values[i], rules) for i in rest]
+    if any(abs(q) >= 2 ** 63 for q in quantities):
+        # Hors int64 (1e19, '1e30'...): entiers Python, comme la version scalaire
+        result = result.astype(object)
+    result[rest] = quantities
+    return result
+
+
 # ------------------------------------------------------------------------------
 #         Remove spaces before/after '='  + avoid '' or "" in the env file
 # ------------------------------------------------------------------------------
@@ -644,11 +1906,12 @@ def get_header_mappings_path():
 HEADER_MAPPINGS_PATH = get_header_mappings_path()
 
 ALLOWED_TARGETS = ['nom_reference', 'quantite_stock']
+MAPPING_BASE_KEYS = ('columns', 'no_header', 'multi_file')
 
 def load_header_mappings():
     """
     Loads header mappings from YAML. Supports both old (list) and new (dict with no_header/columns/multi_file) formats.
-    Returns a dict: {entity: {'no_header': bool, 'multi_file': bool, 'columns': list}}
+    Returns a dict: {entity: {'no_header': bool, 'multi_file': bool, 'columns': list, **read options}}
     """
     path = get_header_mappings_path()
     data = read_yaml_file(path)
@@ -658,11 +1921,14 @@ def load_header_mappings():
             no_header = value.get('no_header', False)
             multi_file = value.get('multi_file', False)
             columns = value.get('columns', [])
+            # Per-entity read options (e.g. csv_backend) are kept as-is
+            options = {k: v for k, v in value.items() if k not in MAPPING_BASE_KEYS}
         else:
             no_header = False
             multi_file = False
             columns = value
-        result[entity] = {'no_header': no_header, 'multi_file': multi_file, 'columns': columns}
+            options = {}
+        result[entity] = {**options, 'no_header': no_header, 'multi_file': multi_file, 'columns': columns}
     return result
 
 
@@ -679,17 +1945,27 @@ def get_entity_mappings(entity):
         return entry, False, False
 
 
+def get_entity_read_options(entity):
+    """
+    Returns the per-entity read options stored next to the mapping in
+    header_mappings.yaml (e.g. {'csv_backend': 'pyarrow'}), {} if none.
+    """
+    entry = load_header_mappings().get(entity, {})
+    return {k: v for k, v in entry.items() if k not in MAPPING_BASE_KEYS}
+
+
 def set_entity_mappings(entity, mapping_data):
     """
     Save the mapping for an entity.
     mapping_data can be:
       - a list of mappings (old format)
       - a dict with keys: columns (list), no_header (bool), multi_file (bool) (new format)
+    Per-entity read options already in the file are kept.
     """
     mappings = load_header_mappings()
     if isinstance(mapping_data, dict):
         # New format
-        mappings[entity] = mapping_data
+        mappings[entity] = {**get_entity_read_options(entity), **mapping_data}
     else:
         # Old format (list)
         mappings[entity] = [m for m in mapping_data if m.get('target') in ALLOWED_TARGETS]